@@ -1,473 +1,4395 @@
 import os
+import sys
 import configparser
-import subprocess
 from pathlib import Path
-from colorama import init, Fore, Style
 import shutil
+import stat
 import time
+import json
+import threading
+import functools
+from contextlib import ExitStack, contextmanager, nullcontext
 
-init(autoreset=True)
+# Heavier modules (hashlib, zlib, uuid, subprocess, concurrent.futures, argparse, colorama)
+# are imported where they are used, so headless commands like `list --json` start fast.
 
 CONFIG_FILE = "config.ini"
 
-# ---------- First-time setup ----------
-config = configparser.ConfigParser()
-if not os.path.exists(CONFIG_FILE):
-    palserver_dir = input(Fore.CYAN + Style.BRIGHT +
-                          "Enter full path to your PalServer folder (ex. C:\\Program Files (x86)\\Steam\\SteamApps\\common\\PalServer): " +
-                          Style.RESET_ALL).strip()
-    config['DEFAULT'] = {'palserver_dir': palserver_dir}
-    with open(CONFIG_FILE, 'w') as f:
-        config.write(f)
-
-config.read(CONFIG_FILE)
-PALSERVER_DIR = Path(config['DEFAULT']['palserver_dir'])
-SAVE_DIR = PALSERVER_DIR / "Pal" / "Saved" / "SaveGames" / "0"
-
-# Paths
-GUS_FILE = PALSERVER_DIR / "Pal" / "Saved" / "Config" / "WindowsServer" / "GameUserSettings.ini"
-WS_FILE = PALSERVER_DIR / "Pal" / "Saved" / "Config" / "WindowsServer" / "PalWorldSettings.ini"
-DEFAULT_WS = PALSERVER_DIR / "DefaultPalWorldSettings.ini"
-PAKS_DIR = PALSERVER_DIR / "Pal" / "Content" / "Paks"
-BIN_DIR = PALSERVER_DIR / "Pal" / "Binaries" / "Win64"
-
-ACTIVE_ID = None
-
-# ---------- Determine active world ----------
-if GUS_FILE.exists():
-    with open(GUS_FILE, 'r') as f:
+# Mod binaries are never edited in place, so they are safe to share between worlds
+STORE_SUFFIXES = {".pak", ".ucas", ".utoc", ".sig", ".dll"}
+DEFAULT_COPY_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+COPY_CHUNK = 8 * 1024 * 1024
+FICLONE = 0x40049409
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_SET_SYSCALL = {"x86_64": 251, "aarch64": 30}
+
+SNAPSHOT_PATTERNS = ["*.sav", "Players/*.sav", "PalWorldSettings.ini"]
+HOT_BACKUP_PATTERNS = ["*.sav", "Players/*.sav"]
+# Tries at snapshotting a world whose saves the server keeps writing (see snapshot_all_worlds)
+SNAPSHOT_RETRIES = 3
+PURGE_PREFIX = ".purging-"
+
+
+class SaveManagerError(Exception):
+    """An operation can't be done as asked (unknown world, missing server files, ...)."""
+
+
+class IntegrityError(SaveManagerError):
+    """A world failed verification; problems is a list of {"path": ..., "issue": ...}."""
+
+    def __init__(self, world, problems):
+        super().__init__(f"{world} failed verification: " +
+                         "; ".join(f"{p['path']}: {p['issue']}" for p in problems[:3]) +
+                         (f" (and {len(problems) - 3} more)" if len(problems) > 3 else ""))
+        self.problems = problems
+
+
+class JobCancelled(SaveManagerError):
+    """The job running this operation was cancelled; raised at the next file boundary."""
+
+
+class SaveChangedError(SaveManagerError):
+    """A save was written while it was being backed up; try again once the server is done writing."""
+
+
+# ---------- Job Progress ----------
+# The job (see JobQueue) the current thread works for. Copy loops report to it
+# between files, which is also where a cancelled job stops.
+_job_local = threading.local()
+
+def current_job():
+    return getattr(_job_local, "job", None)
+
+def job_expect(files=0, nbytes=0):
+    """Add work the current job is about to do to its totals."""
+    job = current_job()
+    if job is not None:
+        job.expect(files, nbytes)
+
+def job_checkpoint():
+    """Raise JobCancelled if the current job was cancelled."""
+    job = current_job()
+    if job is not None:
+        job.checkpoint()
+
+# ---------- Copy Engine ----------
+def _kernel_copy(fsrc, fdst):
+    """Copy between two fds inside the kernel. Returns False if neither syscall is usable here.
+
+    A syscall that stops short of st_size (FUSE, some network mounts and
+    /proc-like files report EOF early or a wrong size) counts as unusable,
+    and the destination is emptied again for the next method.
+    """
+    size = os.fstat(fsrc).st_size
+    calls = ["copy_file_range", "sendfile"] if sys.platform.startswith("linux") and size else []
+    for name in calls:
+        if not hasattr(os, name):
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if name == "sendfile":
+                    sent = os.sendfile(fdst, fsrc, offset, size - offset)
+                else:
+                    sent = os.copy_file_range(fsrc, fdst, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            # Unsupported for this pair of files (cross-device, odd filesystem): try the next one
+            if offset:
+                raise
+        if offset == size:
+            return True
+        os.lseek(fsrc, 0, os.SEEK_SET)
+        os.lseek(fdst, 0, os.SEEK_SET)
+        os.ftruncate(fdst, 0)
+    return False
+
+def copy_file(src, dsts):
+    """Copy src to every path in dsts, reading the source only once."""
+    with open(src, 'rb') as fsrc, ExitStack() as stack:
+        outs = [stack.enter_context(open(d, 'wb')) for d in dsts]
+        if len(outs) != 1 or not _kernel_copy(fsrc.fileno(), outs[0].fileno()):
+            buf = bytearray(COPY_CHUNK)
+            view = memoryview(buf)
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                for out in outs:
+                    out.write(view[:n])
+    for d in dsts:
+        shutil.copystat(src, d)
+
+def clone_file(src, dst):
+    """Copy-on-write clone of src (a reflink on btrfs/XFS). Returns False where the filesystem can't."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            return False
+    shutil.copystat(src, dst)
+    return True
+
+def throttled_copy(src, dst, rate=0):
+    """Copy src in 1 MB chunks at no more than rate bytes per second (0 = no limit)."""
+    start = time.monotonic()
+    done = 0
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        for chunk in iter(lambda: fsrc.read(1024 * 1024), b""):
+            fdst.write(chunk)
+            done += len(chunk)
+            ahead = done / rate - (time.monotonic() - start) if rate else 0
+            if ahead > 0:
+                time.sleep(ahead)
+    shutil.copystat(src, dst)
+
+def background_io_priority():
+    """Lower the calling thread's disk priority, so its copies wait for the game server's I/O."""
+    try:
+        import ctypes
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentThread.restype = ctypes.c_void_p
+            kernel32.SetThreadPriority(ctypes.c_void_p(kernel32.GetCurrentThread()), THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform.startswith("linux"):
+            import platform
+            nr = IOPRIO_SET_SYSCALL.get(platform.machine())
+            if nr:
+                # who=0 with IOPRIO_WHO_PROCESS is the calling thread
+                ctypes.CDLL(None, use_errno=True).syscall(nr, 1, 0, IOPRIO_CLASS_IDLE << 13)
+    except (OSError, AttributeError):
+        pass
+
+def run_copy_jobs(jobs, func, workers=DEFAULT_COPY_WORKERS):
+    """Run func(src, dsts) for every (src, dsts) job on a bounded thread pool.
+
+    Each copy counts toward the calling thread's job, and none is started once that job is cancelled.
+    """
+    job = current_job()
+
+    def run(src, dsts):
+        _job_local.job = job
+        job_checkpoint()
+        func(src, dsts)
+        if job is not None:
+            job.advance(len(dsts), os.stat(src).st_size * len(dsts))
+
+    if len(jobs) <= 1:
+        for src, dsts in jobs:
+            run(src, dsts)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(run, src, dsts) for src, dsts in jobs]:
+            future.result()
+
+# ---------- Mod Store ----------
+def hash_file(path, chunk_size=1024 * 1024):
+    import hashlib
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _inode_key(st):
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+def link_or_copy(src, dst):
+    """Replace dst with a hardlink to src, or a plain copy if linking is not possible."""
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    tmp = dst.with_name(dst.name + ".pwsm-tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        copy_file(src, [tmp])
+    os.replace(tmp, dst)
+
+def private_copy(src, dst):
+    """Replace dst with a copy of src that shares no inode with it (a reflink where the filesystem can).
+
+    Written under a temp name and renamed over dst, so a dst that is a hardlink of src is never written through.
+    """
+    tmp = dst.with_name(dst.name + ".pwsm-tmp")
+    if tmp.exists():
+        tmp.unlink()
+    if not clone_file(src, tmp):
+        copy_file(src, [tmp])
+    os.replace(tmp, dst)
+
+def same_entry(a, b):
+    if a[2] and b[2]:
+        return a[2] == b[2]
+    return a[:2] == b[:2]
+
+class ModStore:
+    """Content-addressed store for mod binaries. World folders hardlink into it.
+
+    Files under the private folders (the live mod folders, which mod tools
+    and users update in place) get their own copy instead: a write through a
+    hardlink would change the blob, and with it every world that has the file.
+    """
+
+    def __init__(self, root, workers=DEFAULT_COPY_WORKERS, private=()):
+        self.root = root
+        self.index_file = root / "index.json"
+        self.corrupt_dir = root / "corrupt"
+        self.workers = workers
+        self.private = [Path(p) for p in private]
+        self._index = None
+
+    def is_private(self, path):
+        return any(p == path or p in path.parents for p in self.private)
+
+    def blob_path(self, digest):
+        return self.root / digest[:2] / digest
+
+    def linked_blob(self, path, digest):
+        """The blob (or quarantined corrupt blob) named digest that path is a hardlink of, or None."""
+        for blob in (self.blob_path(digest), self.corrupt_dir / digest):
+            try:
+                if os.path.samefile(path, blob):
+                    return blob
+            except OSError:
+                pass
+        return None
+
+    def load_index(self):
+        """Cached digests keyed by inode, so files already linked into the store are never rehashed."""
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_file.read_text())
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def save_index(self):
+        if self._index is None:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._index))
+        os.replace(tmp, self.index_file)
+
+    def file_digest(self, path):
+        index = self.load_index()
+        key = _inode_key(path.stat())
+        digest = index.get(key)
+        if digest is None:
+            digest = hash_file(path)
+            index[key] = digest
+        return digest
+
+    def store_blob(self, path):
+        """Add a file to the blob store and return the blob path."""
+        digest = self.file_digest(path)
+        blob = self.blob_path(digest)
+        private = self.is_private(path)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_name(f"{digest}.{threading.get_ident()}.tmp")
+            if private:
+                copy_file(path, [tmp])
+            else:
+                try:
+                    os.link(path, tmp)
+                except OSError:
+                    copy_file(path, [tmp])
+            os.replace(tmp, blob)
+        elif not private and not os.path.samefile(path, blob):
+            # Already stored from another world: swap this duplicate for a link to the blob
+            try:
+                link_or_copy(blob, path)
+            except OSError:
+                pass
+        return blob
+
+    def materialize_file(self, src, dsts):
+        """Hardlink mod binaries from the blob store into dsts and copy everything else."""
+        if src.suffix.lower() in STORE_SUFFIXES:
+            blob = self.store_blob(src)
+            for dst in dsts:
+                if self.is_private(dst):
+                    private_copy(blob, dst)
+                    # The copy has the blob's contents: remember its digest so it is never rehashed
+                    self.load_index()[_inode_key(dst.stat())] = blob.name
+                else:
+                    link_or_copy(blob, dst)
+        else:
+            copy_file(src, dsts)
+
+    def unshare_tree(self, root):
+        """Give every file under root that is still a hardlink into the store a copy of its own.
+
+        Live folders filled by older versions of this tool, and world folders
+        activated through links, share their mod binaries with other worlds.
+        """
+        if not root.exists():
+            return
+        paths = [root] if root.is_file() else [Path(d) / f for d, _, files in os.walk(root) for f in files]
+        for path in paths:
+            st = path.stat()
+            if st.st_nlink > 1 and path.suffix.lower() in STORE_SUFFIXES:
+                digest = self.file_digest(path)
+                private_copy(path, path)
+                self.load_index()[_inode_key(path.stat())] = digest
+        self.save_index()
+
+    def gc(self):
+        """Drop blobs no world links to any more and forget hashes of inodes that are gone.
+
+        A blob whose inode changed since it was indexed is hashed again, and one
+        whose contents no longer match its name (written in place through one of
+        its links) is moved to corrupt/, so no world is linked to it again.
+        Returns the digests of the blobs moved there.
+        """
+        if not self.root.exists():
+            return []
+        old = self.load_index()
+        index, corrupt = {}, []
+        recent = time.time() - 3600
+        for blob in self.root.glob("??/*"):
+            st = blob.stat()
+            key = _inode_key(st)
+            if st.st_ctime > recent:
+                # May belong to a sync that is still running; leave it for the next collection
+                if blob.suffix != ".tmp":
+                    index[key] = blob.name
+            elif blob.suffix == ".tmp" or st.st_nlink <= 1:
+                blob.unlink()
+            elif old.get(key) != blob.name and hash_file(blob) != blob.name:
+                self.corrupt_dir.mkdir(exist_ok=True)
+                os.replace(blob, self.corrupt_dir / blob.name)
+                corrupt.append(blob.name)
+            else:
+                index[key] = blob.name
+        if self.corrupt_dir.exists():
+            for blob in self.corrupt_dir.iterdir():
+                if blob.stat().st_nlink <= 1:
+                    blob.unlink()
+        # Digests of private copies (see materialize_file) stay while their blob does
+        kept = set(index.values())
+        index.update((key, digest) for key, digest in old.items() if digest in kept and key not in index)
+        self._index = index
+        self.save_index()
+        return corrupt
+
+    # ---------- Incremental Sync ----------
+    def scan_tree(self, root, with_hash=False):
+        """Return the manifest of root ({relative path: (size, mtime_ns, digest)}) and its subfolders."""
+        manifest, dirs = {}, set()
+        for dirpath, dirnames, files in os.walk(root):
+            rel_dir = Path(dirpath).relative_to(root)
+            dirs.update((rel_dir / d).as_posix() for d in dirnames)
+            for name in files:
+                p = Path(dirpath) / name
+                st = p.stat()
+                digest = self.file_digest(p) if with_hash else None
+                manifest[(rel_dir / name).as_posix()] = (st.st_size, st.st_mtime_ns, digest)
+        return manifest, dirs
+
+    def sync_tree(self, src, *dsts, with_hash=False):
+        """Make every folder in dsts mirror src, touching only files that were added, changed or removed.
+
+        Files needed by several destinations are read once and fanned out.
+        Returns (files written, bytes written, files removed).
+        """
+        src_files, src_dirs = self.scan_tree(src, with_hash)
+        pending = {}
+        removed = 0
+        for dst in dsts:
+            dst_files, dst_dirs = self.scan_tree(dst, with_hash) if dst.exists() else ({}, set())
+
+            # Remove first so a file replacing a folder (or the other way round) has room
+            for rel in dst_files.keys() - src_files.keys():
+                (dst / rel).unlink()
+                removed += 1
+            for rel in sorted(dst_dirs - src_dirs, reverse=True):
+                path = dst / rel
+                if path.is_dir() and not any(path.iterdir()):
+                    path.rmdir()
+
+            dst.mkdir(parents=True, exist_ok=True)
+            for rel in sorted(src_dirs):
+                (dst / rel).mkdir(parents=True, exist_ok=True)
+
+            for rel, entry in src_files.items():
+                if rel not in dst_files or not same_entry(entry, dst_files[rel]):
+                    pending.setdefault(rel, []).append(dst / rel)
+
+        written = sum(len(targets) for targets in pending.values())
+        written_bytes = sum(src_files[rel][0] * len(targets) for rel, targets in pending.items())
+        job_expect(written, written_bytes)
+        try:
+            run_copy_jobs([(src / rel, targets) for rel, targets in pending.items()], self.materialize_file, self.workers)
+        finally:
+            # Keep the digests of what was copied before a cancel
+            self.save_index()
+        return written, written_bytes, removed
+
+    def sync_file(self, src, *dsts):
+        """Copy a single file to every dst that doesn't already have the same size and mtime."""
+        st = src.stat()
+        targets = []
+        for dst in dsts:
+            if dst.exists():
+                d = dst.stat()
+                if (st.st_size, st.st_mtime_ns) == (d.st_size, d.st_mtime_ns):
+                    continue
+            targets.append(dst)
+        if targets:
+            job_expect(len(targets), st.st_size * len(targets))
+            run_copy_jobs([(src, targets)], self.materialize_file)
+            self.save_index()
+        return len(targets), st.st_size * len(targets), 0
+
+def remove_path(path):
+    if is_link(path):
+        os.unlink(path)
+    elif path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+# ---------- Linked Activation ----------
+def is_link(path):
+    """True for symlinks and for Windows directory junctions."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    # st_reparse_tag only exists on Windows; 0xA0000003 is IO_REPARSE_TAG_MOUNT_POINT
+    return stat.S_ISLNK(st.st_mode) or getattr(st, "st_reparse_tag", 0) == 0xA0000003
+
+def _link_target(path):
+    target = os.readlink(path)
+    return target[4:] if target.startswith("\\\\?\\") else target
+
+def _make_dir_link(target, link):
+    try:
+        os.symlink(target, link, target_is_directory=True)
+    except OSError:
+        # Symlinks need admin or developer mode on Windows, junctions don't
+        if os.name != "nt":
+            raise
+        import _winapi
+        _winapi.CreateJunction(target, str(link))
+
+def swap_link(link, target):
+    """Point link at target by creating the new link under a temp name and renaming it over the old one."""
+    target = os.path.abspath(target)
+    if is_link(link) and os.path.normcase(_link_target(link)) == os.path.normcase(target):
+        return
+    tmp = link.with_name(link.name + ".pwsm-link")
+    remove_path(tmp)
+    _make_dir_link(target, tmp)
+    if link.exists() and not is_link(link):
+        # First activation in link mode: the real folder was already saved into the world
+        shutil.rmtree(link)
+    try:
+        os.replace(tmp, link)
+    except OSError:
+        # Windows refuses to rename a directory link over another one
+        os.unlink(link)
+        os.replace(tmp, link)
+
+# ---------- World Index ----------
+# A directory modified this recently may change again within its mtime granularity
+# (2s on FAT and some network mounts), so its mtime isn't trusted yet.
+RACY_MTIME_NS = 2 * 10**9
+# Bumped when index entries gain or change fields; an index of another version is rebuilt
+INDEX_VERSION = 2
+# Folders of SAVE_DIR holding this tool's own data (trash, mod store, snapshots, backups) rather than a world
+INTERNAL_DIRS = {"__trash__", "__manager__"}
+
+def _dir_signature(path):
+    """[inode, mtime] of a folder, or None while its mtime is too recent to rely on."""
+    st = path.stat()
+    if time.time_ns() - st.st_mtime_ns < RACY_MTIME_NS:
+        return None
+    return [st.st_ino, st.st_mtime_ns]
+
+def _scan_world(d, sig):
+    # Before anything else, as giving the world an id.txt changes the folder's mtime
+    uid = world_uid(d)
+    size = 0
+    for dirpath, _, files in os.walk(d):
+        for f in files:
+            try:
+                size += os.stat(os.path.join(dirpath, f)).st_size
+            except OSError:
+                pass
+    mods = [f"{folder}/{p.relative_to(d / 'Mods' / folder).as_posix()}"
+            for folder in ["~mods", "LogicMods"] for p in (d / "Mods" / folder).rglob("*.pak")]
+    if (d / "Mods" / "ue4ss").exists():
+        mods.append("ue4ss")
+    level = d / "Level.sav"
+    level_st = level.stat() if level.exists() else None
+    st = d.stat()
+    return {
+        "name": (d / "name.txt").read_text().strip() if (d / "name.txt").exists() else d.name,
+        # Follows the world through the renames of switches, unlike its folder name
+        "uid": uid,
+        # Also kept through renames, while a copy of the folder gets a new one (see _split_copied_uids)
+        "ino": st.st_ino,
+        "mtime": st.st_mtime,
+        "size": size,
+        "mods": sorted(mods),
+        "last_played": level_st.st_mtime if level_st else None,
+        # Finds Level.sav's stats in the SaveInspector cache without a stat
+        "level": _inode_key(level_st) if level_st else None,
+        "sig": sig,
+    }
+
+class WorldIndex:
+    """On-disk index of every world folder, so menu redraws don't rescan SAVE_DIR.
+
+    A refresh stats SAVE_DIR and each world folder, nothing else: SAVE_DIR is
+    listed again only when its mtime changed, and a world is rescanned only
+    when its own folder's did. Changes deeper inside a world (a renamed world,
+    synced mods, a restored save) don't show in those mtimes, so the
+    operations making them call update() or set_name().
+    """
+
+    def __init__(self, save_dir, path):
+        self.save_dir = save_dir
+        self.path = path
+        self._index = None
+        self._dir_sig = None
+
+    def load(self):
+        if self._index is None:
+            data = self._read()
+            self._dir_sig = data.get("dir")
+            self._index = data.get("worlds", {})
+        return self._index
+
+    def _read(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return data if data.get("version") == INDEX_VERSION else {}
+
+    def cached(self):
+        """The index as last saved, read into a new dict."""
+        return self._read().get("worlds", {})
+
+    def save(self):
+        self.path.parent.mkdir(exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "dir": self._dir_sig, "worlds": self._index}))
+        os.replace(tmp, self.path)
+
+    def refresh(self, live=None):
+        """Bring the index in line with SAVE_DIR, rescanning only the folders whose mtime changed.
+
+        live is the active world's folder: the server rewrites its saves in
+        place, so its Level.sav is checked as well.
+        """
+        index = self.load()
+        known = {entry["uid"]: entry.get("ino") for entry in index.values()}
+        changed = False
+        dir_sig = _dir_signature(self.save_dir)
+        if dir_sig is None or dir_sig != self._dir_sig:
+            with os.scandir(self.save_dir) as it:
+                folders = {e.name for e in it if e.is_dir() and e.name not in INTERNAL_DIRS}
+            for gone in index.keys() - folders:
+                del index[gone]
+            self._dir_sig = dir_sig
+            changed = True
+        else:
+            folders = set(index)
+        for folder in folders:
+            d = self.save_dir / folder
+            try:
+                sig = _dir_signature(d)
+                if sig is not None and folder == live:
+                    sig.append((d / "Level.sav").stat().st_mtime_ns if (d / "Level.sav").exists() else None)
+            except OSError:
+                # Gone since SAVE_DIR was listed; the next listing drops it
+                continue
+            entry = index.get(folder)
+            if entry is None or sig is None or entry["sig"] != sig:
+                index[folder] = _scan_world(d, sig)
+                changed = True
+        if changed:
+            self._split_copied_uids(index, known)
+            self.save()
+        return index
+
+    def update(self, *folders):
+        """Rescan these worlds now (dropping the ones that are gone), after an operation changed them."""
+        index = self.load()
+        known = {entry["uid"]: entry.get("ino") for entry in index.values()}
+        for folder in folders:
+            d = self.save_dir / folder
+            try:
+                index[folder] = _scan_world(d, _dir_signature(d))
+            except OSError:
+                index.pop(folder, None)
+        self._split_copied_uids(index, known)
+        self.save()
+
+    def _split_copied_uids(self, index, known):
+        """Give each world folder that was copied by hand, and so shares its id.txt, an id of its own.
+
+        known is {uid: folder inode} from before the rescan: the folder that had the
+        id then keeps it, as renames keep the inode and copies don't. Without one,
+        the folder with the oldest id.txt keeps it.
+        """
+        by_uid = {}
+        for folder, entry in index.items():
+            by_uid.setdefault(entry["uid"], []).append(folder)
+
+        def id_age(folder):
+            try:
+                return (self.save_dir / folder / "id.txt").stat().st_mtime_ns
+            except OSError:
+                return 0
+
+        for uid, folders in by_uid.items():
+            if len(folders) > 1:
+                folders.sort(key=lambda folder: (index[folder].get("ino") != known.get(uid), id_age(folder), folder))
+                for folder in folders[1:]:
+                    index[folder]["uid"] = new_world_uid(self.save_dir / folder)
+
+    def set_name(self, folder, name):
+        entry = self.load().get(folder)
+        if entry is not None:
+            entry["name"] = name
+            self.save()
+
+def format_size(size):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+# ---------- Snapshots ----------
+CHUNK_MIN = 16 * 1024
+CHUNK_MAX = 256 * 1024
+# Cuts can only fall after an anchor byte, and only where the crc32 of the
+# CHUNK_WINDOW bytes before it has the CHUNK_MASK bits clear: 1 in 256 anchors,
+# so on varied data a cut roughly every 64 KB past CHUNK_MIN.
+CHUNK_ANCHOR = 0x5A
+CHUNK_WINDOW = 16
+CHUNK_MASK = 0xFF
+
+def _cut_point(buf, start, end):
+    """First content-defined cut in buf[start:end], or end if there is none.
+
+    Anchors are found with bytes.find and only they are hashed, so this runs
+    at C speed (hundreds of MB/s) except on data made mostly of the anchor byte.
+    """
+    import zlib
+    i = start + CHUNK_MIN
+    while True:
+        i = buf.find(CHUNK_ANCHOR, i, end)
+        if i < 0:
+            return end
+        if not zlib.crc32(buf[i - CHUNK_WINDOW:i]) & CHUNK_MASK:
+            return i + 1
+        i += 1
+
+def is_compressed_save(f):
+    """True for a zlib- or Oodle-compressed .sav (PlZ/PlM header). Leaves f at the start."""
+    header = f.read(24)
+    f.seek(0)
+    if header[8:11] == b"CNK":
+        header = header[12:]
+    return header[8:11] == b"PlM" or (header[8:11] == b"PlZ" and header[11:12] in (b"\x31", b"\x32"))
+
+def iter_chunks(f, read_size=4 * 1024 * 1024, fixed=False):
+    """Yield the content-defined chunks of an open file, holding at most a few MB in memory.
+
+    fixed=True yields CHUNK_MAX-sized chunks instead, for compressed data,
+    where a change anywhere alters everything after it and content-defined
+    cuts find nothing to share.
+    """
+    if fixed:
+        yield from iter(lambda: f.read(CHUNK_MAX), b"")
+        return
+    buf, pos, eof = b"", 0, False
+    while True:
+        if not eof and len(buf) - pos < CHUNK_MAX:
+            more = f.read(read_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+        if pos >= len(buf):
+            return
+        cut = _cut_point(buf, pos, min(len(buf), pos + CHUNK_MAX))
+        yield buf[pos:cut]
+        pos = cut
+
+def world_uid(world_dir):
+    """Stable id for a world; folder names change every time worlds are switched.
+
+    A world folder copied by hand brings its id.txt along; WorldIndex gives the copy a new id.
+    """
+    id_file = world_dir / "id.txt"
+    if id_file.exists():
+        return id_file.read_text().strip()
+    return new_world_uid(world_dir)
+
+def new_world_uid(world_dir):
+    """Give a world a new id, e.g. one that turned out to be a copy of another world's."""
+    import uuid
+    uid = uuid.uuid4().hex
+    (world_dir / "id.txt").write_text(uid)
+    return uid
+
+def _snapshot_files(world_dir, patterns=SNAPSHOT_PATTERNS):
+    files = set()
+    for pattern in patterns:
+        files.update(p for p in world_dir.glob(pattern) if p.is_file())
+    return sorted(files)
+
+class SnapshotStore:
+    """Deduplicated, compressed point-in-time copies of world saves."""
+
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = root / "chunks"
+
+    def _store_chunk(self, chunk, compress=True):
+        """Store a chunk once (zlib-compressed when that helps). Returns (key, bytes written)."""
+        import hashlib
+        import zlib
+        key = hashlib.blake2b(chunk, digest_size=20).hexdigest()
+        path = self.chunk_dir / key[:2] / key
+        if path.exists():
+            return key, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        packed = zlib.compress(chunk, 6) if compress else chunk
+        data = b"z" + packed if len(packed) < len(chunk) else b"r" + chunk
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return key, len(data)
+
+    def _load_chunk(self, key):
+        import hashlib
+        import zlib
+        data = (self.chunk_dir / key[:2] / key).read_bytes()
+        chunk = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+        if hashlib.blake2b(chunk, digest_size=20).hexdigest() != key:
+            raise ValueError(f"Snapshot chunk {key} is corrupt")
+        return chunk
+
+    def list(self, world_dir):
+        """Snapshot manifests of a world, oldest first."""
+        snap_dir = self.root / world_uid(world_dir)
+        if not snap_dir.exists():
+            return []
+        return sorted((json.loads(p.read_text()) for p in snap_dir.glob("*.json")), key=lambda s: s["created"])
+
+    def create(self, world_dir, name=None):
+        """Snapshot a world's saves. Returns (snapshot id, new bytes stored), or (None, 0) if nothing changed.
+
+        Raises SaveChangedError if a save is written while it is read (the chunks
+        already stored are left for gc), so a running server's world is never torn.
+        """
+        snapshots = self.list(world_dir)
+        previous = snapshots[-1]["files"] if snapshots else {}
+        files = {}
+        new_bytes = 0
+        for path in _snapshot_files(world_dir):
+            rel = path.relative_to(world_dir).as_posix()
+            st = path.stat()
+            old = previous.get(rel)
+            if old and (old["size"], old["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                # Unchanged since the last snapshot: reuse its chunk list without reading the file
+                files[rel] = old
+                continue
+            chunks = []
+            with open(path, 'rb') as f:
+                # Compressed saves are neither worth content-defined cuts nor zlib again
+                packed = is_compressed_save(f)
+                for chunk in iter_chunks(f, fixed=packed):
+                    key, written = self._store_chunk(chunk, compress=not packed)
+                    new_bytes += written
+                    chunks.append(key)
+            after = path.stat()
+            if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                raise SaveChangedError(f"{rel} was written while it was snapshotted")
+            files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunks": chunks}
+        if snapshots and files == previous:
+            return None, 0
+
+        snap_dir = self.root / world_uid(world_dir)
+        snap_dir.mkdir(parents=True, exist_ok=True)
+        snap_id = time.strftime("%Y%m%d-%H%M%S")
+        if (snap_dir / f"{snap_id}.json").exists():
+            snap_id += f"-{len(snapshots)}"
+        manifest = {"id": snap_id, "created": time.time(), "name": name or world_dir.name, "files": files}
+        tmp = snap_dir / f"{snap_id}.tmp"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, snap_dir / f"{snap_id}.json")
+        return snap_id, new_bytes
+
+    def restore(self, world_dir, snap_id):
+        """Put a world's saves back to a snapshot. The current saves are snapshotted first."""
+        manifest = next((s for s in self.list(world_dir) if s["id"] == snap_id), None)
+        if manifest is None:
+            raise SaveManagerError(f"No snapshot {snap_id} for world {world_dir.name}")
+        self.create(world_dir, manifest["name"])
+
+        for rel, entry in manifest["files"].items():
+            dst = world_dir / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(dst.name + ".pwsm-tmp")
+            with open(tmp, 'wb') as f:
+                for key in entry["chunks"]:
+                    f.write(self._load_chunk(key))
+            os.utime(tmp, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            os.replace(tmp, dst)
+        # Saves created after the snapshot (e.g. players who joined later) don't belong to it
+        for path in _snapshot_files(world_dir):
+            if path.relative_to(world_dir).as_posix() not in manifest["files"]:
+                path.unlink()
+
+    def prune(self, world_dir, keep_last=24, keep_daily=30):
+        """Keep the newest keep_last snapshots plus the newest one of each of the last keep_daily days."""
+        snapshots = self.list(world_dir)
+        keep = {s["id"] for s in snapshots[-keep_last:]} if keep_last else set()
+        days = {}
+        for s in snapshots:
+            days[time.strftime("%Y-%m-%d", time.localtime(s["created"]))] = s["id"]
+        if keep_daily:
+            keep.update(days[d] for d in sorted(days)[-keep_daily:])
+        removed = 0
+        snap_dir = self.root / world_uid(world_dir)
+        for s in snapshots:
+            if s["id"] not in keep:
+                (snap_dir / f"{s['id']}.json").unlink()
+                removed += 1
+        return removed
+
+    def gc(self):
+        """Delete chunks no snapshot of any world refers to. Returns bytes freed."""
+        if not self.chunk_dir.exists():
+            return 0
+        used = set()
+        for manifest in self.root.glob("*/*.json"):
+            for entry in json.loads(manifest.read_text())["files"].values():
+                used.update(entry["chunks"])
+        freed = 0
+        for chunk in self.chunk_dir.glob("??/*"):
+            if chunk.name not in used:
+                freed += chunk.stat().st_size
+                chunk.unlink()
+        return freed
+
+# ---------- Hot Backups ----------
+class HotBackupStore:
+    """Timestamped copies of a world's .sav files, cheap enough to take after every autosave.
+
+    Changed saves are cloned (a reflink on btrfs/XFS costs no time or space until
+    the server rewrites the file) or, elsewhere, copied at no more than rate
+    bytes/s. Unchanged saves are hardlinked from the previous backup.
+    """
+
+    def __init__(self, root, rate=0):
+        self.root = root
+        self.rate = rate
+        # Devices where cloning failed once, so later copies don't try again
+        self._no_clone = set()
+
+    def _copy(self, src, dst, rate):
+        """Clone src, or copy it where the filesystem can't. Returns "cloned" or "copied"."""
+        dev = src.stat().st_dev
+        if dev not in self._no_clone:
+            if clone_file(src, dst):
+                return "cloned"
+            self._no_clone.add(dev)
+        throttled_copy(src, dst, rate)
+        return "copied"
+
+    def list(self, world_dir):
+        """Backup manifests of a world, oldest first."""
+        backup_dir = self.root / world_uid(world_dir)
+        backups = []
+        for manifest in backup_dir.glob("*/backup.json"):
+            if manifest.parent.name.startswith("."):
+                continue
+            try:
+                backups.append(json.loads(manifest.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(backups, key=lambda b: b["created"])
+
+    def create(self, world_dir):
+        """Back up a world's saves. Returns the manifest, or None if nothing changed since the last backup.
+
+        Raises SaveChangedError if a save is written while it is copied.
+        """
+        backups = self.list(world_dir)
+        previous = backups[-1] if backups else None
+        paths = {p.relative_to(world_dir).as_posix(): p for p in _snapshot_files(world_dir, HOT_BACKUP_PATTERNS)}
+        stats = {rel: path.stat() for rel, path in paths.items()}
+        files = {rel: {"size": st.st_size, "mtime_ns": st.st_mtime_ns} for rel, st in stats.items()}
+        if previous and previous["files"] == files:
+            return None
+
+        backup_dir = self.root / world_uid(world_dir)
+        backup_id = time.strftime("%Y%m%d-%H%M%S")
+        if (backup_dir / backup_id).exists():
+            backup_id += f"-{len(backups)}"
+        tmp = backup_dir / f".{backup_id}.tmp"
+        remove_path(tmp)
+        counts = {"cloned": 0, "copied": 0, "linked": 0, "bytes_copied": 0}
+        try:
+            for rel, path in paths.items():
+                dst = tmp / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if previous and previous["files"].get(rel) == files[rel]:
+                    try:
+                        os.link(backup_dir / previous["id"] / rel, dst)
+                        counts["linked"] += 1
+                        continue
+                    except OSError:
+                        pass
+                how = self._copy(path, dst, self.rate)
+                st = path.stat()
+                if (st.st_size, st.st_mtime_ns) != (stats[rel].st_size, stats[rel].st_mtime_ns):
+                    raise SaveChangedError(f"{rel} was written while it was backed up")
+                counts[how] += 1
+                if how == "copied":
+                    counts["bytes_copied"] += st.st_size
+        except BaseException:
+            remove_path(tmp)
+            raise
+        manifest = {"id": backup_id, "created": time.time(), "files": files, **counts}
+        (tmp / "backup.json").write_text(json.dumps(manifest))
+        os.replace(tmp, backup_dir / backup_id)
+        return manifest
+
+    def restore(self, world_dir, backup_id):
+        """Put a world's saves back to a backup. The current saves are backed up first."""
+        manifest = next((b for b in self.list(world_dir) if b["id"] == backup_id), None)
+        if manifest is None:
+            raise SaveManagerError(f"No hot backup {backup_id} for world {world_dir.name}")
+        self.create(world_dir)
+
+        src_dir = self.root / world_uid(world_dir) / backup_id
+        for rel in manifest["files"]:
+            dst = world_dir / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(dst.name + ".pwsm-tmp")
+            # Never hardlink back: the server rewrites saves in place, which would change the backup too
+            self._copy(src_dir / rel, tmp, 0)
+            os.replace(tmp, dst)
+        for path in _snapshot_files(world_dir, HOT_BACKUP_PATTERNS):
+            if path.relative_to(world_dir).as_posix() not in manifest["files"]:
+                path.unlink()
+
+    def prune(self, world_dir, keep=48):
+        """Delete all but the newest keep backups. Returns how many were deleted."""
+        backups = self.list(world_dir)
+        old = backups[:-keep] if keep else []
+        for b in old:
+            remove_path(self.root / world_uid(world_dir) / b["id"])
+        return len(old)
+
+# ---------- Save Inspector ----------
+# Palworld .sav files are a small header (PlZ + compression type) around a zlib
+# stream (zlib inside zlib for type 0x32) of an Unreal GVAS property tree. The
+# tree is read as a stream: values we don't need are decompressed and dropped,
+# so memory stays at a few MB even for Level.sav files that inflate to GBs.
+TICKS_PER_DAY = 864_000_000_000  # .NET ticks (100 ns)
+ZERO_GUID = "0" * 32
+
+class SaveFormatError(ValueError):
+    """A .sav file isn't in a format the inspector understands."""
+
+class _ZlibStream:
+    """File-like reader over a zlib stream, decompressing at most a MB at a time."""
+
+    def __init__(self, raw):
+        import zlib
+        self.raw = raw
+        self._d = zlib.decompressobj()
+        self._error = zlib.error
+        self._buf = bytearray()
+        self._eof = False
+
+    def read(self, n):
+        while len(self._buf) < n and not self._eof:
+            data = self._d.unconsumed_tail or self.raw.read(64 * 1024)
+            if not data:
+                self._buf += self._d.flush()
+                self._eof = True
+                break
+            try:
+                self._buf += self._d.decompress(data, 1024 * 1024)
+            except self._error as e:
+                raise SaveFormatError(f"Corrupt compressed data ({e})") from None
+            self._eof = self._d.eof
+        out = bytes(self._buf[:n])
+        del self._buf[:n]
+        return out
+
+class _GvasReader:
+    def __init__(self, f):
+        import struct
+        self.f = f
+        self._struct = struct
+
+    def read(self, n):
+        data = self.f.read(n)
+        if len(data) != n:
+            raise SaveFormatError("Save file is truncated")
+        return data
+
+    def skip(self, n):
+        while n > 0:
+            n -= len(self.read(min(n, 1024 * 1024)))
+
+    def unpack(self, fmt):
+        return self._struct.unpack(fmt, self.read(self._struct.calcsize(fmt)))[0]
+
+    def guid(self):
+        # FGuid::ToString() digits format, which is also how player save files are named
+        return "".join(f"{word:08X}" for word in self._struct.unpack("<4I", self.read(16)))
+
+    def fstring(self):
+        length = self.unpack("<i")
+        if length == 0:
+            return ""
+        if length < 0:
+            return self.read(-length * 2).decode("utf-16-le").rstrip("\0")
+        if length > 65536:
+            raise SaveFormatError("Implausible string length; not a GVAS property tree")
+        return self.read(length).decode("utf-8", errors="replace").rstrip("\0")
+
+    def optional_guid(self):
+        if self.unpack("<B"):
+            self.read(16)
+
+    def properties(self):
+        """Yield (name, type, size, extra) for each property up to the terminating None.
+
+        The caller must read or skip the size bytes of each value before asking for the next one.
+        """
+        while True:
+            name = self.fstring()
+            if name == "None":
+                return
+            ptype = self.fstring()
+            size = self.unpack("<q")
+            extra = None
+            if ptype == "StructProperty":
+                extra = self.fstring()
+                self.read(16)
+                self.optional_guid()
+            elif ptype in ("ArrayProperty", "SetProperty", "EnumProperty", "ByteProperty"):
+                extra = self.fstring()
+                self.optional_guid()
+            elif ptype == "MapProperty":
+                extra = (self.fstring(), self.fstring())
+                self.optional_guid()
+            elif ptype == "BoolProperty":
+                extra = bool(self.unpack("<B"))
+                self.optional_guid()
+            else:
+                self.optional_guid()
+            yield name, ptype, size, extra
+
+    def skip_properties(self):
+        for _, _, size, _ in self.properties():
+            self.skip(size)
+
+def open_save(f):
+    """Return (reader over the decompressed GVAS data, header info) for an open .sav file."""
+    import struct
+    header = f.read(12)
+    if len(header) < 12:
+        raise SaveFormatError("Save file is truncated")
+    uncompressed, compressed = struct.unpack("<ii", header[:8])
+    magic, save_type = header[8:11], header[11]
+    if magic == b"CNK":
+        header = f.read(12)
+        uncompressed, compressed = struct.unpack("<ii", header[:8])
+        magic, save_type = header[8:11], header[11]
+    info = {"format": magic.decode("ascii", errors="replace"), "save_type": save_type,
+            "uncompressed_bytes": uncompressed}
+    if magic == b"PlM":
+        raise SaveFormatError("Oodle-compressed save (PlM); only its header can be read")
+    if magic != b"PlZ" or save_type not in (0x30, 0x31, 0x32):
+        raise SaveFormatError("Not a Palworld save file")
+    stream = f
+    for _ in range(save_type - 0x30):
+        stream = _ZlibStream(stream)
+    return _GvasReader(stream), info
+
+def read_gvas_header(r):
+    if r.read(4) != b"GVAS":
+        raise SaveFormatError("Missing GVAS header")
+    save_game_version = r.unpack("<i")
+    ue4_version = r.unpack("<i")
+    ue5_version = r.unpack("<i") if save_game_version >= 3 else None
+    major, minor, patch = (r.unpack("<H") for _ in range(3))
+    changelist = r.unpack("<I")
+    branch = r.fstring()
+    r.unpack("<i")  # custom version format
+    r.skip(r.unpack("<i") * 20)  # custom versions: GUID + version each
+    return {
+        "save_game_version": save_game_version,
+        "package_version": ue4_version,
+        "package_version_ue5": ue5_version,
+        "engine": f"{major}.{minor}.{patch}-{changelist}+{branch}",
+        "save_class": r.fstring(),
+    }
+
+def _read_character_map(r, count):
+    """Count players and other characters (pals) in worldSaveData.CharacterSaveParameterMap."""
+    players = []
+    others = 0
+    for _ in range(count):
+        uid = None
+        for name, ptype, size, extra in r.properties():
+            if name == "PlayerUId" and extra == "Guid":
+                uid = r.guid()
+            else:
+                r.skip(size)
+        r.skip_properties()
+        if uid and uid != ZERO_GUID:
+            players.append(uid)
+        else:
+            others += 1
+    return players, others
+
+def _read_group_map(r, count):
+    groups = {}
+    for _ in range(count):
+        r.read(16)  # Guid key
+        group_type = None
+        for name, ptype, size, extra in r.properties():
+            if name == "GroupType" and ptype == "EnumProperty":
+                group_type = r.fstring().rpartition("::")[2]
+            else:
+                r.skip(size)
+        groups[group_type] = groups.get(group_type, 0) + 1
+    return groups
+
+def inspect_level(f):
+    """Version, player/pal/guild counts and in-game days of an open Level.sav."""
+    r, stats = open_save(f)
+    stats.update(read_gvas_header(r))
+    wanted = {"CharacterSaveParameterMap", "GroupSaveDataMap", "GameTimeSaveData"}
+    for name, ptype, size, extra in r.properties():
+        if name != "worldSaveData":
+            r.skip(size)
+            continue
+        for name, ptype, size, extra in r.properties():
+            if name == "CharacterSaveParameterMap" and ptype == "MapProperty":
+                r.unpack("<i")  # keys to remove
+                players, pals = _read_character_map(r, r.unpack("<i"))
+                stats.update(players=len(players), player_uids=players, pals=pals)
+            elif name == "GroupSaveDataMap" and ptype == "MapProperty":
+                r.unpack("<i")
+                groups = _read_group_map(r, r.unpack("<i"))
+                stats.update(guilds=groups.get("Guild", 0), groups=sum(groups.values()))
+            elif name == "GameTimeSaveData" and ptype == "StructProperty":
+                for time_name, _, time_size, _ in r.properties():
+                    if time_name == "GameDateTimeTicks":
+                        stats["game_days"] = r.unpack("<q") // TICKS_PER_DAY
+                    else:
+                        r.skip(time_size)
+            else:
+                r.skip(size)
+            wanted.discard(name)
+            if not wanted:
+                # Everything else in the (huge) world data is of no interest here
+                return stats
+        break
+    return stats
+
+def inspect_player(f):
+    """Version and player id of an open Players/<uid>.sav."""
+    r, stats = open_save(f)
+    stats.update(read_gvas_header(r))
+    for name, ptype, size, extra in r.properties():
+        if name != "SaveData":
+            r.skip(size)
+            continue
+        for name, ptype, size, extra in r.properties():
+            if name == "PlayerUId" and extra == "Guid":
+                stats["player_uid"] = r.guid()
+                return stats
+            r.skip(size)
+        break
+    return stats
+
+def _inspect_path(parse, path):
+    """parse() an open save file; errors are returned as {"error": ...}. Runs in pool workers too."""
+    try:
+        with open(path, 'rb') as f:
+            return parse(f)
+    except (SaveFormatError, OSError) as e:
+        return {"error": str(e)}
+
+class SaveInspector:
+    """Caches save file statistics by inode, size and mtime, so each save is only read once per change."""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._cache = None
+        self._used = set()
+        self._dirty = False
+
+    def load(self):
+        if self._cache is None:
+            try:
+                self._cache = json.loads(self.cache_file.read_text())
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.cache_file.parent.mkdir(exist_ok=True)
+        tmp = self.cache_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._cache))
+        os.replace(tmp, self.cache_file)
+        self._dirty = False
+
+    def inspect(self, path, parse, cached_only=False):
+        """Stats of one save file; parse errors are cached as {"error": ...} too."""
+        try:
+            key = f"{parse.__name__}:{_inode_key(path.stat())}"
+        except OSError:
+            return None
+        cache = self.load()
+        self._used.add(key)
+        if key not in cache and not cached_only:
+            cache[key] = _inspect_path(parse, path)
+            self._dirty = True
+        return cache.get(key)
+
+    def cached(self, parse, key):
+        """Stats stored for an _inode_key of a save, or None if it was never read. Touches no files but the cache."""
+        if key is None:
+            return None
+        key = f"{parse.__name__}:{key}"
+        self._used.add(key)
+        return self.load().get(key)
+
+    def inspect_many(self, paths, parse, workers=None):
+        """Stats of many save files ({path: stats}); files not in the cache are parsed on a process pool.
+
+        paths may also be a {path: os.stat_result} mapping, to save stat calls the caller already made.
+        """
+        cache = self.load()
+        keys = {}
+        for path in paths:
+            try:
+                st = paths[path] if isinstance(paths, dict) else path.stat()
+                keys[path] = f"{parse.__name__}:{_inode_key(st)}"
+            except OSError:
+                continue
+        self._used.update(keys.values())
+        missing = [path for path, key in keys.items() if key not in cache]
+        if len(missing) >= 8:
+            from concurrent.futures import ProcessPoolExecutor
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_inspect_path, [parse] * len(missing), missing,
+                                   chunksize=max(1, len(missing) // (workers * 4)))
+                for path, stats in zip(missing, results):
+                    cache[keys[path]] = stats
+        else:
+            for path in missing:
+                cache[keys[path]] = _inspect_path(parse, path)
+        if missing:
+            self._dirty = True
+        return {path: cache[key] for path, key in keys.items()}
+
+    def inspect_world(self, world_dir, cached_only=False):
+        """Level.sav stats plus the player saves, or None if the world has no Level.sav (yet)."""
+        level = self.inspect(world_dir / "Level.sav", inspect_level, cached_only)
+        if level is None:
+            return None
+        stats = dict(level)
+        players_dir = world_dir / "Players"
+        saves = sorted(players_dir.glob("*.sav")) if players_dir.exists() else []
+        uids = []
+        for path in saves:
+            player = self.inspect(path, inspect_player, cached_only)
+            if player and "player_uid" in player:
+                uids.append(player["player_uid"])
+        stats["player_saves"] = len(saves)
+        stats["player_save_uids"] = uids
+        return stats
+
+    def prune(self):
+        """Forget files that weren't looked at since this inspector was created."""
+        cache = self.load()
+        for key in cache.keys() - self._used:
+            del cache[key]
+            self._dirty = True
+        self.save()
+
+# ---------- Verification ----------
+PAK_MAGIC = (0x5A6F12E1).to_bytes(4, "little")
+UTOC_MAGIC = b"-==--==--==--==-"
+
+def check_file(path, size):
+    """Cheap format check for saves and paks, to catch truncated files. Returns an issue or None."""
+    import struct
+    suffix = path.suffix.lower()
+    if suffix == ".sav":
+        with open(path, 'rb') as f:
+            header = f.read(12)
+            offset = 12
+            if header[8:11] == b"CNK":
+                header = f.read(12)
+                offset = 24
+            if len(header) < 12:
+                return "truncated save header"
+            _, compressed = struct.unpack("<ii", header[:8])
+            magic, save_type = header[8:11], header[11]
+            if magic not in (b"PlZ", b"PlM"):
+                return "not a Palworld save"
+            if magic == b"PlM" or save_type == 0x31:
+                if size != offset + compressed:
+                    return f"truncated: header says {offset + compressed} bytes, file has {size}"
+            elif save_type == 0x32:
+                # compressed is the size of the inner stream, so inflate the outer one to check it
+                import zlib
+                d = zlib.decompressobj()
+                inner = 0
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    inner += len(d.decompress(chunk))
+                inner += len(d.flush())
+                if not d.eof or inner != compressed:
+                    return "truncated or corrupt compressed data"
+    elif suffix == ".pak":
+        with open(path, 'rb') as f:
+            f.seek(max(0, size - 1024))
+            if PAK_MAGIC not in f.read():
+                return "pak footer missing (truncated?)"
+    elif suffix == ".utoc":
+        with open(path, 'rb') as f:
+            if f.read(16) != UTOC_MAGIC:
+                return "not a utoc file"
+    return None
+
+class Verifier:
+    """BLAKE2 manifests of world folders (saves and Mods), one per world.
+
+    Later runs only re-read files whose size or mtime changed, unless full=True.
+    """
+
+    def __init__(self, root, store, workers=DEFAULT_COPY_WORKERS):
+        self.root = root
+        self.store = store
+        self.workers = workers
+
+    def _hash(self, path, full):
+        size = path.stat().st_size
+        issue = check_file(path, size)
+        if not full and path.suffix.lower() in STORE_SUFFIXES:
+            # Mod binaries shared through the store are hashed once for every world
+            return self.store.file_digest(path), size, issue
+        return hash_file(path), size, issue
+
+    def verify(self, world_dir, full=False):
+        """Check a world against its manifest and update it. Returns a report; "problems" lists failures."""
+        manifest_file = self.root / f"{world_uid(world_dir)}.json"
+        try:
+            old = json.loads(manifest_file.read_text())
+        except (OSError, ValueError):
+            old = {}
+
+        current = {}
+        for dirpath, _, files in os.walk(world_dir):
+            rel_dir = Path(dirpath).relative_to(world_dir)
+            for name in files:
+                st = os.stat(os.path.join(dirpath, name))
+                current[(rel_dir / name).as_posix()] = [st.st_size, st.st_mtime_ns]
+        to_hash = [rel for rel in current if full or rel not in old or old[rel][:2] != current[rel]]
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(zip(to_hash, pool.map(lambda rel: self._hash(world_dir / rel, full), to_hash)))
+
+        manifest, problems = {}, []
+        for rel, entry in current.items():
+            if rel not in results:
+                manifest[rel] = old[rel]
+                continue
+            digest, _, issue = results[rel]
+            if (issue is None and rel in old and old[rel][2] != digest
+                    and self.store.linked_blob(world_dir / rel, old[rel][2])):
+                # Still the store's blob for the old contents: it was written through a hardlink
+                issue = "shared mod file was changed in place, which changed it in every world that has it"
+            if issue is None and rel in old and old[rel][:2] == entry and old[rel][2] != digest:
+                issue = "contents changed but size and mtime didn't (disk corruption?)"
+            if issue:
+                # Left out of the manifest so it is checked again next time
+                problems.append({"path": rel, "issue": issue})
+            else:
+                manifest[rel] = entry + [digest]
+        removed = sorted(old.keys() - current.keys())
+        if "Level.sav" in removed:
+            problems.append({"path": "Level.sav", "issue": "missing"})
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, manifest_file)
+        self.store.save_index()
+        return {
+            "files": len(current),
+            "hashed": len(to_hash),
+            "bytes_hashed": sum(size for _, size, _ in results.values()),
+            "added": sorted(rel for rel in to_hash if rel not in old),
+            "changed": sorted(rel for rel in to_hash if rel in old and old[rel][:2] != current[rel]),
+            "removed": removed,
+            "problems": problems,
+        }
+
+# ---------- Trash ----------
+def trash_timestamp(d):
+    """When a world was deleted, from the _<timestamp> suffix the delete flow appends."""
+    _, _, stamp = d.name.rpartition("_")
+    return int(stamp) if stamp.isdigit() else d.stat().st_mtime
+
+class Trash:
+    """The __trash__ folder: deleted worlds, retention limits and background purging."""
+
+    def __init__(self, trash_dir, sizes_file, store, max_bytes=0, max_age=0, max_count=0, timing=None, lock=None):
+        self.dir = trash_dir
+        self.sizes_file = sizes_file
+        self.store = store
+        self.timing = timing or Timing(None, enabled=False)
+        # The instance lock, held while the store is collected (see collect_store)
+        self.lock = lock
+        self.gc_pending = False
+        # Retention limits; 0 means no limit. Oldest deleted worlds are evicted first.
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_count = max_count
+        self._sizes = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+
+    def load_sizes(self):
+        """Cached folder size of every trash entry, so the retention check never walks the trash."""
+        if self._sizes is None:
+            try:
+                self._sizes = json.loads(self.sizes_file.read_text())
+            except (OSError, ValueError):
+                self._sizes = {}
+        return self._sizes
+
+    def save_sizes(self):
+        self.sizes_file.parent.mkdir(exist_ok=True)
+        tmp = self.sizes_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._sizes))
+        os.replace(tmp, self.sizes_file)
+
+    def entries(self):
+        if not self.dir.exists():
+            return []
+        return [d for d in self.dir.iterdir() if d.is_dir() and not d.name.startswith(PURGE_PREFIX)]
+
+    def add(self, world_dir, size=None):
+        self.dir.mkdir(exist_ok=True)
+        deleted_name = f"{world_dir.name}_{int(time.time())}"
+        with self.timing.phase("move to trash") as phase:
+            phase.count_tree(world_dir)
+            shutil.move(world_dir, self.dir / deleted_name)
+        if size is not None:
+            self.load_sizes()[deleted_name] = size
+            self.save_sizes()
+        self.enforce_policy()
+        return deleted_name
+
+    def take(self, deleted_name, dst):
+        with self.timing.phase("move from trash") as phase:
+            phase.count_tree(self.dir / deleted_name)
+            shutil.move(self.dir / deleted_name, dst)
+        if self.load_sizes().pop(deleted_name, None) is not None:
+            self.save_sizes()
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                path, job, size = self._pending.pop(0)
+            name = path.name[len(PURGE_PREFIX):]
+            if job is not None and job.cancelled:
+                # Put it back, so a cancelled clear leaves the rest of the trash as it was
+                path.rename(self.dir / name)
+                if size is not None:
+                    self.load_sizes()[name] = size
+                    self.save_sizes()
+                continue
+            with self.timing.operation("trash_purge", entry=name) as op:
+                op.count_tree(path)
+                shutil.rmtree(path, ignore_errors=True)
+            if job is not None:
+                job.advance(1, size or 0)
+            if not self._pending:
+                self.collect_store()
+
+    def collect_store(self):
+        """Drop mod-store blobs no world links to any more (see ModStore.gc), if the instance lock is free.
+
+        Otherwise an operation is running whose sync may be about to link to a
+        blob the gc would delete, so it is left pending for the next call.
+        """
+        with (self.lock.hold_if_free() if self.lock else nullcontext(True)) as held:
+            self.gc_pending = not held
+            if held:
+                with self.timing.operation("gc_store"):
+                    self.store.gc()
+
+    def _purge_in_background(self, entries):
+        with self._lock:
+            self._pending.extend(entries)
+            if self._thread is None and self._pending:
+                self._thread = threading.Thread(target=self._worker, name="trash-purge")
+                self._thread.start()
+
+    def purge(self, names):
+        """Permanently delete trash entries.
+
+        Each entry is renamed out of sight immediately and deleted on a
+        background thread, so callers don't wait on the rmtree. Called from a
+        job, the deletions count toward it, and entries not yet deleted when
+        it is cancelled go back into the trash.
+        """
+        job = current_job()
+        sizes = self.load_sizes()
+        hidden = []
+        for name in names:
+            path = self.dir / f"{PURGE_PREFIX}{name}"
+            (self.dir / name).rename(path)
+            size = sizes.pop(name, None)
+            job_expect(1, size or 0)
+            hidden.append((path, job, size))
+        self.save_sizes()
+        self._purge_in_background(hidden)
+
+    def resume_purges(self):
+        """Finish purges that were interrupted when the tool last exited."""
+        if self.dir.exists():
+            self._purge_in_background([(d, None, None) for d in self.dir.iterdir() if d.name.startswith(PURGE_PREFIX)])
+
+    @property
+    def purging(self):
+        return self._thread is not None
+
+    def wait(self):
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def enforce_policy(self):
+        """Evict the oldest trash entries until every retention limit holds. Returns the evicted names."""
+        if not (self.max_bytes or self.max_age or self.max_count):
+            return []
+        entries = sorted((trash_timestamp(d), d.name) for d in self.entries())
+        sizes = self.load_sizes()
+        if self.max_bytes:
+            missing = [name for _, name in entries if name not in sizes]
+            for name in missing:
+                sizes[name] = sum(p.stat().st_size for p in (self.dir / name).rglob("*") if p.is_file())
+            if missing:
+                self.save_sizes()
+        total = sum(sizes.get(name, 0) for _, name in entries)
+        count = len(entries)
+        now = time.time()
+        evict = []
+        for stamp, name in entries:
+            too_old = self.max_age and now - stamp > self.max_age
+            too_big = self.max_bytes and total > self.max_bytes
+            too_many = self.max_count and count > self.max_count
+            if not (too_old or too_big or too_many):
+                break
+            evict.append(name)
+            total -= sizes.get(name, 0)
+            count -= 1
+        if evict:
+            self.purge(evict)
+        return evict
+
+# ---------- Process Info ----------
+# psutil is optional; without it processes are read from /proc on Linux and the Win32 API on Windows.
+def _psutil():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil
+
+def _win_proc_table():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [("dwSize", wintypes.DWORD), ("cntUsage", wintypes.DWORD), ("th32ProcessID", wintypes.DWORD),
+                    ("th32DefaultHeapID", ctypes.c_size_t), ("th32ModuleID", wintypes.DWORD),
+                    ("cntThreads", wintypes.DWORD), ("th32ParentProcessID", wintypes.DWORD),
+                    ("pcPriClassBase", ctypes.c_long), ("dwFlags", wintypes.DWORD),
+                    ("szExeFile", ctypes.c_wchar * 260)]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snap = kernel32.CreateToolhelp32Snapshot(0x2, 0)  # TH32CS_SNAPPROCESS
+    if not snap or snap == ctypes.c_void_p(-1).value:
+        return {}
+    table = {}
+    entry = PROCESSENTRY32W()
+    entry.dwSize = ctypes.sizeof(entry)
+    try:
+        ok = kernel32.Process32FirstW(wintypes.HANDLE(snap), ctypes.byref(entry))
+        while ok:
+            table[entry.th32ProcessID] = (entry.th32ParentProcessID, entry.szExeFile, entry.cntThreads)
+            ok = kernel32.Process32NextW(wintypes.HANDLE(snap), ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(wintypes.HANDLE(snap))
+    return table
+
+def _win_usage(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in ["PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                 "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                 "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage"]]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle:
+        return None
+    handle = wintypes.HANDLE(handle)
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value != 259:  # STILL_ACTIVE
+            return None
+        # FILETIMEs, in 100 ns units: creation, exit, kernel, user
+        times = [ctypes.c_ulonglong() for _ in range(4)]
+        kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times])
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+        handles = wintypes.DWORD()
+        kernel32.GetProcessHandleCount(handle, ctypes.byref(handles))
+        return (times[2].value + times[3].value) / 1e7, counters.WorkingSetSize, handles.value
+    finally:
+        kernel32.CloseHandle(handle)
+
+def _read_proc_stat(pid):
+    """Fields of /proc/<pid>/stat after the command name, plus the name itself."""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read().decode(errors="replace")
+    end = data.rindex(")")
+    return data[data.index("(") + 1:end], data[end + 2:].split()
+
+def process_table():
+    """{pid: (parent pid, name, thread count)} for every running process."""
+    psutil = _psutil()
+    if psutil:
+        table = {}
+        for p in psutil.process_iter(["ppid", "name", "num_threads"]):
+            table[p.pid] = (p.info["ppid"], p.info["name"] or "", p.info["num_threads"])
+        return table
+    if os.name == "nt":
+        return _win_proc_table()
+    table = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return table
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            name, fields = _read_proc_stat(entry)
+        except (OSError, ValueError):
+            continue
+        if fields[0] != "Z":
+            table[int(entry)] = (int(fields[1]), name, int(fields[17]))
+    return table
+
+def process_usage(pid):
+    """(cpu seconds, resident bytes, open handles) of a live process, or None if it has exited."""
+    psutil = _psutil()
+    if psutil:
+        try:
+            p = psutil.Process(pid)
+            with p.oneshot():
+                if p.status() == psutil.STATUS_ZOMBIE:
+                    return None
+                cpu = p.cpu_times()
+                handles = p.num_handles() if os.name == "nt" else p.num_fds()
+                return cpu.user + cpu.system, p.memory_info().rss, handles
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    if os.name == "nt":
+        return _win_usage(pid)
+    try:
+        _, fields = _read_proc_stat(pid)
+    except (OSError, ValueError):
+        return None
+    if fields[0] == "Z":
+        return None
+    try:
+        handles = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        handles = None
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, int(fields[21]) * os.sysconf("SC_PAGE_SIZE"), handles
+
+def _win_exe(pid):
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle:
+        return None
+    handle = wintypes.HANDLE(handle)
+    try:
+        buf = ctypes.create_unicode_buffer(32768)
+        size = wintypes.DWORD(len(buf))
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+            return None
+        return buf.value
+    finally:
+        kernel32.CloseHandle(handle)
+
+def process_paths(pid):
+    """The executable and working directory of a process, each None when it can't be read."""
+    psutil = _psutil()
+    if psutil:
+        paths = []
+        for attr in ("exe", "cwd"):
+            try:
+                paths.append(getattr(psutil.Process(pid), attr)() or None)
+            except (psutil.Error, OSError):
+                paths.append(None)
+        return tuple(paths)
+    if os.name == "nt":
+        # The Win32 API has no documented way to read another process's working directory
+        return _win_exe(pid), None
+    paths = []
+    for link in ("exe", "cwd"):
+        try:
+            paths.append(os.readlink(f"/proc/{pid}/{link}"))
+        except OSError:
+            paths.append(None)
+    return tuple(paths)
+
+def process_tree(root, table):
+    """root and all of its descendants that appear in table."""
+    pids = {root} if root in table else set()
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    stack = list(pids)
+    while stack:
+        for child in children.get(stack.pop(), []):
+            if child not in pids:
+                pids.add(child)
+                stack.append(child)
+    return pids
+
+def terminate_processes(pids):
+    psutil = _psutil()
+    for pid in pids:
+        try:
+            if psutil:
+                psutil.Process(pid).terminate()
+            elif os.name == "nt":
+                import subprocess
+                subprocess.run(["taskkill", "/F", "/PID", str(pid)], capture_output=True)
+            else:
+                import signal
+                os.kill(pid, signal.SIGTERM)
+        except Exception:
+            # Already gone, or exited between listing and killing
+            pass
+
+# ---------- Utility Functions ----------
+def safe_rename(dest_dir, name):
+    idx = 1
+    new_name = name
+    while (dest_dir / new_name).exists():
+        new_name = f"{name}_{idx}"
+        idx += 1
+    return new_name
+
+def read_active_id(gus_file):
+    """DedicatedServerName from GameUserSettings.ini: the save folder the server loads."""
+    if not gus_file.exists():
+        return None
+    with open(gus_file, 'r') as f:
         inside_section = False
         for line in f:
             line = line.strip()
             if line == "[/Script/Pal.PalGameLocalSettings]":
                 inside_section = True
             elif inside_section and line.startswith("DedicatedServerName="):
-                ACTIVE_ID = line.split("=", 1)[1]
-                break
+                return line.split("=", 1)[1]
+    return None
+
+class InstanceLock:
+    """Lets one thread of one process at a time change a PalServer install.
+
+    Reentrant, so locked operations can call each other. Other processes are
+    kept out with an OS lock on the lock file, which the OS drops if they die.
+    """
+
+    def __init__(self, path, name, timeout=300):
+        self.path = path
+        self.name = name
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def _lock_file(self):
+        """Try once to take the OS lock."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+b")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def _unlock_file(self):
+        if sys.platform == "win32":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        if not (self._lock.acquire(timeout=timeout) if timeout > 0 else self._lock.acquire(blocking=False)):
+            return False
+        if self._depth == 0:
+            while not self._lock_file():
+                if time.monotonic() >= deadline:
+                    self._lock.release()
+                    return False
+                time.sleep(0.2)
+        self._depth += 1
+        return True
+
+    @contextmanager
+    def hold(self, timing=None):
+        """Hold the lock for a block, waiting up to timeout seconds for it (logged as a phase)."""
+        if not self._acquire(0):
+            with (timing.phase("wait for lock") if timing else ExitStack()):
+                if not self._acquire(self.timeout):
+                    raise SaveManagerError(f"Instance {self.name} is busy with another operation "
+                                           f"(waited {self.timeout:g}s for {self.path})")
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def hold_if_free(self):
+        """Hold the lock for a block if no other thread or process has it. Yields whether it does."""
+        if not self._acquire(0):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            self._release()
+
+    def _release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._lock.release()
+
+# Steps of the journaled operations, in order. Each one is safe to run again.
+JOURNAL_STEPS = {
+    "switch_world": ["backup", "archive", "activate", "restore"],
+    "new_world": ["backup", "clear", "archive", "create"],
+}
+
+class Journal:
+    """Write-ahead record of an operation that moves worlds around, so one cut short
+    (Ctrl+C, a crash, a power cut) can be finished or undone the next time the tool starts.
+
+    The plan is written before the first step and each step is recorded as it
+    completes, flushed to disk both times.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """The unfinished operation, or None."""
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, entry):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            f.write(json.dumps(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def begin(self, op, **plan):
+        if self.path.exists():
+            raise SaveManagerError(f"An interrupted operation is recorded in {self.path}; recover it first")
+        entry = {"op": op, "started": time.time(), "done": [], **plan}
+        self._write(entry)
+        return entry
+
+    def step_done(self, entry, step):
+        entry["done"].append(step)
+        self._write(entry)
+
+    def finish(self):
+        self.path.unlink(missing_ok=True)
+
+# ---------- Instrumentation ----------
+class Phase:
+    """A timed step of an operation. Files and bytes added to it also count toward its parents."""
+
+    def __init__(self, name, parent=None, enabled=True):
+        self.name = name
+        self.parent = parent
+        self.enabled = enabled
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, files=0, nbytes=0):
+        phase = self
+        while phase is not None:
+            phase.files += files
+            phase.bytes += nbytes
+            phase = phase.parent
+
+    def count_tree(self, path):
+        """Count the files and bytes under path before it is moved or deleted (only when logging)."""
+        if not self.enabled or not os.path.lexists(path) or is_link(path):
+            return
+        if not path.is_dir():
+            self.add(1, path.stat().st_size)
+            return
+        for dirpath, _, files in os.walk(path):
+            for name in files:
+                try:
+                    self.add(1, os.lstat(os.path.join(dirpath, name)).st_size)
+                except OSError:
+                    pass
+
+class Timing:
+    """Wall time, files and bytes for every phase of a world operation, appended to a JSON-lines log.
+
+    Each thread has its own stack of running phases, so the background trash
+    purge logs its own operations.
+    """
+
+    def __init__(self, log_file, enabled=True, max_log_bytes=5 * 1024 * 1024):
+        self.log_file = log_file
+        self.enabled = enabled and log_file is not None
+        self.max_log_bytes = max_log_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def operation(self, name, **fields):
+        """Time an operation. Started inside another operation, it becomes one of its phases."""
+        stack = self._stack()
+        if stack:
+            with self.phase(name) as phase:
+                yield phase
+            return
+        op = Phase(name, enabled=self.enabled)
+        op.record = {"op": name, **fields, "started": round(time.time(), 3), "phases": []}
+        stack.append(op)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield op
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            op.record.update(wall_s=round(time.perf_counter() - start, 6), files=op.files, bytes=op.bytes,
+                             ok=error is None)
+            if error:
+                op.record["error"] = error
+            self._write(op.record)
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stack()
+        if not stack:
+            yield Phase(name, enabled=False)
+            return
+        phase = Phase(name, stack[-1], self.enabled)
+        # Entries are added when the phase starts, so the log lists them in the order they ran
+        entry = {"phase": "/".join([p.name for p in stack[1:]] + [name])}
+        stack[0].record["phases"].append(entry)
+        stack.append(phase)
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            stack.pop()
+            entry.update(wall_s=round(time.perf_counter() - start, 6), files=phase.files, bytes=phase.bytes)
+
+    def _write(self, record):
+        if not self.enabled:
+            return
+        with self._write_lock:
+            try:
+                self.log_file.parent.mkdir(parents=True, exist_ok=True)
+                if self.log_file.exists() and self.log_file.stat().st_size > self.max_log_bytes:
+                    os.replace(self.log_file, self.log_file.with_name(self.log_file.name + ".1"))
+                with open(self.log_file, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                # The log is diagnostics only; never fail an operation because it can't be written
+                pass
+
+    def summary(self, op=None):
+        """Count, mean and max wall time, files and bytes of every operation and phase in the log."""
+        groups = {}
+        for log in [self.log_file.with_name(self.log_file.name + ".1"), self.log_file]:
+            if not log.exists():
+                continue
+            for line in log.read_text().splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if op and record["op"] != op:
+                    continue
+                for key, entry in [(record["op"], record)] + [(f"{record['op']}: {p['phase']}", p) for p in record["phases"]]:
+                    if "wall_s" in entry:
+                        groups.setdefault(key, []).append(entry)
+        return {key: {"count": len(entries),
+                      "mean_s": round(sum(e["wall_s"] for e in entries) / len(entries), 6),
+                      "max_s": max(e["wall_s"] for e in entries),
+                      "mean_files": round(sum(e["files"] for e in entries) / len(entries), 1),
+                      "mean_bytes": round(sum(e["bytes"] for e in entries) / len(entries))}
+                for key, entries in groups.items()}
+
+def timed(func):
+    """Log a SaveManager method as an operation, or as a phase of the operation already running."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.timing.operation(func.__name__, args=[str(a) for a in args]):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+def locked(func):
+    """Run a SaveManager method holding the instance lock, so threads and processes never change one install at once.
+
+    Put it under @timed, so the wait for the lock is logged as a phase of the operation.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.hold(self.timing):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+# ---------- Save Manager ----------
+class SaveManager:
+    """Every world operation for one PalServer install, without any prompts or printing."""
+
+    def __init__(self, palserver_dir, active_id=None, settings=None, name="default"):
+        if settings is None:
+            settings = configparser.ConfigParser()['DEFAULT']
+        # Instance name: the config section this install comes from
+        self.name = name
+        self.palserver_dir = Path(palserver_dir)
+        self.save_dir = self.palserver_dir / "Pal" / "Saved" / "SaveGames" / "0"
+
+        # Paths
+        self.gus_file = self.palserver_dir / "Pal" / "Saved" / "Config" / "WindowsServer" / "GameUserSettings.ini"
+        self.ws_file = self.palserver_dir / "Pal" / "Saved" / "Config" / "WindowsServer" / "PalWorldSettings.ini"
+        self.default_ws = self.palserver_dir / "DefaultPalWorldSettings.ini"
+        self.paks_dir = self.palserver_dir / "Pal" / "Content" / "Paks"
+        self.bin_dir = self.palserver_dir / "Pal" / "Binaries" / "Win64"
+        self.trash_dir = self.save_dir / "__trash__"
+        # Tool metadata lives next to the worlds so hardlinks stay on the same volume
+        self.meta_dir = self.save_dir / "__manager__"
+
+        self.active_id = active_id or read_active_id(self.gus_file)
+
+        # "copy" materializes mods into the game folders, "link" points them at the active world's Mods
+        self.activation_mode = settings.get('activation', 'copy').strip().lower()
+        # The live folders get copies of the store's blobs, as mod tools update them in place
+        self.store = ModStore(self.meta_dir / "store",
+                              workers=settings.getint('copy_workers', fallback=DEFAULT_COPY_WORKERS),
+                              private=[self.paks_dir, self.bin_dir])
+        self.index = WorldIndex(self.save_dir, self.meta_dir / "worlds.json")
+        self.snapshots = SnapshotStore(self.meta_dir / "snapshots")
+        self.inspector = SaveInspector(self.meta_dir / "inspect.json")
+        self.verifier = Verifier(self.meta_dir / "verify", self.store, self.store.workers)
+        # Verify a world (a quick delta check) before it is activated
+        self.verify_on_activate = settings.getboolean('verify_on_activate', fallback=True)
+        # Per-phase timings of world operations (see Timing); operation_log = no turns it off
+        self.timing = Timing(self.meta_dir / "operations.jsonl",
+                             enabled=settings.getboolean('operation_log', fallback=True))
+        self.lock = InstanceLock(self.meta_dir / "manager.lock", name,
+                                 timeout=settings.getfloat('lock_timeout', fallback=300))
+        # Plan and progress of a switch or new world, until it completes
+        self.journal = Journal(self.meta_dir / "journal.json")
+        # (world_uid, from, to) of every world folder the journaled steps renamed, in order (see find_world)
+        self.world_moves = []
+        self.trash = Trash(self.trash_dir, self.meta_dir / "trash.json", self.store,
+                           max_bytes=int(settings.getfloat('trash_max_size_gb', fallback=0) * 1024 ** 3),
+                           max_age=settings.getfloat('trash_max_age_days', fallback=0) * 86400,
+                           max_count=settings.getint('trash_max_count', fallback=0),
+                           timing=self.timing, lock=self.lock)
+
+        # Server supervision: pid of the running server and where its telemetry goes
+        self.pid_file = self.meta_dir / "server.pid"
+        self.telemetry_dir = self.meta_dir / "telemetry"
+        self.telemetry_interval = settings.getfloat('telemetry_interval', fallback=5)
+        self.telemetry_samples = settings.getint('telemetry_samples', fallback=720)
+        self.telemetry_format = settings.get('telemetry_format', 'csv').strip().lower()
+        self.restart_on_crash = settings.getboolean('restart_on_crash', fallback=True)
+        self.restart_max = settings.getint('restart_max', fallback=5)
+        # Hot backups of the active world's saves while the server runs (see HotBackupScheduler)
+        self.hot_backups = HotBackupStore(self.meta_dir / "hotbackups",
+                                          rate=int(settings.getfloat('hot_backup_rate_mb', fallback=50) * 1024 ** 2))
+        self.hot_backup = settings.getboolean('hot_backup', fallback=True)
+        self.hot_backup_interval = settings.getfloat('hot_backup_interval', fallback=300)
+        self.hot_backup_settle = settings.getfloat('hot_backup_settle', fallback=5)
+        self.hot_backup_keep = settings.getint('hot_backup_keep', fallback=48)
+
+    @classmethod
+    def from_config(cls, config_file=CONFIG_FILE, palserver_dir=None, active_id=None, instance=None):
+        """The install named instance in the config file (see load_instances); it may be left out if there is only one."""
+        instances = load_instances(config_file)
+        if instance is None:
+            if len(instances) > 1:
+                raise SaveManagerError(f"{config_file} has several instances ({', '.join(instances)}); "
+                                       "pick one with --instance")
+            instance = next(iter(instances))
+        if instance not in instances:
+            raise SaveManagerError(f"No instance {instance} in {config_file} (instances: {', '.join(instances)})")
+        settings = instances[instance]
+        palserver_dir = palserver_dir or settings.get('palserver_dir')
+        if not palserver_dir:
+            raise SaveManagerError(f"No palserver_dir configured; create {config_file} or pass --palserver-dir")
+        return cls(palserver_dir, active_id, settings, name=instance)
+
+    def has_active_world(self):
+        return bool(self.active_id) and (self.save_dir / self.active_id).exists()
+
+    def require_active(self):
+        if not self.has_active_world():
+            raise SaveManagerError("Can't tell which world is active (DedicatedServerName in "
+                                   "GameUserSettings.ini); pass --active")
+
+    def require_stopped(self):
+        """Refuse to touch the active world while PalServer has its saves open."""
+        if self.server_pids():
+            raise SaveManagerError("PalServer is running; stop it before changing the active world")
+
+    # ---------- Queries ----------
+    def world_stats(self, folder, cached_only=False):
+        """Player, guild and in-game day stats read from a world's saves (see SaveInspector)."""
+        stats = self.inspector.inspect_world(self.save_dir / folder, cached_only)
+        self.inspector.save()
+        return stats
+
+    def indexed_level_stats(self, entry):
+        """Level.sav stats of a WorldIndex entry if they were read before; no disk access, for listings."""
+        return self.inspector.cached(inspect_level, entry.get("level"))
+
+    @locked
+    def read_level_stats(self, folders):
+        """Read the Level.sav stats of these worlds into the cache (on a process pool when there are many).
+
+        Locked so a queued job never saves the cache at the same time.
+        """
+        paths = [self.save_dir / folder / "Level.sav" for folder in folders]
+        self.inspector.inspect_many([p for p in paths if p.exists()], inspect_level)
+        self.inspector.save()
+
+    def player_index(self):
+        """{player uid: [world the player has a save in, ...]} over every world and the trash.
+
+        Sightings are newest first. Only player saves that are new or changed
+        since the last call are read; the rest is a stat of each file.
+        """
+        index = self.index.refresh(self.active_id)
+        sources = [(self.save_dir / folder, folder, index[folder]["name"], False) for folder in index]
+        sources += [(self.trash_dir / entry, entry, name, True) for entry, name in self.list_deleted()]
+        files, file_stats = {}, {}
+        for world_dir, folder, name, in_trash in sources:
+            try:
+                entries = list(os.scandir(world_dir / "Players"))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(".sav") and entry.is_file():
+                    path = Path(entry.path)
+                    files[path] = (folder, name, in_trash)
+                    # Free on Windows (the directory listing carries it), one stat elsewhere
+                    file_stats[path] = entry.stat()
+        stats = self.inspector.inspect_many(file_stats, inspect_player)
+        self.inspector.save()
 
-if not ACTIVE_ID or not (SAVE_DIR / ACTIVE_ID).exists():
-    ACTIVE_ID = input(Fore.YELLOW + Style.BRIGHT +
-                      "Enter the active world folder name manually: " +
-                      Style.RESET_ALL).strip()
+        players = {}
+        for path, player in stats.items():
+            folder, name, in_trash = files[path]
+            st = file_stats[path]
+            # Unreadable saves are still named after the player
+            uid = player.get("player_uid") or path.stem.upper()
+            players.setdefault(uid, []).append({
+                "world": folder, "name": name, "trash": in_trash, "active": folder == self.active_id,
+                "size": st.st_size, "last_played": st.st_mtime, "error": player.get("error"),
+            })
+        for sightings in players.values():
+            sightings.sort(key=lambda s: s["last_played"], reverse=True)
+        return players
 
-TRASH_DIR = SAVE_DIR / "__trash__"
-TRASH_DIR.mkdir(exist_ok=True)
+    def find_player(self, query):
+        """Sightings of the players whose uid starts with query (dashes and case ignored)."""
+        query = query.replace("-", "").upper()
+        return {uid: sightings for uid, sightings in self.player_index().items() if uid.startswith(query)}
 
-# ---------- Utility Functions ----------
-def list_worlds():
-    worlds = []
-    for d in SAVE_DIR.iterdir():
-        if d.is_dir() and d.name != ACTIVE_ID and not d.name.startswith("__trash__"):
-            name = (d / "name.txt").read_text().strip() if (d / "name.txt").exists() else d.name
-            mod_time = d.stat().st_mtime
-            worlds.append((d.name, name, mod_time))
-    return worlds
-
-def list_deleted():
-    deleted = []
-    for d in TRASH_DIR.iterdir():
-        if d.is_dir():
+    def world_name(self, folder):
+        return self.index.load().get(folder, {}).get("name", folder)
+
+    def list_worlds(self, cached=False, index=None):
+        """(folder, name, mtime) of every world but the active one.
+
+        cached=True lists them as last indexed, without rescanning SAVE_DIR and
+        without touching the in-memory index, so it is safe while a job on
+        another thread is moving worlds around. index lists the worlds of an
+        index that was already read instead.
+        """
+        if index is None:
+            index = self.index.refresh(self.active_id) if not cached else self.index.cached()
+        return [(folder, index[folder]["name"], index[folder]["mtime"])
+                for folder in sorted(index) if folder != self.active_id]
+
+    @locked
+    def locate_world(self, folder, uid):
+        """Current folder of a world that was picked as folder, when it had this world_uid.
+
+        Switches queued before it may have renamed the world since, so it is
+        followed through the renames they made. Any other mismatch means the
+        folder was renamed, replaced or copied by hand in the meantime, and is
+        refused rather than guessed at.
+        """
+        # Refreshing first gives a copied folder its own uid, so uids are unique here
+        index = self.index.refresh(self.active_id)
+        current = folder
+        for moved_uid, src, dst in self.world_moves:
+            if moved_uid == uid and src == current:
+                current = dst
+        if current in index and index[current]["uid"] == uid:
+            return current
+        raise SaveManagerError(f"{folder} was renamed, replaced or deleted since it was picked; pick it again")
+
+    def list_deleted(self):
+        deleted = []
+        for d in self.trash.entries():
             name_txt = d / "name.txt"
             friendly_name = name_txt.read_text().strip() if name_txt.exists() else d.name
             deleted.append((d.name, friendly_name))
-    return deleted
+        return deleted
 
-def safe_rename(dest_dir, name):
-    idx = 1
-    new_name = name
-    while (dest_dir / new_name).exists():
-        new_name = f"{name}_{idx}"
-        idx += 1
-    return new_name
+    def find_world(self, ref, include_active=False):
+        """Resolve a folder name or a (unique) friendly name to a world folder."""
+        index = self.index.refresh(self.active_id)
+        candidates = [f for f in index if include_active or f != self.active_id]
+        if ref in candidates:
+            return ref
+        matches = [f for f in candidates if index[f]["name"] == ref]
+        if len(matches) == 1:
+            return matches[0]
+        raise SaveManagerError(f"No world named {ref!r}" if not matches else f"Several worlds are named {ref!r}; use the folder name")
 
-def get_next_world_name():
-    idx = 1
-    while (SAVE_DIR / f"world{idx}").exists():
-        idx += 1
-    return f"world{idx}"
+    def find_deleted(self, ref):
+        deleted = self.list_deleted()
+        matches = [entry for entry in deleted if ref in entry]
+        if len(matches) == 1:
+            return matches[0]
+        raise SaveManagerError(f"No deleted world named {ref!r}" if not matches else f"Several deleted worlds are named {ref!r}; use the trash folder name")
 
-def backup_current_world(world_id):
-    """Save PalWorldSettings.ini + mods into current world folder and clear live dirs."""
-    world_dir = SAVE_DIR / world_id
-    mods_dir = world_dir / "Mods"
-    mods_dir.mkdir(exist_ok=True)
+    def get_next_world_name(self):
+        idx = 1
+        while (self.save_dir / f"world{idx}").exists():
+            idx += 1
+        return f"world{idx}"
 
-    # Save PalWorldSettings.ini
-    if DEFAULT_WS.exists():
-        shutil.copy2(DEFAULT_WS, WS_FILE)
-    else:
-        WS_FILE.write_text("")  # empty file if default doesn't exist
+    # ---------- Mods & Settings ----------
+    @timed
+    @locked
+    def backup_current_world(self, world_id, clear_live=True):
+        """Save PalWorldSettings.ini + mods into current world folder and clear live dirs.
 
-    # Save ~mods and LogicMods
-    for folder in ["~mods", "LogicMods"]:
-        src = PAKS_DIR / folder
-        dst = mods_dir / folder
-        if src.exists():
-            if dst.exists():
-                shutil.rmtree(dst)
-            shutil.copytree(src, dst)
-            shutil.rmtree(src)
+        With clear_live=False the live dirs are left in place so a following
+        restore_world only has to sync the differences. Nothing is cleared
+        until every folder has been saved.
+        """
+        world_dir = self.save_dir / world_id
+        mods_dir = world_dir / "Mods"
+        mods_dir.mkdir(exist_ok=True)
 
-    # Save UE4SS files
-    for file in ["ue4ss", "dwmapi.dll"]:
-        src = BIN_DIR / file
-        if src.exists():
-            dst = mods_dir / file
-            if src.is_dir():
-                if dst.exists():
-                    shutil.rmtree(dst)
-                shutil.copytree(src, dst)
-                shutil.rmtree(src)
+        # Save PalWorldSettings.ini
+        with self.timing.phase("settings"):
+            if self.default_ws.exists():
+                shutil.copy2(self.default_ws, self.ws_file)
             else:
-                shutil.copy2(src, dst)
-                src.unlink()
-
-def restore_world(world_id):
-    """Restore PalWorldSettings.ini + mods from saved world folder into live dirs."""
-    world_dir = SAVE_DIR / world_id
-    mods_dir = world_dir / "Mods"
-
-    # Restore PalWorldSettings.ini
-    ws_src = world_dir / "PalWorldSettings.ini"
-    if ws_src.exists():
-        shutil.copy2(ws_src, WS_FILE)
-
-    # Restore ~mods and LogicMods
-    for folder in ["~mods", "LogicMods"]:
-        src = mods_dir / folder
-        dst = PAKS_DIR / folder
-        if src.exists():
-            if dst.exists():
-                shutil.rmtree(dst)
-            shutil.copytree(src, dst)
+                self.ws_file.write_text("")  # empty file if default doesn't exist
 
-    # Restore UE4SS files
-    for file in ["ue4ss", "dwmapi.dll"]:
-        src = mods_dir / file
-        dst = BIN_DIR / file
-        if src.exists():
-            if src.is_dir():
-                if dst.exists():
-                    shutil.rmtree(dst)
-                shutil.copytree(src, dst)
-            else:
-                shutil.copy2(src, dst)
+        # Save ~mods and LogicMods
+        for folder in ["~mods", "LogicMods"]:
+            src = self.paks_dir / folder
+            dst = mods_dir / folder
+            # With linked activation the mods already live in the world folder
+            if src.exists() and not is_link(src):
+                with self.timing.phase(f"save {folder}") as phase:
+                    phase.add(*self.store.sync_tree(src, dst)[:2])
 
-def copy_from_world_to_active(source_world_id, copy_settings=True, copy_mods=True):
-    source_dir = SAVE_DIR / source_world_id
-    active_dir = SAVE_DIR / ACTIVE_ID
+        # Save UE4SS files
+        for file in ["ue4ss", "dwmapi.dll"]:
+            src = self.bin_dir / file
+            if src.exists() and not is_link(src):
+                dst = mods_dir / file
+                with self.timing.phase(f"save {file}") as phase:
+                    sync = self.store.sync_tree if src.is_dir() else self.store.sync_file
+                    phase.add(*sync(src, dst)[:2])
+
+        if clear_live:
+            self.clear_live_mods()
+
+    def clear_live_mods(self):
+        """Remove the live mod folders and UE4SS files, or just their links with linked activation."""
+        for src in [self.paks_dir / "~mods", self.paks_dir / "LogicMods",
+                    self.bin_dir / "ue4ss", self.bin_dir / "dwmapi.dll"]:
+            if is_link(src):
+                os.unlink(src)
+            elif src.exists():
+                with self.timing.phase(f"clear {src.name}") as phase:
+                    phase.count_tree(src)
+                    remove_path(src)
+
+    @timed
+    @locked
+    def restore_world(self, world_id, verify=None):
+        """Restore PalWorldSettings.ini + mods from saved world folder into live dirs.
 
-    # ---------- Settings ----------
-    if copy_settings:
-        ws_src = source_dir / "PalWorldSettings.ini"
+        The world is verified first (see verify_world) unless verify is False,
+        or it is None and verify_on_activate is off.
+        """
+        world_dir = self.save_dir / world_id
+        mods_dir = world_dir / "Mods"
+        if verify or (verify is None and self.verify_on_activate):
+            self.check_world(world_id)
+
+        # Restore PalWorldSettings.ini
+        ws_src = world_dir / "PalWorldSettings.ini"
         if ws_src.exists():
-            print(Fore.CYAN + f"Copying Settings from {source_world_id}..." + Style.RESET_ALL)
-            shutil.copy2(ws_src, WS_FILE)  # overwrite WindowsServer PalWorldSettings.ini
-            shutil.copy2(ws_src, active_dir / "PalWorldSettings.ini")  # overwrite active save folder
-            print(Fore.GREEN + "Settings copied." + Style.RESET_ALL)
-
-    # ---------- Mods ----------
-    if copy_mods:
-        mods_src = source_dir / "Mods"
-        mods_dst = active_dir / "Mods"
-        mods_dst.mkdir(exist_ok=True)
-
-        # Copy ~mods and LogicMods
+            with self.timing.phase("settings"):
+                shutil.copy2(ws_src, self.ws_file)
+
+        # Link mode: point the live folders at this world's Mods. The link goes through the
+        # world's folder name, so it keeps working as worlds are renamed in and out of place.
+        # A folder the world doesn't have is removed from the live folders instead; one
+        # created there later is a real folder, saved into the world by the next backup.
+        if self.activation_mode == "link":
+            for live_root, folder in [(self.paks_dir, "~mods"), (self.paks_dir, "LogicMods"), (self.bin_dir, "ue4ss")]:
+                with self.timing.phase(f"link {folder}"):
+                    if not (mods_dir / folder).is_dir():
+                        remove_path(live_root / folder)
+                        continue
+                    swap_link(live_root / folder, mods_dir / folder)
+                    # Live now, so its mods may be updated in place: stop sharing them with other worlds
+                    self.store.unshare_tree(live_root / folder)
+            src = mods_dir / "dwmapi.dll"
+            with self.timing.phase("restore dwmapi.dll") as phase:
+                if src.exists():
+                    phase.add(*self.store.sync_file(src, self.bin_dir / "dwmapi.dll")[:2])
+                else:
+                    remove_path(self.bin_dir / "dwmapi.dll")
+            return
+
+        # Restore ~mods and LogicMods (live folders the world doesn't have are removed)
         for folder in ["~mods", "LogicMods"]:
-            src = mods_src / folder
-            dst = mods_dst / folder
-            live_dst = PAKS_DIR / folder
+            src = mods_dir / folder
+            dst = self.paks_dir / folder
+            if is_link(dst):
+                os.unlink(dst)
             if src.exists():
-                print(Fore.CYAN + f"Copying {folder}..." + Style.RESET_ALL)
-                if dst.exists(): shutil.rmtree(dst)
-                shutil.copytree(src, dst)
-                if live_dst.exists(): shutil.rmtree(live_dst)
-                shutil.copytree(src, live_dst)
-                print(Fore.GREEN + f"{folder} copied." + Style.RESET_ALL)
-
-        # Copy UE4SS files
+                with self.timing.phase(f"restore {folder}") as phase:
+                    phase.add(*self.store.sync_tree(src, dst)[:2])
+                    self.store.unshare_tree(dst)
+            elif dst.exists():
+                with self.timing.phase(f"clear {folder}") as phase:
+                    phase.count_tree(dst)
+                    remove_path(dst)
+
+        # Restore UE4SS files
         for file in ["ue4ss", "dwmapi.dll"]:
-            src = mods_src / file
-            dst = mods_dst / file
-            live_dst = BIN_DIR / file
+            src = mods_dir / file
+            dst = self.bin_dir / file
+            if is_link(dst):
+                os.unlink(dst)
             if src.exists():
-                print(Fore.CYAN + f"Copying {file}..." + Style.RESET_ALL)
-                if src.is_dir():
-                    if dst.exists(): shutil.rmtree(dst)
-                    shutil.copytree(src, dst)
-                    if live_dst.exists(): shutil.rmtree(live_dst)
-                    shutil.copytree(src, live_dst)
-                else:
-                    shutil.copy2(src, dst)
-                    shutil.copy2(src, live_dst)
-                print(Fore.GREEN + f"{file} copied." + Style.RESET_ALL)
-
-
-
-# ---------- Main Loop ----------
-while True:
-    os.system('cls')
-    # Header
-    print(Fore.CYAN + Style.BRIGHT + "="*30)
-    print(Fore.CYAN + Style.BRIGHT + "Palworld Save Manager")
-    print(Fore.CYAN + Style.BRIGHT + "="*30 + Style.RESET_ALL)
-    print()
-
-    # List worlds
-    worlds = list_worlds()
-    if worlds:
-        print(Fore.MAGENTA + Style.BRIGHT + "Available Worlds:" + Style.RESET_ALL)
-        for i, (folder, name, mod) in enumerate(worlds, start=1):
-            print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL + f" (Folder: {folder})")
-    else:
-        print(Fore.YELLOW + Style.BRIGHT + "No other worlds available." + Style.RESET_ALL)
-
-    # Active world info
-    active_name = (SAVE_DIR / ACTIVE_ID / "name.txt").read_text().strip() if (SAVE_DIR / ACTIVE_ID / "name.txt").exists() else ACTIVE_ID
-    print()
-    print(Fore.GREEN + Style.BRIGHT + f"Current active world: {active_name} (Folder: {ACTIVE_ID})" + Style.RESET_ALL)
-    print()
-
-    # Menu options
-    print(Style.BRIGHT + "[S]" + Style.RESET_ALL + " Switch World")
-    print(Style.BRIGHT + "[N]" + Style.RESET_ALL + " New World")
-    print(Style.BRIGHT + "[D]" + Style.RESET_ALL + " Delete World")
-    print(Style.BRIGHT + "[U]" + Style.RESET_ALL + " Undo Delete")
-    print(Style.BRIGHT + "[C]" + Style.RESET_ALL + " Clear Deleted Worlds")
-    print(Style.BRIGHT + "[R]" + Style.RESET_ALL + " Rename World")
-    print(Style.BRIGHT + "[L]" + Style.RESET_ALL + " Launch Server")
-    print(Style.BRIGHT + "[P]" + Style.RESET_ALL + " Paste/Copy Settings and or Mods")
-    print(Style.BRIGHT + "[Q]" + Style.RESET_ALL + " Quit")
-
-    choice = input(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL).strip().upper()
+                with self.timing.phase(f"restore {file}") as phase:
+                    sync = self.store.sync_tree if src.is_dir() else self.store.sync_file
+                    phase.add(*sync(src, dst)[:2])
+                    self.store.unshare_tree(dst)
+            elif dst.exists():
+                with self.timing.phase(f"clear {file}") as phase:
+                    phase.count_tree(dst)
+                    remove_path(dst)
 
-    try:
-        if choice == "Q":
-            break
+    @timed
+    @locked
+    def copy_from_world_to_active(self, source_world_id, copy_settings=True, copy_mods=True, echo=None):
+        """Copy settings and/or mods from another world into the active one.
 
-        # ---------- Switch World ----------
-        elif choice == "S":
-            if not worlds:
-                print(Fore.YELLOW + "No worlds available to switch!" + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
-                continue
+        echo(message, done), if given, is called before and after each step.
+        Returns {item: {"updated": n, "removed": n}} for everything copied.
+        """
+        self.require_active()
+        self.require_stopped()
+        echo = echo or (lambda message, done: None)
+        source_dir = self.save_dir / source_world_id
+        active_dir = self.save_dir / self.active_id
+        copied_items = {}
 
-            while True:
-                num = input(Style.BRIGHT + "Enter world number to activate: " + Style.RESET_ALL).strip()
-                if not num.isdigit():
-                    print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+        # ---------- Settings ----------
+        if copy_settings:
+            ws_src = source_dir / "PalWorldSettings.ini"
+            if ws_src.exists():
+                echo(f"Copying Settings from {source_world_id}...", False)
+                with self.timing.phase("settings") as phase:
+                    shutil.copy2(ws_src, self.ws_file)  # overwrite WindowsServer PalWorldSettings.ini
+                    shutil.copy2(ws_src, active_dir / "PalWorldSettings.ini")  # overwrite active save folder
+                    phase.add(2, 2 * ws_src.stat().st_size)
+                copied_items["PalWorldSettings.ini"] = {"updated": 2, "removed": 0}
+                echo("Settings copied.", True)
+
+        # ---------- Mods ----------
+        if copy_mods:
+            mods_src = source_dir / "Mods"
+            mods_dst = active_dir / "Mods"
+            mods_dst.mkdir(exist_ok=True)
+
+            # Copy ~mods, LogicMods and UE4SS files, syncing only what differs
+            for folder, live_root in [("~mods", self.paks_dir), ("LogicMods", self.paks_dir), ("ue4ss", self.bin_dir), ("dwmapi.dll", self.bin_dir)]:
+                src = mods_src / folder
+                # Empty folders are what older versions of link mode left in every world they activated
+                if not src.exists() or (src.is_dir() and not any(src.iterdir())):
                     continue
-                num = int(num)
-                if 1 <= num <= len(worlds):
+                echo(f"Copying {folder}...", False)
+                sync = self.store.sync_tree if src.is_dir() else self.store.sync_file
+                # A linked live folder is the active world's Mods folder itself; it is written
+                # through the link so the files land as private copies (see ModStore)
+                live = live_root / folder
+                dsts = [live] if is_link(live) else [mods_dst / folder, live]
+                with self.timing.phase(f"copy {folder}") as phase:
+                    copied, copied_bytes, removed = sync(src, *dsts)
+                    phase.add(copied, copied_bytes)
+                copied_items[folder] = {"updated": copied, "removed": removed}
+                echo(f"{folder} copied ({copied} updated, {removed} removed).", True)
+        self.index.update(self.active_id)
+        return copied_items
+
+    # ---------- World Operations ----------
+    @timed
+    @locked
+    def switch_world(self, sel_folder, verify=None):
+        """Make sel_folder the active world; the current one is archived as the next worldN.
+
+        Raises IntegrityError, before anything is changed, if sel_folder fails
+        verification (skipped with verify=False). The steps are journaled (see recover).
+        """
+        self.require_active()
+        with self.timing.phase("server check"):
+            self.require_stopped()
+        self.recover()
+        if verify or (verify is None and self.verify_on_activate):
+            self.check_world(sel_folder)
+        entry = self.journal.begin("switch_world", active_id=self.active_id, target=sel_folder,
+                                   name=self.world_name(sel_folder), archive=self.get_next_world_name())
+        self._run_journal(entry)
+        return entry["archive"]
+
+    @timed
+    @locked
+    def new_world(self, new_name="New World"):
+        """Archive the active world and start a fresh, unmodded one in its place."""
+        self.require_active()
+        with self.timing.phase("server check"):
+            self.require_stopped()
+        self.recover()
+        entry = self.journal.begin("new_world", active_id=self.active_id, name=new_name,
+                                   archive=self.get_next_world_name())
+        self._run_journal(entry)
+        return entry["archive"]
+
+    # ---------- Journaled Steps ----------
+    def _run_journal(self, entry):
+        for step in JOURNAL_STEPS[entry["op"]]:
+            if step not in entry["done"]:
+                getattr(self, f"_step_{step}")(entry)
+                self.journal.step_done(entry, step)
+        self.index.update(*{entry["active_id"], entry["archive"], entry.get("target", entry["archive"])})
+        self.journal.finish()
+
+    def _step_backup(self, entry):
+        self.backup_current_world(entry["active_id"], clear_live=False)
+
+    def _step_clear(self, entry):
+        # A new world starts unmodded; a switch syncs over the live folders instead
+        self.clear_live_mods()
+
+    def _rename_once(self, src, dst):
+        """Rename src to dst unless that already happened."""
+        if src.exists() and dst.exists():
+            raise SaveManagerError(f"Both {src.name} and {dst.name} exist in {self.save_dir}; "
+                                   "move one of them away and run again")
+        if src.exists():
+            uid = world_uid(src)
+            src.rename(dst)
+            self.world_moves.append((uid, src.name, dst.name))
+        elif not dst.exists():
+            raise SaveManagerError(f"World folder {src.name} is missing from {self.save_dir}")
+
+    def _step_archive(self, entry):
+        with self.timing.phase("rename folders"):
+            self._rename_once(self.save_dir / entry["active_id"], self.save_dir / entry["archive"])
+
+    def _step_activate(self, entry):
+        with self.timing.phase("rename folders"):
+            self._rename_once(self.save_dir / entry["target"], self.save_dir / entry["active_id"])
+
+    def _step_restore(self, entry):
+        self.restore_world(entry["active_id"], verify=False)
+
+    def _step_create(self, entry):
+        active_dir = self.save_dir / entry["active_id"]
+        active_dir.mkdir(exist_ok=True)
+        (active_dir / "name.txt").write_text(entry["name"])
+
+        # Copy default PalWorldSettings.ini
+        if self.default_ws.exists():
+            shutil.copy2(self.default_ws, active_dir / "PalWorldSettings.ini")
+        else:
+            # Just create empty if default doesn’t exist
+            (active_dir / "PalWorldSettings.ini").write_text("")
+
+    def recover(self):
+        """Finish or undo a switch or new world that was cut short. Returns what was done, or None.
+
+        Once the active world has been moved aside the operation is rolled forward,
+        otherwise it is rolled back. Either way the mod copies only fill in what is
+        missing, so this takes about as long as a scan of the live folders.
+
+        A rollback after the backup step only restores from the world copy: the live
+        folders may be half cleared by then, and syncing them back would lose mods.
+        """
+        if self.journal.load() is None:
+            return None
+        with self.timing.operation("recover"), self.lock.hold(self.timing):
+            # Another thread or process may have recovered it while we waited for the lock
+            entry = self.journal.load()
+            if entry is None:
+                return None
+            self.require_stopped()
+            what = f"switch to {entry['name']}" if entry["op"] == "switch_world" else f"new world {entry['name']}"
+            if (self.save_dir / entry["archive"]).exists():
+                self._run_journal(entry)
+                return f"Finished the interrupted {what}."
+            # The active world was never moved: make sure its mods are saved, then put them back live.
+            # Clearing starts only after a completed backup, so until then the live folders are whole.
+            if "backup" not in entry["done"]:
+                self.backup_current_world(entry["active_id"], clear_live=False)
+            self.restore_world(entry["active_id"], verify=False)
+            self.index.update(entry["active_id"])
+            self.journal.finish()
+            return f"Rolled back the interrupted {what}."
+
+    @timed
+    @locked
+    def delete_world(self, folder):
+        """Move a world to the trash. Returns its name inside __trash__."""
+        if folder == self.active_id:
+            raise SaveManagerError("The active world can't be deleted; switch to another world first")
+        size = self.index.load().get(folder, {}).get("size")
+        deleted_name = self.trash.add(self.save_dir / folder, size)
+        self.index.update(folder)
+        return deleted_name
+
+    @timed
+    @locked
+    def undo_delete(self, deleted_name):
+        """Bring a world back from the trash. Returns the folder it was restored to."""
+        name_txt = self.trash.dir / deleted_name / "name.txt"
+        friendly_name = name_txt.read_text().strip() if name_txt.exists() else deleted_name
+        restored_name = safe_rename(self.save_dir, friendly_name)
+        self.trash.take(deleted_name, self.save_dir / restored_name)
+        self.index.update(restored_name)
+        return restored_name
+
+    @timed
+    @locked
+    def clear_trash(self):
+        """Permanently delete everything in the trash (in the background)."""
+        deleted = [name for name, _ in self.list_deleted()]
+        self.trash.purge(deleted)
+        return deleted
+
+    @timed
+    @locked
+    def keyed_world_dir(self, folder):
+        """A world's folder, for the stores keyed by its world_uid (snapshots, manifests, hot backups).
+
+        Refreshes the index first, which gives a world folder copied by hand an id
+        of its own, so two worlds never share one history.
+        """
+        self.index.refresh(self.active_id)
+        return self.save_dir / folder
+
+    def verify_world(self, folder, full=False):
+        """Hash a world's files against its manifest (see Verifier) and return the report."""
+        return self.verifier.verify(self.keyed_world_dir(folder), full)
+
+    def check_world(self, folder):
+        report = self.verify_world(folder)
+        if report["problems"]:
+            raise IntegrityError(self.world_name(folder), report["problems"])
+        return report
+
+    @locked
+    def rename_world(self, folder, new_name):
+        (self.save_dir / folder / "name.txt").write_text(new_name)
+        self.index.set_name(folder, new_name)
+
+    # ---------- Server ----------
+    def server_root_pid(self):
+        """Pid of the PalServer launched by this tool, if it is still running."""
+        try:
+            pid = json.loads(self.pid_file.read_text())["pid"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return pid if process_usage(pid) is not None else None
+
+    def server_pids(self, table=None):
+        """Every running process of this install's PalServer: the one this tool launched with its children,
+        plus any started some other way (Steam, a service, another copy of this tool).
+
+        A PalServer counts only if its executable or working directory is inside palserver_dir,
+        so servers of other installs on the same machine are never reported or stopped.
+        """
+        table = process_table() if table is None else table
+        root = self.server_root_pid()
+        pids = process_tree(root, table) if root else set()
+        pids.update(pid for pid, (_, name, _) in table.items()
+                    if name.lower().startswith("palserver") and pid not in pids and self._runs_here(pid))
+        return pids
+
+    def _runs_here(self, pid):
+        base = os.path.normcase(os.path.realpath(self.palserver_dir))
+        for path in filter(None, process_paths(pid)):
+            path = os.path.normcase(os.path.realpath(path))
+            if path == base or path.startswith(base + os.sep):
+                return True
+        return False
+
+    @timed
+    @locked
+    def launch_server(self):
+        """Start PalServer.exe and record its pid. Use ServerSupervisor to also restart it and sample it."""
+        self.require_stopped()
+        server_exe = self.palserver_dir / "PalServer.exe"
+        if not server_exe.exists():
+            raise SaveManagerError("PalServer.exe not found!")
+        import subprocess
+        proc = subprocess.Popen([str(server_exe)], cwd=self.palserver_dir)
+        self.meta_dir.mkdir(exist_ok=True)
+        self.pid_file.write_text(json.dumps({"pid": proc.pid, "started": time.time()}))
+        return proc
+
+    def stop_server(self, timeout=30):
+        """Stop PalServer. Removing the pid file first tells a supervisor not to restart it."""
+        pids = self.server_pids()
+        self.pid_file.unlink(missing_ok=True)
+        terminate_processes(pids)
+        deadline = time.monotonic() + timeout
+        while pids and time.monotonic() < deadline:
+            time.sleep(0.2)
+            pids = {pid for pid in pids if process_usage(pid) is not None}
+        return not pids
+
+    def latest_telemetry(self):
+        """The newest sample written by a supervisor, as a dict, or None."""
+        files = list(self.telemetry_dir.glob("*.csv")) + list(self.telemetry_dir.glob("*.jsonl"))
+        if not files:
+            return None
+        latest = max(files, key=os.path.getmtime)
+        lines = latest.read_text().splitlines()
+        if latest.suffix == ".jsonl":
+            return json.loads(lines[-1]) if lines else None
+        if len(lines) < 2:
+            return None
+        return dict(zip(lines[0].split(","), lines[-1].split(",")))
+
+    # ---------- Snapshots ----------
+    def list_snapshots(self, folder):
+        return self.snapshots.list(self.keyed_world_dir(folder))
+
+    @timed
+    @locked
+    def create_snapshot(self, folder):
+        return self.snapshots.create(self.keyed_world_dir(folder), self.world_name(folder))
+
+    @timed
+    @locked
+    def restore_snapshot(self, folder, snap_id):
+        if folder == self.active_id:
+            self.require_stopped()
+        self.snapshots.restore(self.keyed_world_dir(folder), snap_id)
+        self.index.update(folder)
+
+    def prune_snapshots(self, folder, keep_last=24, keep_daily=30):
+        return self.snapshots.prune(self.keyed_world_dir(folder), keep_last, keep_daily)
+
+    def snapshot_all_worlds(self):
+        """Snapshot every world, active and archived. Meant to be run on a schedule.
+
+        A running server may write the active world's saves meanwhile: that snapshot is
+        retried once the writes settle, and skipped ((None, 0)) after SNAPSHOT_RETRIES tries.
+        """
+        snapshots = {}
+        for folder in self.index.refresh(self.active_id):
+            for attempt in range(SNAPSHOT_RETRIES):
+                try:
+                    snapshots[folder] = self.create_snapshot(folder)
                     break
-                else:
-                    print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                except SaveChangedError:
+                    time.sleep(self.hot_backup_settle)
+            else:
+                snapshots[folder] = (None, 0)
+        return snapshots
 
-            sel_folder, sel_name, _ = worlds[num-1]
+    @timed
+    @locked
+    def maintain(self, verify=True):
+        """Nightly upkeep: trash retention and purges, a snapshot of every world, snapshot pruning
+        and a delta verification of every world. Returns a summary; problems lists failed worlds."""
+        self.trash.resume_purges()
+        evicted = self.trash.enforce_policy()
+        snapshots = self.snapshot_all_worlds()
+        pruned = sum(self.prune_snapshots(folder) for folder in snapshots)
+        with self.timing.phase("snapshot gc"):
+            freed = self.snapshots.gc()
+        problems = {}
+        if verify:
+            for folder in sorted(self.index.refresh(self.active_id)):
+                report = self.verify_world(folder)
+                if report["problems"]:
+                    problems[folder] = report["problems"]
+        with self.timing.phase("wait for trash purge"):
+            self.trash.wait()
+        if self.trash.gc_pending:
+            # The purge finished while this held the lock, so its collection was left to us
+            self.trash.collect_store()
+        return {
+            "evicted": evicted,
+            "snapshots": sum(1 for snap_id, _ in snapshots.values() if snap_id),
+            "snapshot_bytes": sum(new_bytes for _, new_bytes in snapshots.values()),
+            "snapshots_pruned": pruned,
+            "snapshot_bytes_freed": freed,
+            "problems": problems,
+        }
 
-            backup_current_world(ACTIVE_ID)
+    # ---------- Hot Backups ----------
+    def list_hot_backups(self, folder):
+        return self.hot_backups.list(self.keyed_world_dir(folder))
 
-            old_world_name = get_next_world_name()
-            (SAVE_DIR / ACTIVE_ID).rename(SAVE_DIR / old_world_name)
+    @timed
+    @locked
+    def create_hot_backup(self, folder):
+        """Back up a world's saves now, then prune old backups. Safe while the server runs."""
+        world_dir = self.save_dir / folder
+        with self.timing.phase("copy saves") as phase:
+            manifest = self.hot_backups.create(world_dir)
+            if manifest:
+                phase.add(len(manifest["files"]), sum(f["size"] for f in manifest["files"].values()))
+        with self.timing.phase("prune"):
+            self.hot_backups.prune(world_dir, self.hot_backup_keep)
+        return manifest
 
-            (SAVE_DIR / sel_folder).rename(SAVE_DIR / ACTIVE_ID)
+    @timed
+    @locked
+    def restore_hot_backup(self, folder, backup_id):
+        if folder == self.active_id:
+            self.require_stopped()
+        self.hot_backups.restore(self.keyed_world_dir(folder), backup_id)
+        self.index.update(folder)
 
-            restore_world(ACTIVE_ID)
 
-            print(Fore.GREEN + f"Activated world: {sel_name}" + Style.RESET_ALL)
-            input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+# ---------- Server Supervisor ----------
+TELEMETRY_FIELDS = ["time", "pids", "cpu_percent", "rss_bytes", "threads", "handles", "level_bytes", "player_saves"]
+RESTART_DELAY = 5
+RESTART_DELAY_MAX = 300
+# A server that ran this long before crashing starts the backoff over
+STABLE_RUN = 600
+TELEMETRY_FLUSH_EVERY = 12
+
+class ServerSupervisor:
+    """Runs PalServer, restarts it with backoff when it crashes and samples its resource use.
+
+    Samples are kept in a ring buffer (the last manager.telemetry_samples of them)
+    and appended to __manager__/telemetry/<start time>.csv (or .jsonl). While it
+    supervises, a HotBackupScheduler backs up the active world after each autosave.
+    """
+
+    def __init__(self, manager, on_event=None):
+        from collections import deque
+        self.manager = manager
+        self.interval = manager.telemetry_interval
+        self.samples = deque(maxlen=manager.telemetry_samples)
+        self.on_event = on_event or (lambda message: None)
+        self.proc = None
+        self.restarts = 0
+        self.log_file = None
+        self._unflushed = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.hot_backup = None
 
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
 
-        # ---------- New World ----------
-        elif choice == "N":
-            # Backup current
-            backup_current_world(ACTIVE_ID)
+    def start(self):
+        """Supervise on a background thread. The server outlives the thread if this process exits."""
+        self.manager.require_stopped()
+        self._thread = threading.Thread(target=self.run, name="server-supervisor", daemon=True)
+        self._thread.start()
 
-            # Rename current active
-            old_name = get_next_world_name()
-            (SAVE_DIR / ACTIVE_ID).rename(SAVE_DIR / old_name)
+    def stop(self):
+        """Stop supervising; the server itself keeps running (see SaveManager.stop_server)."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
 
-            # Create new world
-            new_name = input(Style.BRIGHT + "Enter a name for the new world: " + Style.RESET_ALL).strip()
-            if not new_name:
-                new_name = "New World"
-            (SAVE_DIR / ACTIVE_ID).mkdir()
-            (SAVE_DIR / ACTIVE_ID / "name.txt").write_text(new_name)
+    def run(self):
+        """Launch the server and supervise it until it exits cleanly, is stopped, or crashes too often."""
+        fmt = "jsonl" if self.manager.telemetry_format == "json" else "csv"
+        self.log_file = self.manager.telemetry_dir / f"{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+        delay = RESTART_DELAY
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.proc = self.manager.launch_server()
+                except SaveManagerError as e:
+                    self.on_event(str(e))
+                    return
+                self.on_event(f"PalServer started (pid {self.proc.pid}).")
+                if self.manager.hot_backup and self.hot_backup is None and self.manager.has_active_world():
+                    self.hot_backup = HotBackupScheduler(self.manager, self.on_event)
+                    self.hot_backup.start()
+                started = time.monotonic()
+                code = self._monitor()
+                if code is None:
+                    return
+                stopped = not self.manager.pid_file.exists()
+                self.manager.pid_file.unlink(missing_ok=True)
+                if stopped or code == 0:
+                    self.on_event(f"PalServer exited (code {code}).")
+                    return
+                if time.monotonic() - started > STABLE_RUN:
+                    # Crashes days apart aren't a crash loop: start counting again
+                    delay = RESTART_DELAY
+                    self.restarts = 0
+                if not self.manager.restart_on_crash or self.restarts >= self.manager.restart_max:
+                    self.on_event(f"PalServer crashed (code {code}); not restarting.")
+                    return
+                self.restarts += 1
+                self.on_event(f"PalServer crashed (code {code}); restarting in {delay}s "
+                              f"({self.restarts}/{self.manager.restart_max}).")
+                if self._stop.wait(delay):
+                    return
+                delay = min(delay * 2, RESTART_DELAY_MAX)
+        finally:
+            if self.hot_backup:
+                self.hot_backup.stop()
+            self.flush()
 
-            # Copy default PalWorldSettings.ini
-            if DEFAULT_WS.exists():
-                shutil.copy2(DEFAULT_WS, SAVE_DIR / ACTIVE_ID / "PalWorldSettings.ini")
+    def _monitor(self):
+        """Sample the server until its process tree is gone. Returns its exit code, or None if stopped."""
+        last_cpu, last_time = {}, None
+        while True:
+            now = time.time()
+            table = process_table()
+            pids = process_tree(self.proc.pid, table)
+            code = self.proc.poll()
+            if code is not None and not pids - {self.proc.pid}:
+                return code
+
+            usage = {pid: process_usage(pid) for pid in pids}
+            usage = {pid: u for pid, u in usage.items() if u is not None}
+            cpu = {pid: u[0] for pid, u in usage.items()}
+            cpu_percent = None
+            if last_time is not None and now > last_time:
+                used = sum(seconds - last_cpu.get(pid, 0) for pid, seconds in cpu.items())
+                cpu_percent = round(max(used, 0) / (now - last_time) * 100, 1)
+            last_cpu, last_time = cpu, now
+
+            handles = [u[2] for u in usage.values() if u[2] is not None]
+            level = self.manager.save_dir / self.manager.active_id / "Level.sav"
+            players = self.manager.save_dir / self.manager.active_id / "Players"
+            self.samples.append((
+                round(now, 3), len(usage), cpu_percent,
+                sum(u[1] for u in usage.values()),
+                sum(table[pid][2] or 0 for pid in usage if pid in table),
+                sum(handles) if handles else None,
+                level.stat().st_size if level.exists() else None,
+                sum(1 for _ in players.glob("*.sav")) if players.exists() else 0,
+            ))
+            self._unflushed += 1
+            if self._unflushed >= TELEMETRY_FLUSH_EVERY or not self.log_file.exists():
+                self.flush()
+            if self._stop.wait(self.interval):
+                return None
+
+    def flush(self):
+        """Append samples not yet written to the telemetry file."""
+        count = min(self._unflushed, len(self.samples))
+        if not count or self.log_file is None:
+            return
+        rows = list(self.samples)[-count:]
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.log_file.exists()
+        with open(self.log_file, "a", newline="") as f:
+            if self.log_file.suffix == ".jsonl":
+                f.writelines(json.dumps(dict(zip(TELEMETRY_FIELDS, row))) + "\n" for row in rows)
             else:
-                # Just create empty if default doesn’t exist
-                (SAVE_DIR / ACTIVE_ID / "PalWorldSettings.ini").write_text("")
+                if new_file:
+                    f.write(",".join(TELEMETRY_FIELDS) + "\n")
+                f.writelines(",".join("" if v is None else str(v) for v in row) + "\n" for row in rows)
+        self._unflushed = 0
 
-            print(Fore.GREEN + f"New world created: {new_name}" + Style.RESET_ALL)
-            input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+    def export(self, path):
+        """Write the ring buffer to path as CSV, or as JSON if path ends in .json."""
+        path = Path(path)
+        if path.suffix == ".json":
+            path.write_text(json.dumps({"fields": TELEMETRY_FIELDS, "samples": list(self.samples)}))
+            return
+        with open(path, "w", newline="") as f:
+            f.write(",".join(TELEMETRY_FIELDS) + "\n")
+            f.writelines(",".join("" if v is None else str(v) for v in row) + "\n" for row in self.samples)
 
-        # ---------- Delete World ----------
-        elif choice == "D":
-            if not worlds:
-                print(Fore.YELLOW + "No worlds available to delete!" + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+
+# ---------- Hot Backup Scheduler ----------
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+class _Inotify:
+    """Just enough of inotify (Linux), through ctypes."""
+
+    def __init__(self):
+        import ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask):
+        import ctypes
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self, timeout):
+        """Pending events as (wd, mask, name), waiting up to timeout seconds for the first one."""
+        import select
+        import struct
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, pos = [], 0
+        while pos + 16 <= len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, pos)
+            name = data[pos + 16:pos + 16 + length].rstrip(b"\0").decode(errors="replace")
+            events.append((wd, mask, name))
+            pos += 16 + length
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class SaveWatcher:
+    """Reports writes to a world's .sav files: inotify on Linux, polling their stats elsewhere."""
+
+    def __init__(self, world_dir):
+        self.world_dir = world_dir
+        self._inotify = None
+        self._dirs = {}
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+                self._watch("")
+                if (world_dir / "Players").is_dir():
+                    self._watch("Players")
+            except (OSError, AttributeError):
+                self.close()
+        self._stats = self._scan() if self._inotify is None else None
+
+    @property
+    def mode(self):
+        return "inotify" if self._inotify else "polling"
+
+    def _watch(self, rel):
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        self._dirs[self._inotify.add_watch(self.world_dir / rel, mask)] = rel
+
+    def _scan(self):
+        stats = {}
+        for path in _snapshot_files(self.world_dir, HOT_BACKUP_PATTERNS):
+            try:
+                st = path.stat()
+            except OSError:
                 continue
-            while True:
-                num = input(Style.BRIGHT + "Enter world number to delete: " + Style.RESET_ALL).strip()
-                if not num.isdigit():
-                    print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+            stats[path.relative_to(self.world_dir).as_posix()] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def wait(self, timeout):
+        """Saves written in the next timeout seconds, as paths relative to the world ("*" if unknown)."""
+        if self._inotify is None:
+            time.sleep(timeout)
+            stats = self._scan()
+            changed = {rel for rel in stats.keys() | self._stats.keys() if stats.get(rel) != self._stats.get(rel)}
+            self._stats = stats
+            return changed
+        changed = set()
+        for wd, mask, name in self._inotify.read(timeout):
+            if mask & IN_Q_OVERFLOW:
+                changed.add("*")
+            elif wd in self._dirs and self._dirs[wd] == "" and name == "Players" and mask & IN_ISDIR:
+                # First player joined: the Players folder was just created
+                if mask & IN_CREATE:
+                    self._watch("Players")
+                changed.add("*")
+            elif wd in self._dirs and name.lower().endswith(".sav"):
+                changed.add(f"{self._dirs[wd]}/{name}".lstrip("/"))
+        return changed
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+class HotBackupScheduler:
+    """Backs up the active world's saves shortly after each autosave while PalServer runs.
+
+    A backup starts once no save has been written for manager.hot_backup_settle
+    seconds, and at most every manager.hot_backup_interval seconds. The thread
+    runs at background I/O priority, so copies never hold up the server's writes.
+    """
+
+    def __init__(self, manager, on_event=None):
+        self.manager = manager
+        self.world_dir = manager.save_dir / manager.active_id
+        self.on_event = on_event or (lambda message: None)
+        self.backups = 0
+        self.last_backup = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="hot-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching. A backup that is being copied is finished first."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def run(self):
+        """Watch the world until stopped, backing it up after writes settle."""
+        background_io_priority()
+        watcher = SaveWatcher(self.world_dir)
+        settle, interval = self.manager.hot_backup_settle, self.manager.hot_backup_interval
+        # Start with a backup if the saves changed since the last one (e.g. while nothing watched them)
+        dirty, last_write, last_backup = True, 0.0, -interval
+        try:
+            while not self._stop.is_set():
+                if watcher.wait(1.0):
+                    dirty, last_write = True, time.monotonic()
                     continue
-                num = int(num)
-                if 1 <= num <= len(worlds):
-                    break
-                else:
-                    print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
-            sel_folder, sel_name, _ = worlds[num-1]
-            confirm = input(Fore.YELLOW + Style.BRIGHT + f"Are you sure you want to DELETE {sel_name}? (Y/N) " + Style.RESET_ALL).strip().upper()
-            if confirm == "Y":
-                timestamp = int(time.time())
-                deleted_name = f"{sel_folder}_{timestamp}"
-                shutil.move(SAVE_DIR / sel_folder, TRASH_DIR / deleted_name)
-                print(Fore.GREEN + f"{sel_name} moved to trash." + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                now = time.monotonic()
+                if not dirty or now - last_write < settle or now - last_backup < interval:
+                    continue
+                try:
+                    manifest = self.manager.create_hot_backup(self.manager.active_id)
+                except SaveChangedError:
+                    # The server started its next write mid-copy; wait for that one to settle
+                    last_write = time.monotonic()
+                    continue
+                except (SaveManagerError, OSError) as e:
+                    self.on_event(f"Hot backup failed: {e}")
+                    last_backup = now
+                    continue
+                dirty, last_backup = False, time.monotonic()
+                if manifest:
+                    self.backups += 1
+                    self.last_backup = manifest
+                    self.on_event(f"Hot backup {manifest['id']}: {len(manifest['files'])} saves "
+                                  f"({manifest['cloned']} cloned, {manifest['copied']} copied, "
+                                  f"{manifest['linked']} unchanged).")
+        finally:
+            watcher.close()
 
-        # ---------- Undo Delete ----------
-        elif choice == "U":
-            deleted = list_deleted()
-            if not deleted:
-                print(Fore.YELLOW + "No deleted worlds to undo!" + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
-                continue
-            print(Fore.MAGENTA + Style.BRIGHT + "Deleted worlds:" + Style.RESET_ALL)
-            for i, (_, friendly_name) in enumerate(deleted, start=1):
-                print(Fore.WHITE + f"{i}. {friendly_name}" + Style.RESET_ALL)
-            while True:
-                num = input(Style.BRIGHT + "Enter number to restore: " + Style.RESET_ALL).strip()
-                if not num.isdigit():
-                    print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+
+# ---------- Instances ----------
+def load_instances(config_file=CONFIG_FILE):
+    """Settings of every PalServer install in the config file, by instance name.
+
+    Each [section] is an instance and inherits the keys under [DEFAULT]. A config
+    without sections is a single instance named "default".
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if config.sections():
+        return {name: config[name] for name in config.sections()}
+    return {"default": config['DEFAULT']}
+
+def load_managers(config_file=CONFIG_FILE, names=None):
+    """A SaveManager for each named instance, or for every instance in the config file."""
+    instances = load_instances(config_file)
+    return [SaveManager.from_config(config_file, instance=name) for name in (names or instances)]
+
+class InstancePool:
+    """Runs an operation on several instances at once.
+
+    Every instance gets its own thread, but instances whose PalServer folders
+    are on the same volume take turns (disk_concurrency at a time), so two big
+    copies don't thrash one drive. Operations on one instance are serialized by
+    its InstanceLock.
+    """
+
+    def __init__(self, managers, disk_concurrency=1):
+        self.managers = managers
+        self._slots = {}
+        volumes = {}
+        for manager in managers:
+            try:
+                volume = os.stat(manager.palserver_dir).st_dev
+            except OSError:
+                volume = manager.palserver_dir
+            if volume not in volumes:
+                volumes[volume] = threading.BoundedSemaphore(max(1, disk_concurrency))
+            self._slots[manager.name] = volumes[volume]
+
+    def run(self, func):
+        """Call func(manager) for every instance. Returns {name: (result, error)}, error being None or a message."""
+        def task(manager):
+            with self._slots[manager.name]:
+                try:
+                    return func(manager), None
+                except (SaveManagerError, OSError) as e:
+                    return None, str(e)
+                except Exception as e:
+                    # A bug hit by one instance mustn't stop the others; report it with its type
+                    return None, f"{type(e).__name__}: {e}"
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, len(self.managers))) as pool:
+            return dict(zip([m.name for m in self.managers], pool.map(task, self.managers)))
+
+
+# ---------- Jobs ----------
+class Job:
+    """A long operation run by a JobQueue: its state, live progress and how it ended.
+
+    The copy engine adds to the totals as it finds work, so they can grow
+    while the job runs. unit names what the count is of ("files", "worlds").
+    """
+
+    def __init__(self, name, func, done=None, unit="files"):
+        self.name = name
+        self.func = func
+        self.done = done  # result -> message once it succeeds
+        self.unit = unit
+        self.state = "queued"  # then running, and done, failed or cancelled
+        self.result = None
+        self.error = None
+        self.message = None
+        self.files = self.files_total = 0
+        self.bytes = self.bytes_total = 0
+        self.started = self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def expect(self, files, nbytes):
+        with self._lock:
+            self.files_total += files
+            self.bytes_total += nbytes
+
+    def advance(self, files, nbytes):
+        with self._lock:
+            self.files += files
+            self.bytes += nbytes
+
+    def checkpoint(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"{self.name} was cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def eta(self):
+        """Seconds left at the rate so far, or None while there's no rate yet.
+
+        Estimated from both bytes and the count and the longer one wins, so a
+        tail of many small files isn't shown as done.
+        """
+        if self.state != "running":
+            return None
+        elapsed = time.monotonic() - self.started
+        estimates = [(total - done) * elapsed / done
+                     for done, total in [(self.bytes, self.bytes_total), (self.files, self.files_total)] if done and total]
+        return max(0.0, *estimates) if estimates else None
+
+class JobQueue:
+    """Runs a manager's long operations one at a time on a worker thread, in the order submitted.
+
+    A cancelled job stops at the next file boundary. If that leaves a switch or
+    new world half done, it is finished or undone right away (see
+    SaveManager.recover), so the server folder is never left in between.
+    on_event(message) is called as each job ends.
+    """
+
+    def __init__(self, manager, on_event=None, history=20):
+        self.manager = manager
+        self.on_event = on_event or (lambda message: None)
+        self.history = history
+        self.jobs = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, name, func, done=None, unit="files"):
+        """Queue func() behind the jobs already queued. Returns its Job."""
+        job = Job(name, func, done, unit)
+        with self._lock:
+            ended = [j for j in self.jobs if j.state not in ("queued", "running")]
+            for old in ended[:max(0, len(ended) - self.history)]:
+                self.jobs.remove(old)
+            self.jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=f"jobs-{self.manager.name}")
+                self._thread.start()
+        return job
+
+    def active(self):
+        """Queued and running jobs, oldest first."""
+        with self._lock:
+            return [j for j in self.jobs if j.state in ("queued", "running")]
+
+    @property
+    def busy(self):
+        return bool(self.active())
+
+    def cancel(self, job):
+        with self._lock:
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.message = f"{job.name}: cancelled before it started."
+        job.cancel()
+
+    def cancel_all(self):
+        for job in self.active():
+            self.cancel(job)
+
+    def wait(self):
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                job = next((j for j in self.jobs if j.state == "queued"), None)
+                if job is None:
+                    self._thread = None
+                    return
+                job.state = "running"
+                job.started = time.monotonic()
+            self._run(job)
+            self.on_event(job.message)
+
+    def _run(self, job):
+        _job_local.job = job
+        try:
+            job.result = job.func()
+            job.message = job.done(job.result) if job.done else f"{job.name}: done."
+            job.state = "done"
+        except JobCancelled as e:
+            job.error = e
+            job.message = f"{job.name}: cancelled after {job.files} of {job.files_total} {job.unit}."
+            job.state = "cancelled"
+        except SaveManagerError as e:
+            job.error = e
+            job.message = str(e)
+            job.state = "failed"
+        except Exception as e:
+            # Keep the queue going; the message is all the menu can show of it
+            job.error = e
+            job.message = f"{job.name} failed: {type(e).__name__}: {e}"
+            job.state = "failed"
+        finally:
+            _job_local.job = None
+            job.finished = time.monotonic()
+        if job.state != "done" and self.manager.journal.load() is not None:
+            try:
+                job.message += " " + (self.manager.recover() or "")
+            except (SaveManagerError, OSError) as e:
+                job.message += f" Couldn't clean up ({e}); it is retried the next time the tool starts."
+
+
+# ---------- Interactive Menu ----------
+def format_world_stats(stats):
+    if not stats or "error" in stats:
+        return ""
+    parts = []
+    if "game_days" in stats:
+        parts.append(f"day {stats['game_days']}")
+    if "players" in stats:
+        parts.append(f"{stats['players']} players")
+    if "guilds" in stats:
+        parts.append(f"{stats['guilds']} guilds")
+    return ", " + ", ".join(parts) if parts else ""
+
+def format_job(job):
+    """A job's status line: progress and ETA while it runs, otherwise how it ended."""
+    if job.state == "queued":
+        return f"{job.name}: queued"
+    if job.state != "running":
+        return job.message
+    parts = []
+    if job.bytes_total:
+        parts.append(f"{job.bytes * 100 // job.bytes_total}% ({format_size(job.bytes)} of {format_size(job.bytes_total)})")
+    if job.files_total:
+        parts.append(f"{job.files}/{job.files_total} {job.unit}")
+    eta = job.eta()
+    if eta is not None:
+        parts.append(f"ETA {int(eta) // 60}:{int(eta) % 60:02d}")
+    if job.cancelled:
+        parts.append("cancelling...")
+    return f"{job.name}: " + (", ".join(parts) or "working...")
+
+def read_choice(prompt, timeout):
+    """input(prompt), or None if nothing was typed within timeout seconds, so the screen can be redrawn."""
+    print(prompt, end="", flush=True)
+    if sys.platform == "win32":
+        import msvcrt
+        deadline = time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0.05)
+        return input()
+    import select
+    if not select.select([sys.stdin], [], [], timeout)[0]:
+        return None
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line
+
+def load_interactive_manager(config_file=CONFIG_FILE, palserver_dir=None, active_id=None, instance=None):
+    """First-time setup, instance choice and active world detection, prompting for whatever is missing."""
+    from colorama import Fore, Style
+
+    config = configparser.ConfigParser()
+    if not palserver_dir and not os.path.exists(config_file):
+        palserver_dir = input(Fore.CYAN + Style.BRIGHT +
+                              "Enter full path to your PalServer folder (ex. C:\\Program Files (x86)\\Steam\\SteamApps\\common\\PalServer): " +
+                              Style.RESET_ALL).strip()
+        config['DEFAULT'] = {'palserver_dir': palserver_dir}
+        with open(config_file, 'w') as f:
+            config.write(f)
+
+    instances = list(load_instances(config_file))
+    if instance is None and len(instances) > 1:
+        print(Fore.MAGENTA + Style.BRIGHT + "Instances:" + Style.RESET_ALL)
+        for i, name in enumerate(instances, start=1):
+            print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL)
+        while instance is None:
+            num = input(Style.BRIGHT + "Enter instance number to manage: " + Style.RESET_ALL).strip()
+            if num.isdigit() and 1 <= int(num) <= len(instances):
+                instance = instances[int(num)-1]
+            else:
+                print(Fore.YELLOW + "Invalid input! Please enter a number from the list." + Style.RESET_ALL)
+
+    manager = SaveManager.from_config(config_file, palserver_dir, active_id, instance)
+    # A switch cut short while the active world was moved aside looks like a missing world,
+    # so it is finished or undone (from its journal) before anything is asked
+    try:
+        recovered = manager.recover()
+    except SaveManagerError as e:
+        recovered = str(e)
+    if recovered:
+        print(Fore.YELLOW + Style.BRIGHT + recovered + Style.RESET_ALL)
+        input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+    if not manager.has_active_world():
+        manager.active_id = input(Fore.YELLOW + Style.BRIGHT +
+                                  "Enter the active world folder name manually: " +
+                                  Style.RESET_ALL).strip()
+    manager.trash_dir.mkdir(exist_ok=True)
+    return manager
+
+def run_menu(manager):
+    from colorama import init, Fore, Style
+    init(autoreset=True)
+
+    manager.trash.resume_purges()
+    manager.trash.enforce_policy()
+    events = []
+    try:
+        # Normally done by load_interactive_manager already
+        recovered = manager.recover()
+        if recovered:
+            events.append(recovered)
+    except SaveManagerError as e:
+        events.append(str(e))
+    supervisor = ServerSupervisor(manager, on_event=events.append)
+    # Switches, copies and trash clearing run here, so the menu stays usable while they do
+    jobs = JobQueue(manager, on_event=events.append)
+    # World stats not in the cache yet are read here; the list shows them once they are
+    stats_reader = None
+    failed_checks = {}  # world uid -> problems, for worlds whose switch failed verification
+
+    def queue_job(name, func, done=None, unit="files"):
+        jobs.submit(name, func, done, unit)
+        print(Fore.CYAN + f"Queued: {name}" + Style.RESET_ALL)
+        time.sleep(0.5)
+
+    def world_job(folder, uid, op):
+        """A job running op on the world picked as folder, wherever earlier jobs have moved it by then."""
+        def run():
+            # Held across both, so nothing renames the world between finding and using it
+            with manager.lock.hold(manager.timing):
+                return op(manager.locate_world(folder, uid))
+        return run
+
+    def switch_job(folder, uid, verify):
+        def run():
+            try:
+                return world_job(folder, uid, lambda target: manager.switch_world(target, verify=verify))()
+            except IntegrityError as e:
+                failed_checks[uid] = e.problems
+                raise SaveManagerError(f"{e} Switch to it again to activate it anyway.")
+        return run
+
+    while True:
+        os.system('cls')
+        # Header
+        print(Fore.CYAN + Style.BRIGHT + "="*30)
+        print(Fore.CYAN + Style.BRIGHT + "Palworld Save Manager")
+        print(Fore.CYAN + Style.BRIGHT + "="*30 + Style.RESET_ALL)
+        print()
+
+        # List worlds; while a job is moving them around, as last indexed
+        busy = jobs.busy
+        index = manager.index.cached() if busy else manager.index.refresh(manager.active_id)
+        worlds = manager.list_worlds(index=index)
+        if worlds:
+            print(Fore.MAGENTA + Style.BRIGHT + "Available Worlds:" + Style.RESET_ALL)
+            unread = []
+            for i, (folder, name, mod) in enumerate(worlds, start=1):
+                info = index[folder]
+                stats = manager.indexed_level_stats(info)
+                if stats is None and info.get("level"):
+                    unread.append(folder)
+                played = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["last_played"])) if info["last_played"] else "never"
+                print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL + f" (Folder: {folder})" +
+                      Style.DIM + f" - {format_size(info['size'])}, {len(info['mods'])} mods, last played {played}" +
+                      format_world_stats(stats) + Style.RESET_ALL)
+            if unread and not busy and (stats_reader is None or not stats_reader.is_alive()):
+                stats_reader = threading.Thread(target=manager.read_level_stats, args=(unread,),
+                                                name="read-world-stats", daemon=True)
+                stats_reader.start()
+        else:
+            print(Fore.YELLOW + Style.BRIGHT + "No other worlds available." + Style.RESET_ALL)
+
+        # Active world info
+        active_name = manager.world_name(manager.active_id)
+        print()
+        print(Fore.GREEN + Style.BRIGHT + f"Current active world: {active_name} (Folder: {manager.active_id})" + Style.RESET_ALL)
+
+        # Server status, with the latest telemetry sample when this menu supervises it
+        if supervisor.running and supervisor.samples:
+            _, _, cpu, rss, threads, handles, _, _ = supervisor.samples[-1]
+            print(Fore.GREEN + "Server: running" + Style.RESET_ALL + Style.DIM +
+                  f" - CPU {cpu if cpu is not None else '?'}%, RAM {format_size(rss)}, {threads} threads, "
+                  f"{handles if handles is not None else '?'} handles, {supervisor.restarts} restarts" + Style.RESET_ALL)
+        elif manager.server_pids():
+            print(Fore.GREEN + "Server: running" + Style.RESET_ALL)
+        else:
+            print(Style.DIM + "Server: stopped" + Style.RESET_ALL)
+        if events:
+            print(Style.DIM + events[-1] + Style.RESET_ALL)
+        for job in jobs.active():
+            print(Fore.CYAN + format_job(job) + Style.RESET_ALL)
+        print()
+
+        # Menu options
+        print(Style.BRIGHT + "[S]" + Style.RESET_ALL + " Switch World")
+        print(Style.BRIGHT + "[N]" + Style.RESET_ALL + " New World")
+        print(Style.BRIGHT + "[D]" + Style.RESET_ALL + " Delete World")
+        print(Style.BRIGHT + "[U]" + Style.RESET_ALL + " Undo Delete")
+        print(Style.BRIGHT + "[C]" + Style.RESET_ALL + " Clear Deleted Worlds")
+        print(Style.BRIGHT + "[R]" + Style.RESET_ALL + " Rename World")
+        print(Style.BRIGHT + "[L]" + Style.RESET_ALL + " Launch Server")
+        print(Style.BRIGHT + "[K]" + Style.RESET_ALL + " Stop Server")
+        print(Style.BRIGHT + "[P]" + Style.RESET_ALL + " Paste/Copy Settings and or Mods")
+        print(Style.BRIGHT + "[H]" + Style.RESET_ALL + " Snapshot History")
+        print(Style.BRIGHT + "[V]" + Style.RESET_ALL + " Verify Worlds")
+        print(Style.BRIGHT + "[J]" + Style.RESET_ALL + " Jobs")
+        print(Style.BRIGHT + "[Q]" + Style.RESET_ALL + " Quit")
+
+        try:
+            if busy or (stats_reader is not None and stats_reader.is_alive()):
+                # Redraw every second so running jobs show live progress, and new stats show up
+                choice = read_choice(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL, 1.0)
+                if choice is None:
                     continue
-                num = int(num)
-                if 1 <= num <= len(deleted):
-                    break
-                else:
-                    print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
-            folder_name, friendly_name = deleted[num-1]
-            restored_name = safe_rename(SAVE_DIR, friendly_name)
-            shutil.move(TRASH_DIR / folder_name, SAVE_DIR / restored_name)
-            print(Fore.GREEN + f"Restored world: {restored_name}" + Style.RESET_ALL)
-            input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+            else:
+                choice = input(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL)
+            choice = choice.strip().upper()
 
-        elif choice == "C":
-            deleted = list_deleted()
-            if not deleted:
-                print(Fore.YELLOW + "Trash is already empty!" + Style.RESET_ALL)
+            if choice in ("R", "H", "V", "L") and busy:
+                print(Fore.YELLOW + "Wait for the running jobs to finish first ([J] shows their progress)." + Style.RESET_ALL)
                 input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
                 continue
-            print(Fore.MAGENTA + Style.BRIGHT + "Deleted worlds to be permanently removed:" + Style.RESET_ALL)
-            for _, friendly_name in deleted:
-                print(Fore.WHITE + f"- {friendly_name}" + Style.RESET_ALL)
-            confirm = input(Fore.RED + Style.BRIGHT + "YOU WILL LOSE THESE SERVERS FOREVER! CONTINUE? (Y/N) " + Style.RESET_ALL).strip().upper()
-            if confirm == "Y":
-                for d in TRASH_DIR.iterdir():
-                    if d.is_dir():
-                        shutil.rmtree(d)
-                print(Fore.GREEN + "Deleted servers cleared permanently!" + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
 
-        # ---------- Rename World ----------
-        elif choice == "R":
-            worlds_all = [(ACTIVE_ID, active_name)] + [(f, n) for f, n, _ in list_worlds()]
-            print(Fore.MAGENTA + Style.BRIGHT + "Worlds:" + Style.RESET_ALL)
-            for i, (folder, name) in enumerate(worlds_all, start=1):
-                print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL + f" (Folder: {folder})")
-            while True:
-                num = input(Style.BRIGHT + "Enter world number to rename: " + Style.RESET_ALL).strip()
-                if not num.isdigit():
-                    print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+            if choice == "Q":
+                if jobs.busy:
+                    confirm = input(Fore.YELLOW + Style.BRIGHT + "Jobs are still running. [W]ait for them or [C]ancel them? "
+                                    "(Enter to go back) " + Style.RESET_ALL).strip().upper()
+                    if confirm not in ("W", "C"):
+                        continue
+                    if confirm == "C":
+                        jobs.cancel_all()
+                    print(Fore.CYAN + "Waiting for the jobs to finish..." + Style.RESET_ALL)
+                    jobs.wait()
+                    for job in jobs.jobs:
+                        if job.state != "done":
+                            print(Style.DIM + job.message + Style.RESET_ALL)
+                if manager.trash.purging:
+                    print(Fore.CYAN + "Waiting for the trash purge to finish..." + Style.RESET_ALL)
+                    manager.trash.wait()
+                if supervisor.running:
+                    supervisor.stop()
+                    print(Fore.YELLOW + "PalServer keeps running, but won't be restarted if it crashes "
+                          "or have its saves backed up." + Style.RESET_ALL)
+                break
+
+            # ---------- Switch World ----------
+            elif choice == "S":
+                if not worlds:
+                    print(Fore.YELLOW + "No worlds available to switch!" + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
                     continue
-                num = int(num)
-                if 1 <= num <= len(worlds_all):
-                    break
+
+                while True:
+                    num = input(Style.BRIGHT + "Enter world number to activate: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(worlds):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+
+                sel_folder, sel_name, _ = worlds[num-1]
+                # By id, as switches queued before this one rename the world folders. The id comes
+                # from the listed index: the folder may already hold another world by now.
+                uid = index[sel_folder]["uid"]
+                verify = None
+                if uid in failed_checks:
+                    print(Fore.RED + Style.BRIGHT + f"{sel_name} failed verification:" + Style.RESET_ALL)
+                    for problem in failed_checks[uid]:
+                        print(Fore.RED + f"- {problem['path']}: {problem['issue']}" + Style.RESET_ALL)
+                    confirm = input(Fore.YELLOW + Style.BRIGHT + "Activate it anyway? (Y/N) " + Style.RESET_ALL).strip().upper()
+                    if confirm != "Y":
+                        continue
+                    del failed_checks[uid]
+                    verify = False
+                queue_job(f"Switch to {sel_name}", switch_job(sel_folder, uid, verify),
+                          lambda archive, name=sel_name: f"Activated world: {name}")
+
+
+            # ---------- New World ----------
+            elif choice == "N":
+                new_name = input(Style.BRIGHT + "Enter a name for the new world: " + Style.RESET_ALL).strip()
+                if not new_name:
+                    new_name = "New World"
+                queue_job(f"New world {new_name}", lambda name=new_name: manager.new_world(name),
+                          lambda archive, name=new_name: f"New world created: {name}")
+
+            # ---------- Delete World ----------
+            elif choice == "D":
+                if not worlds:
+                    print(Fore.YELLOW + "No worlds available to delete!" + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                    continue
+                while True:
+                    num = input(Style.BRIGHT + "Enter world number to delete: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(worlds):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                sel_folder, sel_name, _ = worlds[num-1]
+                confirm = input(Fore.YELLOW + Style.BRIGHT + f"Are you sure you want to DELETE {sel_name}? (Y/N) " + Style.RESET_ALL).strip().upper()
+                if confirm == "Y":
+                    uid = index[sel_folder]["uid"]
+                    queue_job(f"Delete {sel_name}", world_job(sel_folder, uid, manager.delete_world),
+                              lambda entry, name=sel_name: f"{name} moved to trash.")
+
+            # ---------- Undo Delete ----------
+            elif choice == "U":
+                deleted = manager.list_deleted()
+                if not deleted:
+                    print(Fore.YELLOW + "No deleted worlds to undo!" + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                    continue
+                print(Fore.MAGENTA + Style.BRIGHT + "Deleted worlds:" + Style.RESET_ALL)
+                for i, (_, friendly_name) in enumerate(deleted, start=1):
+                    print(Fore.WHITE + f"{i}. {friendly_name}" + Style.RESET_ALL)
+                while True:
+                    num = input(Style.BRIGHT + "Enter number to restore: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(deleted):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                folder_name, friendly_name = deleted[num-1]
+                queue_job(f"Restore {friendly_name}", lambda entry=folder_name: manager.undo_delete(entry),
+                          lambda restored_name: f"Restored world: {restored_name}")
+
+            elif choice == "C":
+                deleted = manager.list_deleted()
+                if not deleted:
+                    print(Fore.YELLOW + "Trash is already empty!" + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                    continue
+                print(Fore.MAGENTA + Style.BRIGHT + "Deleted worlds to be permanently removed:" + Style.RESET_ALL)
+                for _, friendly_name in deleted:
+                    print(Fore.WHITE + f"- {friendly_name}" + Style.RESET_ALL)
+                confirm = input(Fore.RED + Style.BRIGHT + "YOU WILL LOSE THESE SERVERS FOREVER! CONTINUE? (Y/N) " + Style.RESET_ALL).strip().upper()
+                if confirm == "Y":
+                    def clear():
+                        deleted = manager.clear_trash()
+                        manager.trash.wait()
+                        job_checkpoint()
+                        return deleted
+                    queue_job("Clear deleted worlds", clear,
+                              lambda deleted: f"Deleted servers cleared permanently! ({len(deleted)} worlds)", unit="worlds")
+
+            # ---------- Rename World ----------
+            elif choice == "R":
+                worlds_all = [(manager.active_id, active_name)] + [(f, n) for f, n, _ in worlds]
+                print(Fore.MAGENTA + Style.BRIGHT + "Worlds:" + Style.RESET_ALL)
+                for i, (folder, name) in enumerate(worlds_all, start=1):
+                    print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL + f" (Folder: {folder})")
+                while True:
+                    num = input(Style.BRIGHT + "Enter world number to rename: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(worlds_all):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                folder, old_name = worlds_all[num-1]
+                new_name = input(Style.BRIGHT + f"Enter new name for {old_name}: " + Style.RESET_ALL).strip()
+                if new_name:
+                    manager.rename_world(folder, new_name)
+                    print(Fore.GREEN + f"World renamed: {new_name}" + Style.RESET_ALL)
+                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+
+            # ---------- Snapshot History ----------
+            elif choice == "H":
+                worlds_all = [(manager.active_id, active_name)] + [(f, n) for f, n, _ in worlds]
+                print(Fore.MAGENTA + Style.BRIGHT + "Worlds:" + Style.RESET_ALL)
+                for i, (folder, name) in enumerate(worlds_all, start=1):
+                    print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL + f" (Folder: {folder})")
+                while True:
+                    num = input(Style.BRIGHT + "Enter world number: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(worlds_all):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                folder, name = worlds_all[num-1]
+
+                snapshots = manager.list_snapshots(folder)
+                if snapshots:
+                    print(Fore.MAGENTA + Style.BRIGHT + f"Snapshots of {name}:" + Style.RESET_ALL)
+                    for i, snap in enumerate(snapshots, start=1):
+                        taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snap["created"]))
+                        size = sum(entry["size"] for entry in snap["files"].values())
+                        print(Fore.WHITE + f"{i}. {taken}" + Style.RESET_ALL + f" ({len(snap['files'])} files, {format_size(size)})")
                 else:
-                    print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
-            folder, old_name = worlds_all[num-1]
-            new_name = input(Style.BRIGHT + f"Enter new name for {old_name}: " + Style.RESET_ALL).strip()
-            if new_name:
-                (SAVE_DIR / folder / "name.txt").write_text(new_name)
-                print(Fore.GREEN + f"World renamed: {new_name}" + Style.RESET_ALL)
-            input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                    print(Fore.YELLOW + f"No snapshots of {name} yet." + Style.RESET_ALL)
+
+                print(Style.BRIGHT + "[1] Take snapshot" + Style.RESET_ALL)
+                print(Style.BRIGHT + "[2] Restore snapshot" + Style.RESET_ALL)
+                print(Style.BRIGHT + "[3] Prune old snapshots" + Style.RESET_ALL)
+                print(Style.BRIGHT + "[4] Restore hot backup" + Style.RESET_ALL)
+                action = input(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL).strip()
+                if action == "1":
+                    snap_id, new_bytes = manager.create_snapshot(folder)
+                    if snap_id:
+                        print(Fore.GREEN + f"Snapshot {snap_id} taken ({format_size(new_bytes)} of new data)." + Style.RESET_ALL)
+                    else:
+                        print(Fore.GREEN + "Nothing changed since the last snapshot." + Style.RESET_ALL)
+                elif action == "2" and snapshots:
+                    while True:
+                        num = input(Style.BRIGHT + "Enter snapshot number to restore: " + Style.RESET_ALL).strip()
+                        if not num.isdigit():
+                            print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                            continue
+                        num = int(num)
+                        if 1 <= num <= len(snapshots):
+                            break
+                        else:
+                            print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                    confirm = input(Fore.YELLOW + Style.BRIGHT + f"Roll {name} back to this snapshot? (Y/N) " + Style.RESET_ALL).strip().upper()
+                    if confirm == "Y":
+                        manager.restore_snapshot(folder, snapshots[num-1]["id"])
+                        print(Fore.GREEN + f"{name} restored to snapshot {snapshots[num-1]['id']}." + Style.RESET_ALL)
+                elif action == "3":
+                    removed = manager.prune_snapshots(folder)
+                    freed = manager.snapshots.gc()
+                    print(Fore.GREEN + f"Removed {removed} snapshots, freed {format_size(freed)}." + Style.RESET_ALL)
+                elif action == "4":
+                    backups = manager.list_hot_backups(folder)
+                    if not backups:
+                        print(Fore.YELLOW + f"No hot backups of {name}; they are taken while the server runs." + Style.RESET_ALL)
+                        input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                        continue
+                    print(Fore.MAGENTA + Style.BRIGHT + f"Hot backups of {name}:" + Style.RESET_ALL)
+                    for i, backup in enumerate(backups, start=1):
+                        taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(backup["created"]))
+                        size = sum(entry["size"] for entry in backup["files"].values())
+                        print(Fore.WHITE + f"{i}. {taken}" + Style.RESET_ALL + f" ({len(backup['files'])} files, {format_size(size)})")
+                    while True:
+                        num = input(Style.BRIGHT + "Enter backup number to restore: " + Style.RESET_ALL).strip()
+                        if not num.isdigit():
+                            print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                            continue
+                        num = int(num)
+                        if 1 <= num <= len(backups):
+                            break
+                        else:
+                            print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+                    confirm = input(Fore.YELLOW + Style.BRIGHT + f"Roll {name} back to this backup? (Y/N) " + Style.RESET_ALL).strip().upper()
+                    if confirm == "Y":
+                        manager.restore_hot_backup(folder, backups[num-1]["id"])
+                        print(Fore.GREEN + f"{name} restored to hot backup {backups[num-1]['id']}." + Style.RESET_ALL)
+                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+
+            # ---------- Verify Worlds ----------
+            elif choice == "V":
+                print(Fore.CYAN + "Verifying worlds..." + Style.RESET_ALL)
+                for folder, name in [(manager.active_id, active_name)] + [(f, n) for f, n, _ in worlds]:
+                    report = manager.verify_world(folder)
+                    if report["problems"]:
+                        print(Fore.RED + f"{name}: FAILED" + Style.RESET_ALL)
+                        for problem in report["problems"]:
+                            print(Fore.RED + f"- {problem['path']}: {problem['issue']}" + Style.RESET_ALL)
+                    else:
+                        print(Fore.GREEN + f"{name}: ok" + Style.RESET_ALL + Style.DIM +
+                              f" ({report['files']} files, {report['hashed']} checked)" + Style.RESET_ALL)
+                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
 
-        # ---------- Launch Server ----------
-        elif choice == "L":
-            server_exe = PALSERVER_DIR / "PalServer.exe"
-            if server_exe.exists():
+            # ---------- Launch Server ----------
+            elif choice == "L":
                 print(Fore.CYAN + "Launching PalServer.exe..." + Style.RESET_ALL)
-                subprocess.Popen([str(server_exe)], cwd=PALSERVER_DIR)
+                supervisor = ServerSupervisor(manager, on_event=events.append)
+                supervisor.start()
                 input(Fore.CYAN + "Press Enter to return to menu..." + Style.RESET_ALL)
-            else:
-                print(Fore.RED + "PalServer.exe not found!" + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
-                
-        # ---------- Paste Settings/Mods ----------
-        elif choice == "P":
-            available_worlds = [(f, (SAVE_DIR / f / "name.txt").read_text().strip() 
-                                 if (SAVE_DIR / f / "name.txt").exists() else f)
-                                for f in os.listdir(SAVE_DIR)
-                                if (SAVE_DIR / f).is_dir() and f != ACTIVE_ID and not f.startswith("__trash__")]
-            if not available_worlds:
-                print(Fore.YELLOW + "No other worlds available to copy from!" + Style.RESET_ALL)
+
+            # ---------- Stop Server ----------
+            elif choice == "K":
+                if not manager.server_pids():
+                    print(Fore.YELLOW + "PalServer isn't running." + Style.RESET_ALL)
+                else:
+                    confirm = input(Fore.YELLOW + Style.BRIGHT + "Stop PalServer? Unsaved progress is lost. (Y/N) " + Style.RESET_ALL).strip().upper()
+                    if confirm == "Y":
+                        if manager.stop_server():
+                            print(Fore.GREEN + "PalServer stopped." + Style.RESET_ALL)
+                        else:
+                            print(Fore.RED + "PalServer didn't exit in time." + Style.RESET_ALL)
                 input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
-                continue
-            
-            print(Fore.MAGENTA + Style.BRIGHT + "Available worlds to copy from:" + Style.RESET_ALL)
-            for i, (_, name) in enumerate(available_worlds, start=1):
-                print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL)
 
-            while True:
-                num = input(Style.BRIGHT + "Enter world number to copy from: " + Style.RESET_ALL).strip()
-                if not num.isdigit():
-                    print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+            # ---------- Paste Settings/Mods ----------
+            elif choice == "P":
+                available_worlds = [(f, n) for f, n, _ in worlds]
+                if not available_worlds:
+                    print(Fore.YELLOW + "No other worlds available to copy from!" + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
                     continue
-                num = int(num)
-                if 1 <= num <= len(available_worlds):
-                    break
-                else:
-                    print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
 
-            selected_world_id, selected_world_name = available_worlds[num-1]
+                print(Fore.MAGENTA + Style.BRIGHT + "Available worlds to copy from:" + Style.RESET_ALL)
+                for i, (_, name) in enumerate(available_worlds, start=1):
+                    print(Fore.WHITE + f"{i}. {name}" + Style.RESET_ALL)
 
-            # Ask what to copy
-            while True:
-                print(Style.BRIGHT + "[1] Settings only" + Style.RESET_ALL)
-                print(Style.BRIGHT + "[2] Mods only" + Style.RESET_ALL)
-                print(Style.BRIGHT + "[3] Both Settings and Mods" + Style.RESET_ALL)
-                choice_copy = input(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL).strip()
-                if choice_copy in ["1","2","3"]:
-                    break
-                else:
-                    print(Fore.YELLOW + "Invalid choice!" + Style.RESET_ALL)
-
-            do_settings = choice_copy in ["1","3"]
-            do_mods = choice_copy in ["2","3"]
-
-            # Red warning
-            print(Fore.RED + Style.BRIGHT + "\nWARNING: This will overwrite the active world's " +
-                  ("settings " if do_settings else "") +
-                  ("mods " if do_mods else "") +
-                  "with the selected world. You may lose your current options!\n" + Style.RESET_ALL)
-            confirm = input(Fore.RED + Style.BRIGHT + "Proceed? (Y/N): " + Style.RESET_ALL).strip().upper()
-            if confirm != "Y":
-                print(Fore.YELLOW + "Operation cancelled." + Style.RESET_ALL)
-                input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
-                continue
-            
-            # Perform copy
-            copy_from_world_to_active(selected_world_id, copy_settings=do_settings, copy_mods=do_mods)
-            print(Fore.GREEN + f"Copied from {selected_world_name} to active world." + Style.RESET_ALL)
+                while True:
+                    num = input(Style.BRIGHT + "Enter world number to copy from: " + Style.RESET_ALL).strip()
+                    if not num.isdigit():
+                        print(Fore.YELLOW + "Invalid input! Please enter a number." + Style.RESET_ALL)
+                        continue
+                    num = int(num)
+                    if 1 <= num <= len(available_worlds):
+                        break
+                    else:
+                        print(Fore.YELLOW + "Number out of range!" + Style.RESET_ALL)
+
+                selected_world_id, selected_world_name = available_worlds[num-1]
+
+                # Ask what to copy
+                while True:
+                    print(Style.BRIGHT + "[1] Settings only" + Style.RESET_ALL)
+                    print(Style.BRIGHT + "[2] Mods only" + Style.RESET_ALL)
+                    print(Style.BRIGHT + "[3] Both Settings and Mods" + Style.RESET_ALL)
+                    choice_copy = input(Style.BRIGHT + "Enter choice: " + Style.RESET_ALL).strip()
+                    if choice_copy in ["1","2","3"]:
+                        break
+                    else:
+                        print(Fore.YELLOW + "Invalid choice!" + Style.RESET_ALL)
+
+                do_settings = choice_copy in ["1","3"]
+                do_mods = choice_copy in ["2","3"]
+
+                # Red warning
+                print(Fore.RED + Style.BRIGHT + "\nWARNING: This will overwrite the active world's " +
+                      ("settings " if do_settings else "") +
+                      ("mods " if do_mods else "") +
+                      "with the selected world. You may lose your current options!\n" + Style.RESET_ALL)
+                confirm = input(Fore.RED + Style.BRIGHT + "Proceed? (Y/N): " + Style.RESET_ALL).strip().upper()
+                if confirm != "Y":
+                    print(Fore.YELLOW + "Operation cancelled." + Style.RESET_ALL)
+                    input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+                    continue
+
+                # Perform copy
+                uid = index[selected_world_id]["uid"]
+                queue_job(f"Copy from {selected_world_name}",
+                          world_job(selected_world_id, uid, lambda source, settings=do_settings, mods=do_mods:
+                                    manager.copy_from_world_to_active(source, copy_settings=settings, copy_mods=mods)),
+                          lambda copied, name=selected_world_name: f"Copied from {name} to active world.")
+
+            # ---------- Jobs ----------
+            elif choice == "J":
+                while True:
+                    os.system('cls')
+                    print(Fore.MAGENTA + Style.BRIGHT + "Jobs:" + Style.RESET_ALL)
+                    for job in jobs.jobs:
+                        color = {"running": Fore.CYAN, "done": Fore.GREEN, "queued": Fore.WHITE}.get(job.state, Fore.RED)
+                        print(color + format_job(job) + Style.RESET_ALL)
+                    if not jobs.jobs:
+                        print(Fore.YELLOW + "No jobs yet." + Style.RESET_ALL)
+                    print()
+                    print(Style.BRIGHT + "[C]" + Style.RESET_ALL + " Cancel the running job")
+                    print(Style.BRIGHT + "[A]" + Style.RESET_ALL + " Cancel all jobs")
+                    prompt = Style.BRIGHT + "Enter choice (Enter to go back): " + Style.RESET_ALL
+                    action = read_choice(prompt, 1.0) if jobs.busy else input(prompt)
+                    if action is None:
+                        continue
+                    action = action.strip().upper()
+                    if action == "C":
+                        for job in jobs.active()[:1]:
+                            jobs.cancel(job)
+                    elif action == "A":
+                        jobs.cancel_all()
+                    else:
+                        break
+
+        except OSError as e:
+            # A world folder picked from the list was moved by a job in the meantime
+            print(Fore.RED + str(e) + Style.RESET_ALL)
             input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
 
+        except SaveManagerError as e:
+            print(Fore.RED + str(e) + Style.RESET_ALL)
+            input(Fore.CYAN + "Press Enter to continue..." + Style.RESET_ALL)
+
+        except KeyboardInterrupt:
+            # When Ctrl+C is pressed, return to menu, first finishing or undoing a switch it cut short.
+            # Jobs keep running; they are cancelled from [J].
+            print(Fore.CYAN + "\nReturning to menu..." + Style.RESET_ALL)
+            if manager.journal.load() is not None and not jobs.busy:
+                print(Fore.CYAN + "Cleaning up the interrupted operation..." + Style.RESET_ALL)
+                try:
+                    print(Fore.GREEN + (manager.recover() or "Already cleaned up.") + Style.RESET_ALL)
+                except (SaveManagerError, KeyboardInterrupt) as e:
+                    print(Fore.RED + (str(e) or "Interrupted again; it is cleaned up the next time the tool starts.") + Style.RESET_ALL)
+            time.sleep(1)
+            continue
+
+# ---------- Command Line ----------
+def _world_summary(manager, folder, info):
+    return {"folder": folder, "name": info["name"], "active": folder == manager.active_id,
+            "size": info["size"], "mods": info["mods"], "last_played": info["last_played"],
+            "stats": manager.world_stats(folder, cached_only=True)}
+
+def cmd_list(manager, args):
+    if args.trash:
+        deleted = [{"entry": entry, "name": name} for entry, name in manager.list_deleted()]
+        return deleted, "\n".join(f"{d['name']} ({d['entry']})" for d in deleted) or "Trash is empty."
+    index = manager.index.refresh(manager.active_id)
+    worlds = [_world_summary(manager, folder, index[folder]) for folder in sorted(index)]
+    lines = [f"{'*' if w['active'] else ' '} {w['folder']}: {w['name']} ({format_size(w['size'])}, {len(w['mods'])} mods)"
+             for w in worlds]
+    return worlds, "\n".join(lines) or "No worlds found."
+
+def cmd_inspect(manager, args):
+    folders = [manager.find_world(args.world, include_active=True)] if args.world else sorted(manager.index.refresh(manager.active_id))
+    result = {folder: manager.world_stats(folder) for folder in folders}
+    if not args.world:
+        manager.inspector.prune()
+    lines = []
+    for folder, stats in result.items():
+        if not stats:
+            lines.append(f"{folder}: no Level.sav")
+        elif "error" in stats:
+            lines.append(f"{folder}: {stats['error']}")
+        else:
+            lines.append(f"{folder}: {manager.world_name(folder)} (save version {stats['save_game_version']}, "
+                         f"{stats['player_saves']} player saves{format_world_stats(stats)})")
+    return result, "\n".join(lines)
+
+def cmd_players(manager, args):
+    if args.uid:
+        players = manager.find_player(args.uid)
+        if not players:
+            raise SaveManagerError(f"No player save matches {args.uid!r}")
+    else:
+        players = manager.player_index()
+    lines = []
+    for uid, sightings in sorted(players.items(), key=lambda p: p[1][0]["last_played"], reverse=True):
+        if args.uid:
+            lines.append(uid)
+            for s in sightings:
+                played = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["last_played"]))
+                where = " (deleted)" if s["trash"] else " (active)" if s["active"] else ""
+                lines.append(f"  {s['name']}{where} [{s['world']}]: last played {played}, {format_size(s['size'])}")
+        else:
+            played = time.strftime("%Y-%m-%d %H:%M", time.localtime(sightings[0]["last_played"]))
+            lines.append(f"{uid}: {len(sightings)} worlds, last played {played} in {sightings[0]['name']}")
+    return players, "\n".join(lines) or "No player saves found."
+
+def cmd_verify(manager, args):
+    folders = [manager.find_world(args.world, include_active=True)] if args.world else sorted(manager.index.refresh(manager.active_id))
+    result = {folder: manager.verify_world(folder, args.full) for folder in folders}
+    lines = []
+    for folder, report in result.items():
+        status = "FAILED" if report["problems"] else "ok"
+        lines.append(f"{folder}: {status} ({report['files']} files, {report['hashed']} hashed, "
+                     f"{format_size(report['bytes_hashed'])} read)")
+        lines.extend(f"  {p['path']}: {p['issue']}" for p in report["problems"])
+    if any(report["problems"] for report in result.values()):
+        args.exit_code = 1
+    return result, "\n".join(lines)
+
+def cmd_switch(manager, args):
+    folder = manager.find_world(args.world)
+    name = manager.world_name(folder)
+    archived_as = manager.switch_world(folder, verify=False if args.no_verify else None)
+    return {"activated": name, "archived_as": archived_as}, f"Activated world: {name}"
+
+def cmd_new(manager, args):
+    archived_as = manager.new_world(args.name)
+    return {"created": args.name, "archived_as": archived_as}, f"New world created: {args.name}"
+
+def cmd_delete(manager, args):
+    folder = manager.find_world(args.world)
+    entry = manager.delete_world(folder)
+    return {"deleted": folder, "entry": entry}, f"{folder} moved to trash."
+
+def cmd_restore(manager, args):
+    entry, _ = manager.find_deleted(args.entry)
+    folder = manager.undo_delete(entry)
+    return {"restored": folder, "entry": entry}, f"Restored world: {folder}"
+
+def cmd_copy(manager, args):
+    folder = manager.find_world(args.world)
+    copied = manager.copy_from_world_to_active(folder, copy_settings=args.what in ("settings", "both"),
+                                               copy_mods=args.what in ("mods", "both"))
+    return {"source": folder, "copied": copied}, f"Copied from {manager.world_name(folder)} to active world."
+
+def cmd_launch(manager, args):
+    proc = manager.launch_server()
+    return {"pid": proc.pid}, f"Launched PalServer.exe (pid {proc.pid})"
+
+def cmd_server(manager, args):
+    if args.action == "run":
+        if args.interval:
+            manager.telemetry_interval = args.interval
+        supervisor = ServerSupervisor(manager, on_event=lambda message: print(message, file=sys.stderr))
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            print("Stopped supervising; PalServer keeps running.", file=sys.stderr)
+        result = {"restarts": supervisor.restarts, "samples": len(supervisor.samples),
+                  "telemetry": str(supervisor.log_file)}
+        return result, f"Telemetry written to {supervisor.log_file}"
+    if args.action == "stop":
+        if not manager.server_pids():
+            return {"stopped": False}, "PalServer isn't running."
+        if not manager.stop_server():
+            raise SaveManagerError("PalServer didn't exit in time")
+        return {"stopped": True}, "PalServer stopped."
+    pids = sorted(manager.server_pids())
+    sample = manager.latest_telemetry() if pids else None
+    text = f"PalServer is running (pids {', '.join(map(str, pids))})" if pids else "PalServer is stopped."
+    if sample:
+        text += "\n" + ", ".join(f"{k}={v}" for k, v in sample.items())
+    return {"running": bool(pids), "pids": pids, "latest_sample": sample}, text
+
+def cmd_backup(manager, args):
+    if args.action == "watch":
+        manager.require_active()
+        scheduler = HotBackupScheduler(manager, on_event=lambda message: print(message, file=sys.stderr))
+        print(f"Watching {manager.world_name(manager.active_id)} for autosaves; Ctrl+C to stop.", file=sys.stderr)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+        return {"backups": scheduler.backups}, f"Took {scheduler.backups} hot backups."
+    if args.world:
+        folder = manager.find_world(args.world, include_active=True)
+    else:
+        manager.require_active()
+        folder = manager.active_id
+    if args.action == "create":
+        manifest = manager.create_hot_backup(folder)
+        if not manifest:
+            return {"id": None}, "Nothing changed since the last hot backup."
+        return manifest, (f"Hot backup {manifest['id']}: {len(manifest['files'])} saves ({manifest['cloned']} cloned, "
+                          f"{manifest['copied']} copied, {manifest['linked']} unchanged).")
+    if args.action == "restore":
+        manager.restore_hot_backup(folder, args.id)
+        return {"restored": folder, "id": args.id}, f"{folder} restored to hot backup {args.id}."
+    backups = [{"id": b["id"], "created": b["created"], "files": len(b["files"]),
+                "size": sum(e["size"] for e in b["files"].values())} for b in manager.list_hot_backups(folder)]
+    lines = [f"{b['id']} ({b['files']} files, {format_size(b['size'])})" for b in backups]
+    return backups, "\n".join(lines) or "No hot backups."
+
+def cmd_maintain(manager, args):
+    result = manager.maintain(verify=not args.no_verify)
+    lines = [f"{result['snapshots']} new snapshots ({format_size(result['snapshot_bytes'])}), "
+             f"{result['snapshots_pruned']} pruned ({format_size(result['snapshot_bytes_freed'])} freed), "
+             f"{len(result['evicted'])} deleted worlds purged"]
+    for folder, problems in result["problems"].items():
+        lines.append(f"{folder}: FAILED verification")
+        lines.extend(f"  {p['path']}: {p['issue']}" for p in problems)
+    if result["problems"]:
+        args.exit_code = 1
+    return result, "\n".join(lines)
+
+def cmd_timings(manager, args):
+    summary = manager.timing.summary(args.op)
+    lines = [f"{key}: {s['count']}x, mean {s['mean_s']:.3f}s, max {s['max_s']:.3f}s, "
+             f"{s['mean_files']:g} files, {format_size(s['mean_bytes'])}" for key, s in summary.items()]
+    return summary, "\n".join(lines) or "No operations logged yet."
+
+def cmd_rename(manager, args):
+    folder = manager.find_world(args.world, include_active=True)
+    manager.rename_world(folder, args.name)
+    return {"folder": folder, "name": args.name}, f"World renamed: {args.name}"
+
+def cmd_clear_trash(manager, args):
+    manager.trash.resume_purges()
+    deleted = manager.clear_trash()
+    return {"purged": deleted}, f"Cleared {len(deleted)} deleted worlds."
+
+def cmd_snapshot(manager, args):
+    if args.action == "create":
+        if args.world:
+            results = {args.world: manager.create_snapshot(manager.find_world(args.world, include_active=True))}
+        else:
+            results = manager.snapshot_all_worlds()
+        result = {folder: {"id": snap_id, "new_bytes": new_bytes} for folder, (snap_id, new_bytes) in results.items()}
+        lines = [f"{folder}: {r['id'] or 'unchanged'} ({format_size(r['new_bytes'])} new)" for folder, r in result.items()]
+        return result, "\n".join(lines)
+    if args.action == "list":
+        folder = manager.find_world(args.world, include_active=True)
+        snaps = [{"id": s["id"], "created": s["created"], "files": len(s["files"]),
+                  "size": sum(e["size"] for e in s["files"].values())} for s in manager.list_snapshots(folder)]
+        lines = [f"{s['id']} ({s['files']} files, {format_size(s['size'])})" for s in snaps]
+        return snaps, "\n".join(lines) or "No snapshots."
+    if args.action == "restore":
+        folder = manager.find_world(args.world, include_active=True)
+        manager.restore_snapshot(folder, args.id)
+        return {"restored": folder, "id": args.id}, f"{folder} restored to snapshot {args.id}."
+    folders = [manager.find_world(args.world, include_active=True)] if args.world else list(manager.index.refresh(manager.active_id))
+    removed = {folder: manager.prune_snapshots(folder, args.keep_last, args.keep_daily) for folder in folders}
+    freed = manager.snapshots.gc()
+    return {"removed": removed, "freed_bytes": freed}, f"Removed {sum(removed.values())} snapshots, freed {format_size(freed)}."
+
+COMMANDS = {
+    "list": cmd_list,
+    "switch": cmd_switch,
+    "new": cmd_new,
+    "delete": cmd_delete,
+    "restore": cmd_restore,
+    "copy": cmd_copy,
+    "launch": cmd_launch,
+    "rename": cmd_rename,
+    "clear-trash": cmd_clear_trash,
+    "snapshot": cmd_snapshot,
+    "backup": cmd_backup,
+    "maintain": cmd_maintain,
+    "server": cmd_server,
+    "timings": cmd_timings,
+    "inspect": cmd_inspect,
+    "players": cmd_players,
+    "verify": cmd_verify,
+}
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="PalworldSaveManager",
+                                     description="Manage Palworld dedicated server worlds. "
+                                                 "Run without a command for the interactive menu.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="config file (default: %(default)s)")
+    parser.add_argument("--palserver-dir", help="PalServer folder, overriding the config file")
+    parser.add_argument("--active", help="active world folder, if GameUserSettings.ini doesn't name it")
+    parser.add_argument("--instance", action="append", metavar="NAME",
+                        help="instance (config section) to work on; repeat it or pass 'all' to run on several at once")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="profile the run with cProfile; the report goes to stderr, the raw stats to FILE")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="print the result as JSON")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+
+    p = sub.add_parser("list", parents=[common], help="list worlds (or deleted worlds)")
+    p.add_argument("--trash", action="store_true", help="list deleted worlds instead")
+    p = sub.add_parser("switch", parents=[common], help="activate a world")
+    p.add_argument("world", help="folder or name of the world")
+    p.add_argument("--no-verify", action="store_true", help="activate even if the world fails verification")
+    p = sub.add_parser("new", parents=[common], help="archive the active world and start a new one")
+    p.add_argument("name", nargs="?", default="New World")
+    p = sub.add_parser("delete", parents=[common], help="move a world to the trash")
+    p.add_argument("world")
+    p = sub.add_parser("restore", parents=[common], help="undo a delete")
+    p.add_argument("entry", help="trash folder or name of the deleted world")
+    p = sub.add_parser("copy", parents=[common], help="copy settings and/or mods into the active world")
+    p.add_argument("world")
+    p.add_argument("--what", choices=["settings", "mods", "both"], default="both")
+    sub.add_parser("launch", parents=[common], help="start PalServer.exe")
+    p = sub.add_parser("server", parents=[common], help="supervise PalServer: run, status, stop")
+    p.add_argument("action", choices=["run", "status", "stop"],
+                   help="run: launch, restart on crash and record telemetry until Ctrl+C")
+    p.add_argument("--interval", type=float, help="seconds between telemetry samples")
+    p = sub.add_parser("inspect", parents=[common], help="read player, guild and day stats from world saves")
+    p.add_argument("world", nargs="?", help="world (default: every world)")
+    p = sub.add_parser("verify", parents=[common], help="check world saves and mods against their hash manifests")
+    p.add_argument("world", nargs="?", help="world (default: every world)")
+    p.add_argument("--full", action="store_true", help="re-read every file, not just the ones that changed")
+    p = sub.add_parser("players", parents=[common], help="which worlds (and deleted worlds) each player has a save in")
+    p.add_argument("uid", nargs="?", help="player uid or the start of one")
+    p = sub.add_parser("timings", parents=[common], help="per-phase timings of past operations")
+    p.add_argument("--op", help="only this operation (e.g. switch_world)")
+    p = sub.add_parser("rename", parents=[common], help="change a world's display name")
+    p.add_argument("world")
+    p.add_argument("name")
+    sub.add_parser("clear-trash", parents=[common], help="permanently delete all deleted worlds")
+    p = sub.add_parser("snapshot", parents=[common], help="save history: create, list, restore, prune")
+    p.add_argument("action", choices=["create", "list", "restore", "prune"])
+    p.add_argument("world", nargs="?", help="world (default for create/prune: every world)")
+    p.add_argument("id", nargs="?", help="snapshot id to restore")
+    p.add_argument("--keep-last", type=int, default=24)
+    p.add_argument("--keep-daily", type=int, default=30)
+    p = sub.add_parser("backup", parents=[common], help="hot backups of world saves: list, create, restore, watch")
+    p.add_argument("action", choices=["list", "create", "restore", "watch"],
+                   help="watch: back up the active world after each autosave until Ctrl+C")
+    p.add_argument("world", nargs="?", help="world (default: the active one)")
+    p.add_argument("id", nargs="?", help="backup id to restore")
+    p = sub.add_parser("maintain", parents=[common],
+                       help="nightly upkeep: trash retention, snapshots of every world and pruning, verification")
+    p.add_argument("--no-verify", action="store_true", help="skip verifying worlds")
+    return parser
+
+def run_profiled(func, output=None):
+    """Run func under cProfile, print the top of the report to stderr and optionally save the stats."""
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        if output:
+            profiler.dump_stats(output)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(30)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile is not None:
+        profile_output, args.profile = args.profile, None
+        return run_profiled(lambda: main_args(parser, args), profile_output)
+    return main_args(parser, args)
+
+def run_command(manager, args):
+    """Finish or undo an operation an earlier run left half done, then run the command."""
+    try:
+        recovered = manager.recover()
+    except SaveManagerError as e:
+        # E.g. PalServer is running; the command itself may still work
+        recovered = str(e)
+    if recovered:
+        print(f"{manager.name}: {recovered}" if args.instance else recovered, file=sys.stderr)
+    return COMMANDS[args.command](manager, args)
+
+def run_on_instances(args, names):
+    """Run a command on several instances at once (see InstancePool) and print every result."""
+    try:
+        managers = load_managers(args.config, names)
+    except SaveManagerError as e:
+        if args.json:
+            print(json.dumps({"error": str(e)}))
+        else:
+            print(f"error: {e}", file=sys.stderr)
+        return 1
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    results = InstancePool(managers, config['DEFAULT'].getint('disk_concurrency', fallback=1)).run(lambda manager: run_command(manager, args))
+    failed = any(error for _, error in results.values())
+    if args.json:
+        print(json.dumps({name: {"error": error} if error else output[0]
+                          for name, (output, error) in results.items()}, indent=2))
+    else:
+        for name, (output, error) in results.items():
+            print(f"[{name}]")
+            print(f"error: {error}" if error else output[1])
+    return 1 if failed else getattr(args, "exit_code", 0)
+
+def main_args(parser, args):
+    names = args.instance or []
+    if "all" in names:
+        names = list(load_instances(args.config))
+    if len(names) > 1 and (args.palserver_dir or args.active):
+        parser.error("--palserver-dir and --active only work with a single instance")
+    if args.command is None:
+        if len(names) > 1:
+            parser.error("the interactive menu manages one instance at a time")
+        run_menu(load_interactive_manager(args.config, args.palserver_dir, args.active, names[0] if names else None))
+        return 0
+    if len(names) > 1 and (args.command, getattr(args, "action", None)) in (("server", "run"), ("backup", "watch")):
+        parser.error(f"{args.command} {args.action} runs in the foreground; start one per instance")
+    if args.command == "snapshot" and args.action in ("list", "restore") and not args.world:
+        parser.error(f"snapshot {args.action} needs a world")
+    if args.command == "snapshot" and args.action == "restore" and not args.id:
+        parser.error("snapshot restore needs a snapshot id")
+    if args.command == "backup" and args.action == "restore" and not args.id:
+        parser.error("backup restore needs a world and a backup id")
+
+    if len(names) > 1:
+        return run_on_instances(args, names)
+    try:
+        manager = SaveManager.from_config(args.config, args.palserver_dir, args.active, names[0] if names else None)
+        result, text = run_command(manager, args)
+    except (SaveManagerError, OSError) as e:
+        if args.json:
+            print(json.dumps({"error": str(e)}))
+        else:
+            print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2) if args.json else text)
+    return getattr(args, "exit_code", 0)
 
 
-    except KeyboardInterrupt:
-        # When Ctrl+C is pressed, just return to menu
-        print(Fore.CYAN + "\nReturning to menu..." + Style.RESET_ALL)
-        time.sleep(1)
-        continue
+if __name__ == "__main__":
+    # Save inspection uses a process pool, which needs this in a PyInstaller build
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Benchmark world operations against a synthetic PalServer tree.
+
+Builds a fake PalServer folder (worlds with Level.sav and player saves,
+~mods/LogicMods paks and a ue4ss tree) in a temp directory, times the
+SaveManager operations on it and prints the results as JSON:
+
+    python benchmark.py --worlds 6 --paks 20 --pak-mb 8 --iterations 5
+
+Everything runs on the local disk with a warm page cache, so compare numbers
+from the same machine only.
+"""
+import os
+import sys
+import json
+import time
+import math
+import random
+import struct
+import shutil
+import argparse
+import tempfile
+import configparser
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PalworldSaveManager import SaveManager, iter_chunks  # noqa: E402
+
+ACTIVE_ID = "0123456789ABCDEF0123456789ABCDEF"
+
+
+# ---------- Synthetic Tree ----------
+def write_random(path, size, rng):
+    """Write size bytes of incompressible data, like a real pak or save."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, 1024 * 1024)
+            f.write(rng.randbytes(n))
+            remaining -= n
+
+def write_save(path, size, rng):
+    """A .sav with a valid PlZ header around random data, so verification accepts it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(struct.pack("<ii", size, size) + b"PlZ\x31")
+    with open(path, 'ab') as f:
+        f.write(rng.randbytes(size))
+
+def write_pak(path, size, rng):
+    """Random data ending in a pak footer magic."""
+    write_random(path, size - 4, rng)
+    with open(path, 'ab') as f:
+        f.write((0x5A6F12E1).to_bytes(4, "little"))
+
+def build_world(world_dir, name, opts, rng, shared_paks):
+    world_dir.mkdir(parents=True)
+    (world_dir / "name.txt").write_text(name)
+    (world_dir / "PalWorldSettings.ini").write_text("[/Script/Pal.PalGameWorldSettings]\nOptionSettings=()\n")
+    write_save(world_dir / "Level.sav", int(opts.save_mb * 1024 * 1024), rng)
+    write_save(world_dir / "LevelMeta.sav", 4096, rng)
+    for p in range(opts.players):
+        write_save(world_dir / "Players" / f"{p:032X}.sav", int(opts.player_kb * 1024), rng)
+
+    # Part of the mod list is the same mod files in every world, the rest is unique to this one
+    mods = world_dir / "Mods"
+    for i in range(opts.paks):
+        folder = "~mods" if i % 4 else "LogicMods"
+        dst = mods / folder / f"mod{i:03d}" / f"mod{i:03d}_P.pak"
+        if i < len(shared_paks):
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(shared_paks[i], dst)
+        else:
+            write_pak(dst, int(opts.pak_mb * 1024 * 1024), rng)
+    if opts.ue4ss_files:
+        ue4ss = mods / "ue4ss"
+        for i in range(opts.ue4ss_files):
+            write_random(ue4ss / "Mods" / f"LuaMod{i % 25:02d}" / "Scripts" / f"script{i:04d}.lua",
+                         int(opts.ue4ss_kb * 1024), rng)
+        (ue4ss / "UE4SS-settings.ini").write_text("[General]\nEnableHotReloadSystem = 0\n")
+        write_random(mods / "dwmapi.dll", 256 * 1024, rng)
+
+def build_tree(root, opts):
+    """Create a PalServer folder under root with opts.worlds worlds; the first one is active."""
+    rng = random.Random(opts.seed)
+    pal = root / "Pal"
+    save_dir = pal / "Saved" / "SaveGames" / "0"
+    config_dir = pal / "Saved" / "Config" / "WindowsServer"
+    config_dir.mkdir(parents=True)
+    (config_dir / "GameUserSettings.ini").write_text(
+        f"[/Script/Pal.PalGameLocalSettings]\nDedicatedServerName={ACTIVE_ID}\n")
+    (config_dir / "PalWorldSettings.ini").write_text("")
+    (root / "DefaultPalWorldSettings.ini").write_text("[/Script/Pal.PalGameWorldSettings]\n")
+    (pal / "Content" / "Paks").mkdir(parents=True)
+    (pal / "Binaries" / "Win64").mkdir(parents=True)
+
+    shared = root / "_shared"
+    shared_paks = []
+    for i in range(int(opts.paks * opts.shared)):
+        shared_paks.append(shared / f"{i}.pak")
+        write_pak(shared_paks[-1], int(opts.pak_mb * 1024 * 1024), rng)
+
+    for w in range(opts.worlds):
+        folder = ACTIVE_ID if w == 0 else f"world{w}"
+        build_world(save_dir / folder, f"World {w}", opts, rng, shared_paks)
+    shutil.rmtree(shared)
+
+def tree_size(path):
+    files = size = 0
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+def chunk_file(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in iter_chunks(f))
+
+def clear_live(manager):
+    for path in [manager.paks_dir / "~mods", manager.paks_dir / "LogicMods",
+                 manager.bin_dir / "ue4ss", manager.bin_dir / "dwmapi.dll"]:
+        if os.path.islink(path) or path.is_file():
+            os.unlink(path)
+        elif path.is_dir():
+            shutil.rmtree(path)
+
+
+# ---------- Timing ----------
+def percentile(values, p):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarize(times, payloads):
+    """Latency percentiles plus throughput over the data the runs actually copied, hashed or read.
+
+    Operations that only rename or delete (bytes None) get no MB/s.
+    """
+    total = sum(times)
+    files = sum(f for f, _ in payloads)
+    size = None if any(b is None for _, b in payloads) else sum(b for _, b in payloads)
+    return {
+        "runs": len(times),
+        "p50_s": round(percentile(times, 50), 6),
+        "p95_s": round(percentile(times, 95), 6),
+        "mean_s": round(total / len(times), 6),
+        "files": round(files / len(payloads), 1),
+        "bytes": None if size is None else round(size / len(payloads)),
+        "mb_per_s": round(size / 1024 / 1024 / total, 1) if size and total else None,
+        "files_per_s": round(files / total, 1) if total else None,
+    }
+
+def logged(manager, op):
+    """Payload function: the files and bytes the last `op` copied, from the manager's operation log."""
+    def payload(result):
+        for line in reversed(manager.timing.log_file.read_text().splitlines()):
+            record = json.loads(line)
+            if record["op"] == op:
+                return record["files"], record["bytes"]
+        raise RuntimeError(f"{op} wasn't logged; is operation_log off?")
+    return payload
+
+class Timer:
+    def __init__(self):
+        self.times = {}
+        self.payloads = {}
+
+    def run(self, op, func, payload, setup=None):
+        """Time one call of func. setup runs first and isn't timed.
+
+        payload is the (files, bytes) the call handled, or a function of its
+        result returning them.
+        """
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        self.times.setdefault(op, []).append(time.perf_counter() - start)
+        self.payloads.setdefault(op, []).append(payload(result) if callable(payload) else payload)
+        return result
+
+    def report(self):
+        return {op: summarize(times, self.payloads[op]) for op, times in self.times.items()}
+
+
+# ---------- Benchmark ----------
+def run_benchmark(root, opts):
+    settings = configparser.ConfigParser()['DEFAULT']
+    settings['activation'] = opts.activation
+    if opts.copy_workers:
+        settings['copy_workers'] = str(opts.copy_workers)
+    manager = SaveManager(root, settings=settings)
+    manager.trash_dir.mkdir(exist_ok=True)
+    # Put the active world's mods live, as after a normal switch
+    manager.restore_world(manager.active_id)
+
+    timer = Timer()
+    world_all = tree_size(manager.save_dir / manager.active_id)
+    # Listing, deleting and restoring from the trash only stat, rename or unlink: no MB/s for them
+    worlds = (opts.worlds, None)
+    renamed = (1, None)
+    hashed = lambda report: (report["hashed"], report["bytes_hashed"])
+    active_dir = manager.save_dir / manager.active_id
+    saves = [active_dir / "Level.sav"] + list((active_dir / "Players").glob("*.sav"))
+    world_saves = (len(saves), sum(p.stat().st_size for p in saves))
+
+    for _ in range(opts.iterations):
+        timer.run("list_worlds_cold", manager.list_worlds, worlds,
+                  setup=lambda: (manager.index.path.unlink(missing_ok=True), setattr(manager.index, "_index", None)))
+        timer.run("list_worlds_warm", manager.list_worlds, worlds)
+
+        timer.run("backup_current_world", lambda: manager.backup_current_world(manager.active_id, clear_live=False),
+                  logged(manager, "backup_current_world"))
+        timer.run("restore_world_noop", lambda: manager.restore_world(manager.active_id),
+                  logged(manager, "restore_world"))
+        timer.run("restore_world_cold", lambda: manager.restore_world(manager.active_id),
+                  logged(manager, "restore_world"), setup=lambda: clear_live(manager))
+
+        other = manager.list_worlds()[0][0]
+        timer.run("copy_from_world_to_active", lambda: manager.copy_from_world_to_active(other),
+                  logged(manager, "copy_from_world_to_active"))
+
+        # Switch away and back, so the active world keeps its own mods across iterations. The target
+        # isn't the world just copied from, whose mods are already live.
+        target = manager.list_worlds()[-1][0]
+        archived = timer.run("switch_world", lambda: manager.switch_world(target), logged(manager, "switch_world"))
+        timer.run("switch_world", lambda: manager.switch_world(archived), logged(manager, "switch_world"))
+
+        timer.run("verify_world_full", lambda: manager.verify_world(manager.active_id, full=True), hashed)
+        timer.run("verify_world_delta", lambda: manager.verify_world(manager.active_id), hashed)
+
+        # Snapshot after an autosave: the compressed saves are read in fixed-size chunks, all already stored
+        timer.run("snapshot_create", lambda: manager.create_snapshot(manager.active_id), world_saves,
+                  setup=lambda: [os.utime(p) for p in saves])
+        # Content-defined chunking alone, as used for uncompressed files (MB/s is the chunker's throughput)
+        timer.run("chunk_content_defined", lambda: chunk_file(saves[0]), (1, saves[0].stat().st_size))
+
+        # An autosave rewrote Level.sav, so it is cloned/copied and the player saves are hardlinked
+        timer.run("hot_backup", lambda: manager.create_hot_backup(manager.active_id),
+                  lambda manifest: (manifest["copied"], manifest["bytes_copied"]),
+                  setup=lambda: os.utime(active_dir / "Level.sav"))
+
+        victim = manager.list_worlds()[-1][0]
+        entry = timer.run("delete_world", lambda: manager.delete_world(victim), renamed)
+        timer.run("undo_delete", lambda: manager.undo_delete(entry), renamed)
+
+        # Purge a copy so the world count stays the same
+        victim = manager.list_worlds()[-1][0]
+        copy_name = victim + "_purge"
+        shutil.copytree(manager.save_dir / victim, manager.save_dir / copy_name)
+        manager.index.refresh()
+        manager.delete_world(copy_name)
+        timer.run("clear_trash", manager.clear_trash, renamed)
+        timer.run("trash_purge_total", manager.trash.wait, (world_all[0], None))
+
+    return timer.report()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark PalworldSaveManager against a synthetic PalServer tree.")
+    parser.add_argument("--worlds", type=int, default=6, help="worlds including the active one (default: %(default)s)")
+    parser.add_argument("--save-mb", type=float, default=16, help="Level.sav size (default: %(default)s)")
+    parser.add_argument("--players", type=int, default=8, help="player saves per world (default: %(default)s)")
+    parser.add_argument("--player-kb", type=float, default=64, help="player save size (default: %(default)s)")
+    parser.add_argument("--paks", type=int, default=20, help="paks per world (default: %(default)s)")
+    parser.add_argument("--pak-mb", type=float, default=4, help="pak size (default: %(default)s)")
+    parser.add_argument("--shared", type=float, default=0.5, help="fraction of paks every world has (default: %(default)s)")
+    parser.add_argument("--ue4ss-files", type=int, default=200, help="files in each world's ue4ss tree, 0 for none (default: %(default)s)")
+    parser.add_argument("--ue4ss-kb", type=float, default=8, help="ue4ss file size (default: %(default)s)")
+    parser.add_argument("--activation", choices=["copy", "link"], default="copy")
+    parser.add_argument("--copy-workers", type=int, help="copy threads (default: the tool's default)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dir", help="build the tree here instead of a new temp directory")
+    parser.add_argument("--keep", action="store_true", help="don't delete the tree afterwards")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser
+
+def main(argv=None):
+    opts = build_parser().parse_args(argv)
+    base = Path(opts.dir or tempfile.mkdtemp(prefix="pwsm-bench-"))
+    root = base / "PalServer"
+    try:
+        start = time.perf_counter()
+        build_tree(root, opts)
+        build_time = time.perf_counter() - start
+        files, size = tree_size(root)
+        results = run_benchmark(root, opts)
+        report = {
+            "config": {k: v for k, v in vars(opts).items() if k not in ("dir", "keep", "output")},
+            "tree": {"files": files, "bytes": size, "build_s": round(build_time, 3)},
+            "platform": sys.platform,
+            "python": sys.version.split()[0],
+            "results": results,
+        }
+    finally:
+        if not opts.keep:
+            shutil.rmtree(root, ignore_errors=True)
+            if not opts.dir:
+                shutil.rmtree(base, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if opts.output:
+        Path(opts.output).write_text(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PalworldSaveManager as pwsm  # noqa: E402
+
+ACTIVE_ID = "0123456789ABCDEF"
+# Just enough of a save and of paks for check_file
+LEVEL_SAV = struct.pack("<ii", 5, 5) + b"PlM1" + b"level"
+LIVE_MODS = {"Pal/Content/Paks/~mods/a.pak": b"V1" * 50 + pwsm.PAK_MAGIC,
+             "Pal/Content/Paks/LogicMods/c.pak": b"c" * 300 + pwsm.PAK_MAGIC,
+             "Pal/Binaries/Win64/ue4ss/UE4SS.dll": b"u" * 50, "Pal/Binaries/Win64/dwmapi.dll": b"d" * 10}
+
+
+@pytest.fixture
+def install(tmp_path):
+    """A PalServer folder with an active world "Main" and a few live mods."""
+    root = tmp_path / "server"
+    world = root / "Pal" / "Saved" / "SaveGames" / "0" / ACTIVE_ID
+    world.mkdir(parents=True)
+    (world / "Level.sav").write_bytes(LEVEL_SAV)
+    (world / "name.txt").write_text("Main")
+    (root / "Pal" / "Saved" / "Config" / "WindowsServer").mkdir(parents=True)
+    for rel, data in LIVE_MODS.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(data)
+    return root
+
+
+@pytest.fixture
+def manager(install):
+    return pwsm.SaveManager(install, active_id=ACTIVE_ID)
@@ -0,0 +1,25 @@
+import PalworldSaveManager as pwsm
+
+
+class FakeManager:
+    def __init__(self, tmp_path, name):
+        self.name = name
+        self.palserver_dir = tmp_path / name
+        self.palserver_dir.mkdir()
+
+
+def test_one_instance_failing_does_not_stop_the_others(tmp_path):
+    managers = [FakeManager(tmp_path, name) for name in ["a", "b", "c", "d"]]
+
+    def op(manager):
+        if manager.name == "a":
+            raise KeyError("boom")
+        if manager.name == "b":
+            raise pwsm.SaveManagerError("busy")
+        if manager.name == "c":
+            raise ValueError("bad value")
+        return manager.name.upper()
+
+    results = pwsm.InstancePool(managers).run(op)
+    assert results == {"a": (None, "KeyError: 'boom'"), "b": (None, "busy"),
+                       "c": (None, "ValueError: bad value"), "d": ("D", None)}
@@ -0,0 +1,105 @@
+import shutil
+
+import pytest
+
+import PalworldSaveManager as pwsm
+from conftest import ACTIVE_ID, LEVEL_SAV, LIVE_MODS
+
+OTHER_PAK = "Pal/Content/Paks/~mods/o.pak"
+
+
+def add_world(manager, folder, name):
+    world = manager.save_dir / folder
+    world.mkdir()
+    (world / "Level.sav").write_bytes(LEVEL_SAV)
+    (world / "name.txt").write_text(name)
+    (world / "Mods" / "~mods").mkdir(parents=True)
+    (world / "Mods" / "~mods" / "o.pak").write_bytes(b"o" * 80 + pwsm.PAK_MAGIC)
+    # As the menu lists the worlds before one is picked
+    return manager.index.refresh(ACTIVE_ID)[folder]["uid"]
+
+
+def cancel_when(monkeypatch, manager, method):
+    """Cancel the running job as manager.method is called, so it stops before its first copy."""
+    original = getattr(manager, method)
+
+    def cancelling(*args, **kwargs):
+        job = pwsm.current_job()
+        if job is not None:
+            job.cancel()
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(manager, method, cancelling)
+
+
+def run_job(manager, func):
+    jobs = pwsm.JobQueue(manager)
+    job = jobs.submit("Switch", func)
+    jobs.wait()
+    return job
+
+
+def live_mods(install):
+    return {rel: (install / rel).read_bytes() for rel in [*LIVE_MODS, OTHER_PAK] if (install / rel).exists()}
+
+
+def test_switch_cancelled_during_backup_rolls_back(monkeypatch, install, manager):
+    add_world(manager, "world1", "Other")
+    cancel_when(monkeypatch, manager, "backup_current_world")
+    job = run_job(manager, lambda: manager.switch_world("world1", verify=False))
+
+    assert job.state == "cancelled"
+    assert "Rolled back the interrupted switch to Other." in job.message
+    assert manager.journal.load() is None
+    assert manager.world_name(ACTIVE_ID) == "Main"
+    assert manager.world_name("world1") == "Other"
+    assert live_mods(install) == LIVE_MODS
+
+
+def test_switch_cancelled_during_restore_rolls_forward(monkeypatch, install, manager):
+    add_world(manager, "world1", "Other")
+    cancel_when(monkeypatch, manager, "restore_world")
+    job = run_job(manager, lambda: manager.switch_world("world1", verify=False))
+
+    assert job.state == "cancelled"
+    assert "Finished the interrupted switch to Other." in job.message
+    assert manager.journal.load() is None
+    assert manager.world_name(ACTIVE_ID) == "Other"
+    assert manager.world_name("world2") == "Main"
+    assert not (manager.save_dir / "world1").exists()
+    # Main's mods were saved with it
+    assert live_mods(install) == {OTHER_PAK: b"o" * 80 + pwsm.PAK_MAGIC}
+    assert manager.switch_world("world2", verify=False) == "world1"
+    assert live_mods(install) == LIVE_MODS
+
+
+def test_locate_world_follows_queued_switches(manager):
+    main = manager.index.refresh(ACTIVE_ID)[ACTIVE_ID]["uid"]
+    other = add_world(manager, "world1", "Other")
+    third = add_world(manager, "world2", "Third")
+
+    # Jobs queued on these picks: each runs after the ones before it have moved the worlds around
+    manager.switch_world("world1", verify=False)
+    assert manager.locate_world(ACTIVE_ID, main) == "world3"
+    assert manager.locate_world("world1", other) == ACTIVE_ID
+    manager.new_world("New")
+    manager.switch_world("world3", verify=False)
+    # Main left the active folder and came back; Other went through it back into world1
+    assert manager.locate_world(ACTIVE_ID, main) == ACTIVE_ID
+    assert manager.locate_world("world1", other) == "world1"
+    assert manager.locate_world("world2", third) == "world2"
+    assert manager.world_name("world4") == "New"
+
+
+def test_locate_world_refuses_copies_and_hand_renames(manager):
+    uid = add_world(manager, "world1", "Other")
+    shutil.copytree(manager.save_dir / "world1", manager.save_dir / "world1 - Copy")
+
+    assert manager.locate_world("world1", uid) == "world1"
+    # The copy got an id of its own, so a job picked on the copy under the old id isn't sent to the original
+    with pytest.raises(pwsm.SaveManagerError):
+        manager.locate_world("world1 - Copy", uid)
+
+    (manager.save_dir / "world1").rename(manager.save_dir / "renamed")
+    with pytest.raises(pwsm.SaveManagerError):
+        manager.locate_world("world1", uid)
@@ -0,0 +1,87 @@
+import pytest
+
+import PalworldSaveManager as pwsm
+
+MODS = {"Pal/Content/Paks/~mods/a.pak": b"a" * 100, "Pal/Content/Paks/~mods/b.pak": b"b" * 200,
+        "Pal/Content/Paks/LogicMods/c.pak": b"c" * 300, "Pal/Binaries/Win64/ue4ss/UE4SS.dll": b"u" * 50,
+        "Pal/Binaries/Win64/dwmapi.dll": b"d" * 10}
+
+
+def make_install(tmp_path):
+    install = tmp_path / "server"
+    world = install / "Pal" / "Saved" / "SaveGames" / "0" / "0123456789ABCDEF"
+    world.mkdir(parents=True)
+    (world / "Level.sav").write_bytes(b"level")
+    (world / "name.txt").write_text("Main")
+    (install / "Pal" / "Saved" / "Config" / "WindowsServer").mkdir(parents=True)
+    for rel, data in MODS.items():
+        (install / rel).parent.mkdir(parents=True, exist_ok=True)
+        (install / rel).write_bytes(data)
+    return install
+
+
+def assert_mods_live(install):
+    for rel, data in MODS.items():
+        assert (install / rel).read_bytes() == data, rel
+
+
+@pytest.mark.parametrize("cleared", [0, 2])
+def test_new_world_interrupted_after_backup_rolls_back(monkeypatch, tmp_path, cleared):
+    """Cut new_world short once the backup is done, before or part way through clearing the live mods."""
+    install = make_install(tmp_path)
+    manager = pwsm.SaveManager(install, active_id="0123456789ABCDEF")
+
+    def interrupted_clear():
+        for rel in list(MODS)[:cleared]:
+            (install / rel).unlink()
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(manager, "clear_live_mods", interrupted_clear)
+    with pytest.raises(KeyboardInterrupt):
+        manager.new_world("Fresh")
+    assert manager.journal.load()["done"] == ["backup"]
+
+    manager = pwsm.SaveManager(install, active_id="0123456789ABCDEF")
+    assert manager.recover().startswith("Rolled back")
+    assert manager.journal.load() is None
+    assert_mods_live(install)
+    mods = manager.save_dir / "0123456789ABCDEF" / "Mods"
+    assert (mods / "~mods" / "a.pak").read_bytes() == MODS["Pal/Content/Paks/~mods/a.pak"]
+    assert (mods / "~mods" / "b.pak").exists()
+
+
+def test_new_world_clears_live_mods(tmp_path):
+    install = make_install(tmp_path)
+    manager = pwsm.SaveManager(install, active_id="0123456789ABCDEF")
+    archive = manager.new_world("Fresh")
+    assert not any((install / rel).exists() for rel in MODS)
+    assert (manager.save_dir / archive / "Mods" / "LogicMods" / "c.pak").exists()
+    assert manager.world_name("0123456789ABCDEF") == "Fresh"
+
+
+def test_interactive_start_recovers_before_asking_for_the_active_world(monkeypatch, tmp_path):
+    """A switch cut short after archiving the active world must be finished before the active world is asked for."""
+    pytest.importorskip("colorama")
+    install = make_install(tmp_path)
+    save_dir = install / "Pal" / "Saved" / "SaveGames" / "0"
+    other = save_dir / "world7"
+    other.mkdir()
+    (other / "Level.sav").write_bytes(b"other")
+    (other / "name.txt").write_text("Other")
+    manager = pwsm.SaveManager(install, active_id="0123456789ABCDEF")
+
+    def interrupted_activate(entry):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(manager, "_step_activate", interrupted_activate)
+    with pytest.raises(KeyboardInterrupt):
+        manager.switch_world("world7", verify=False)
+    assert not (save_dir / "0123456789ABCDEF").exists()
+
+    config = tmp_path / "config.ini"
+    config.write_text(f"[DEFAULT]\npalserver_dir = {install}\n")
+    asked = []
+    monkeypatch.setattr("builtins.input", lambda prompt="": asked.append(prompt) or "")
+    manager = pwsm.load_interactive_manager(str(config), active_id="0123456789ABCDEF")
+    assert manager.has_active_world()
+    assert (save_dir / "0123456789ABCDEF" / "name.txt").read_text() == "Other"
+    assert not any("active world" in prompt for prompt in asked)
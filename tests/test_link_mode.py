@@ -0,0 +1,39 @@
+import configparser
+
+import PalworldSaveManager as pwsm
+from conftest import ACTIVE_ID, LEVEL_SAV
+
+
+def link_manager(install):
+    settings = configparser.ConfigParser()
+    settings["DEFAULT"]["activation"] = "link"
+    return pwsm.SaveManager(install, active_id=ACTIVE_ID, settings=settings["DEFAULT"])
+
+
+def test_link_mode_leaves_worlds_without_mod_folders_alone(install):
+    manager = link_manager(install)
+    world = manager.save_dir / "world7"
+    world.mkdir()
+    (world / "Level.sav").write_bytes(LEVEL_SAV)
+    (world / "name.txt").write_text("Unmodded")
+    ue4ss = install / "Pal" / "Binaries" / "Win64" / "ue4ss"
+
+    archive = manager.switch_world("world7")
+    mods = manager.save_dir / manager.active_id / "Mods"
+    assert not any((mods / folder).exists() for folder in ["~mods", "LogicMods", "ue4ss"])
+    assert not ue4ss.exists()
+
+    unmodded = manager.switch_world(archive)
+    assert pwsm.is_link(ue4ss)
+    copied = manager.copy_from_world_to_active(unmodded, copy_settings=False)
+    assert copied == {}
+    assert (ue4ss / "UE4SS.dll").exists()
+
+
+def test_paste_skips_empty_folders_left_by_older_versions(install, manager):
+    world = manager.save_dir / "world7"
+    (world / "Mods" / "ue4ss").mkdir(parents=True)
+    (world / "Level.sav").write_bytes(LEVEL_SAV)
+    copied = manager.copy_from_world_to_active("world7", copy_settings=False)
+    assert "ue4ss" not in copied
+    assert (install / "Pal" / "Binaries" / "Win64" / "ue4ss" / "UE4SS.dll").exists()
@@ -0,0 +1,50 @@
+import time
+
+import PalworldSaveManager as pwsm
+from conftest import LIVE_MODS
+
+PAK = "Pal/Content/Paks/~mods/a.pak"
+
+
+def write_in_place(path, data):
+    with open(path, "r+b") as f:
+        f.write(data)
+
+
+def test_live_mods_are_not_shared_with_worlds(install, manager):
+    archive = manager.new_world("Fresh")
+    manager.copy_from_world_to_active(archive, copy_settings=False)
+    live = install / PAK
+    assert live.stat().st_nlink == 1
+    write_in_place(live, b"V2V2V2")
+    assert (manager.save_dir / archive / "Mods" / "~mods" / "a.pak").read_bytes() == LIVE_MODS[PAK]
+
+
+def test_restore_unshares_live_files_linked_by_older_versions(install, manager):
+    archive = manager.new_world("Fresh")
+    manager.switch_world(archive)
+    live, blob = install / PAK, manager.save_dir / manager.active_id / "Mods" / "~mods" / "a.pak"
+    # What older versions left behind: the live file is a hardlink of the store blob
+    live.unlink()
+    pwsm.os.link(blob, live)
+    manager.restore_world(manager.active_id, verify=False)
+    assert not pwsm.os.path.samefile(live, blob)
+
+
+def test_verify_and_gc_flag_a_blob_written_through_a_link(monkeypatch, manager):
+    archive = manager.new_world("Fresh")
+    pak = manager.save_dir / archive / "Mods" / "~mods" / "a.pak"
+    assert manager.verify_world(archive)["problems"] == []
+    write_in_place(pak, b"V2V2V2")
+
+    problems = manager.verify_world(archive)["problems"]
+    assert [p["path"] for p in problems] == ["Mods/~mods/a.pak"]
+    assert "changed in place" in problems[0]["issue"]
+
+    # Once past the grace period, gc rehashes the blob and moves it out of the store
+    later = time.time() + 7200
+    monkeypatch.setattr(pwsm.time, "time", lambda: later)
+    corrupt = manager.store.gc()
+    assert len(corrupt) == 1
+    assert not manager.store.blob_path(corrupt[0]).exists()
+    assert (manager.store.corrupt_dir / corrupt[0]).exists()
@@ -0,0 +1,43 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import PalworldSaveManager as pwsm
+
+
+def fake_server(install):
+    """Start a long sleep from an executable named like PalServer inside install."""
+    exe = install / "PalServer-Linux"
+    exe.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(shutil.which("sleep"), exe)
+    return subprocess.Popen([str(exe), "60"], cwd=install)
+
+
+@pytest.mark.skipif(sys.platform != "linux" or not shutil.which("sleep"), reason="needs /proc and sleep")
+def test_server_pids_ignores_other_installs(tmp_path):
+    ours, theirs = fake_server(tmp_path / "ours"), fake_server(tmp_path / "theirs")
+    try:
+        manager = pwsm.SaveManager(tmp_path / "ours")
+        pids = manager.server_pids()
+        assert ours.pid in pids
+        assert theirs.pid not in pids
+    finally:
+        for proc in (ours, theirs):
+            proc.kill()
+            proc.wait()
+
+
+def test_server_pids_matches_by_path(monkeypatch, tmp_path):
+    install = tmp_path / "server"
+    table = {10: (1, "PalServer.exe", 4), 11: (10, "PalServer-Win64-Shipping-Cmd.exe", 60),
+             20: (1, "PalServer.exe", 4), 30: (1, "bash", 1)}
+    paths = {10: (str(install / "PalServer.exe"), None),
+             11: (None, str(install / "Pal" / "Binaries" / "Win64")),
+             20: (str(tmp_path / "server2" / "PalServer.exe"), str(tmp_path / "server2")),
+             30: (None, str(install))}
+    monkeypatch.setattr(pwsm, "process_paths", lambda pid: paths[pid])
+    manager = pwsm.SaveManager(install)
+    assert manager.server_pids(table) == {10, 11}
@@ -0,0 +1,39 @@
+import pytest
+
+import PalworldSaveManager as pwsm
+
+
+def write_during_read(monkeypatch, path, times):
+    """Make the next `times` reads of path see the server rewrite it mid-read."""
+    real = pwsm.iter_chunks
+    left = [times]
+
+    def chunks(f, fixed=False):
+        for chunk in real(f, fixed):
+            yield chunk
+            if left[0] and f.name == str(path):
+                left[0] -= 1
+                with open(path, "ab") as out:
+                    out.write(b"more")
+    monkeypatch.setattr(pwsm, "iter_chunks", chunks)
+
+
+def test_snapshot_of_a_save_written_mid_read_is_refused(monkeypatch, manager):
+    level = manager.save_dir / manager.active_id / "Level.sav"
+    write_during_read(monkeypatch, level, 1)
+    with pytest.raises(pwsm.SaveChangedError):
+        manager.create_snapshot(manager.active_id)
+    assert manager.list_snapshots(manager.active_id) == []
+
+
+def test_snapshot_all_worlds_retries_then_skips(monkeypatch, manager):
+    monkeypatch.setattr(manager, "hot_backup_settle", 0)
+    level = manager.save_dir / manager.active_id / "Level.sav"
+    write_during_read(monkeypatch, level, 1)
+    snap_id, _ = manager.snapshot_all_worlds()[manager.active_id]
+    assert snap_id is not None
+    files = manager.list_snapshots(manager.active_id)[0]["files"]
+    assert files["Level.sav"]["size"] == level.stat().st_size
+
+    write_during_read(monkeypatch, level, pwsm.SNAPSHOT_RETRIES)
+    assert manager.snapshot_all_worlds()[manager.active_id] == (None, 0)
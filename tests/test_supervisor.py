@@ -0,0 +1,50 @@
+import PalworldSaveManager as pwsm
+
+
+class FakeProc:
+    pid = 4242
+
+
+class FakeManager:
+    """Just enough of a SaveManager for ServerSupervisor.run."""
+
+    def __init__(self, tmp_path, restart_max):
+        self.telemetry_interval = 1
+        self.telemetry_samples = 10
+        self.telemetry_format = "csv"
+        self.telemetry_dir = tmp_path / "telemetry"
+        self.pid_file = tmp_path / "server.pid"
+        self.hot_backup = False
+        self.restart_on_crash = True
+        self.restart_max = restart_max
+        self.launches = 0
+
+    def launch_server(self):
+        self.launches += 1
+        self.pid_file.write_text("{}")
+        return FakeProc()
+
+
+def run_crashing(monkeypatch, tmp_path, crashes, stable_run):
+    """Supervise a server that crashes `crashes` times and is then stopped. Returns (manager, supervisor)."""
+    manager = FakeManager(tmp_path, restart_max=2)
+    supervisor = pwsm.ServerSupervisor(manager)
+    codes = iter([1] * crashes + [None])
+    monkeypatch.setattr(supervisor, "_monitor", lambda: next(codes))
+    monkeypatch.setattr(supervisor._stop, "wait", lambda timeout: False)
+    monkeypatch.setattr(pwsm, "STABLE_RUN", stable_run)
+    supervisor.run()
+    return manager, supervisor
+
+
+def test_crash_loop_stops_after_restart_max(monkeypatch, tmp_path):
+    manager, supervisor = run_crashing(monkeypatch, tmp_path, crashes=5, stable_run=3600)
+    assert manager.launches == 3
+    assert supervisor.restarts == 2
+
+
+def test_stable_run_resets_restart_count(monkeypatch, tmp_path):
+    # Every run counts as stable, so crashes never add up to restart_max
+    manager, supervisor = run_crashing(monkeypatch, tmp_path, crashes=5, stable_run=-1)
+    assert manager.launches == 6
+    assert supervisor.restarts == 1
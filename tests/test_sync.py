@@ -0,0 +1,75 @@
+import os
+
+import PalworldSaveManager as pwsm
+from conftest import LEVEL_SAV
+
+
+def pak(data):
+    return data + pwsm.PAK_MAGIC
+
+
+def write_tree(root, files):
+    for rel, data in files.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(data)
+
+
+def tree(root):
+    """{relative path: contents, or None for a folder} of everything under root."""
+    found = {}
+    for dirpath, dirnames, files in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        for name in dirnames:
+            found[os.path.normpath(os.path.join(rel_dir, name))] = None
+        for name in files:
+            found[os.path.normpath(os.path.join(rel_dir, name))] = open(os.path.join(dirpath, name), "rb").read()
+    return found
+
+
+# "sub" is a folder in the active world and a file in the other one, "swap" the other way round
+ACTIVE_MODS = {"~mods/a.pak": pak(b"active a"), "~mods/sub/x.pak": pak(b"x"), "~mods/gone.pak": pak(b"gone"),
+               "~mods/swap": b"a file"}
+OTHER_MODS = {"~mods/a.pak": pak(b"other a"), "~mods/sub": b"now a file", "~mods/swap/y.pak": pak(b"y"),
+              "~mods/deep/er/z.pak": pak(b"z")}
+
+
+def make_other_world(manager):
+    world = manager.save_dir / "world7"
+    world.mkdir()
+    (world / "Level.sav").write_bytes(LEVEL_SAV)
+    (world / "name.txt").write_text("Other")
+    write_tree(world / "Mods", OTHER_MODS)
+    return world
+
+
+def test_switch_mirrors_deletions_and_type_changes_both_ways(install, manager):
+    live_mods = install / "Pal" / "Content" / "Paks" / "~mods"
+    pwsm.shutil.rmtree(live_mods)
+    write_tree(live_mods.parent, ACTIVE_MODS)
+    active_before = tree(live_mods)
+    make_other_world(manager)
+
+    archive = manager.switch_world("world7")
+    assert tree(live_mods) == tree(manager.save_dir / manager.active_id / "Mods" / "~mods")
+    assert tree(live_mods)["sub"] == b"now a file" and tree(live_mods)["swap"] is None
+    assert "gone.pak" not in tree(live_mods)
+    # The other world had no LogicMods, ue4ss or dwmapi.dll
+    assert not (install / "Pal" / "Content" / "Paks" / "LogicMods").exists()
+    assert not (install / "Pal" / "Binaries" / "Win64" / "ue4ss").exists()
+    assert not (install / "Pal" / "Binaries" / "Win64" / "dwmapi.dll").exists()
+    assert tree(manager.save_dir / archive / "Mods" / "~mods") == active_before
+
+    manager.switch_world(archive)
+    assert tree(live_mods) == active_before
+    assert (install / "Pal" / "Binaries" / "Win64" / "ue4ss" / "UE4SS.dll").exists()
+
+
+def test_sync_tree_counts_removals(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    write_tree(src, {"keep.pak": pak(b"k"), "dir/file.txt": b"1"})
+    write_tree(dst, {"keep.pak": pak(b"old"), "dir": b"was a file", "extra.txt": b"x", "old/nested/f.txt": b"f"})
+    store = pwsm.ModStore(tmp_path / "store")
+    written, _, removed = store.sync_tree(src, dst)
+    assert tree(dst) == tree(src)
+    assert (written, removed) == (2, 3)
+    assert store.sync_tree(src, dst) == (0, 0, 0)
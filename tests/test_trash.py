@@ -0,0 +1,96 @@
+import configparser
+import json
+import threading
+
+import PalworldSaveManager as pwsm
+from conftest import ACTIVE_ID
+
+
+def test_store_gc_only_runs_while_holding_the_instance_lock(monkeypatch, manager):
+    collected = []
+    monkeypatch.setattr(manager.store, "gc", lambda: collected.append(manager.lock._depth))
+    held, release = threading.Event(), threading.Event()
+
+    def operation():
+        with manager.lock.hold():
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=operation)
+    thread.start()
+    held.wait()
+    manager.trash.collect_store()
+    assert collected == [] and manager.trash.gc_pending
+    release.set()
+    thread.join()
+
+    manager.trash.collect_store()
+    assert collected == [1] and not manager.trash.gc_pending
+
+
+def make_worlds(root, sizes):
+    """World folders world0, world1, ... with one file of each size."""
+    worlds = []
+    for i, size in enumerate(sizes):
+        world = root / f"world{i}"
+        world.mkdir(parents=True)
+        (world / "Level.sav").write_bytes(b"x" * size)
+        (world / "name.txt").write_text(f"World {i}")
+        worlds.append(world)
+    return worlds
+
+
+def fake_clock(monkeypatch):
+    """time.time() that moves on a second per call, so each deletion gets its own timestamp."""
+    now = [1_700_000_000]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+    monkeypatch.setattr(pwsm.time, "time", tick)
+
+
+def trash_for(tmp_path, **limits):
+    return pwsm.Trash(tmp_path / "trash", tmp_path / "sizes.json", pwsm.ModStore(tmp_path / "store"), **limits)
+
+
+def test_eviction_by_count_drops_the_oldest(monkeypatch, tmp_path):
+    fake_clock(monkeypatch)
+    trash = trash_for(tmp_path, max_count=2)
+    names = [trash.add(world, 10) for world in make_worlds(tmp_path / "saves", [10, 10, 10])]
+    trash.wait()
+    assert sorted(d.name for d in trash.entries()) == names[1:]
+    assert json.loads((tmp_path / "sizes.json").read_text()) == {names[1]: 10, names[2]: 10}
+    assert not any(p.name.startswith(pwsm.PURGE_PREFIX) for p in (tmp_path / "trash").iterdir())
+
+
+def test_eviction_by_size_counts_entries_without_a_recorded_size(monkeypatch, tmp_path):
+    fake_clock(monkeypatch)
+    trash = trash_for(tmp_path, max_bytes=250)
+    worlds = make_worlds(tmp_path / "saves", [100, 100, 100])
+    first = trash.add(worlds[0])  # size unknown: measured when the limit is checked
+    second = trash.add(worlds[1], 100 + len("World 1"))
+    assert sorted(d.name for d in trash.entries()) == [first, second]
+    third = trash.add(worlds[2], 100 + len("World 2"))
+    trash.wait()
+    assert sorted(d.name for d in trash.entries()) == [second, third]
+    assert set(json.loads((tmp_path / "sizes.json").read_text())) == {second, third}
+
+
+def test_undo_after_eviction(monkeypatch, install):
+    fake_clock(monkeypatch)
+    settings = configparser.ConfigParser()
+    settings["DEFAULT"]["trash_max_count"] = "1"
+    manager = pwsm.SaveManager(install, active_id=ACTIVE_ID, settings=settings["DEFAULT"])
+    for world in make_worlds(manager.save_dir, [10, 20]):
+        manager.delete_world(world.name)
+    manager.trash.wait()
+    deleted = manager.list_deleted()
+    assert [friendly for _, friendly in deleted] == ["World 1"]
+
+    folder = manager.undo_delete(deleted[0][0])
+    assert folder == "World 1"
+    assert (manager.save_dir / folder / "Level.sav").stat().st_size == 20
+    assert manager.list_deleted() == []
+    assert json.loads(manager.trash.sizes_file.read_text()) == {}
+    assert folder in manager.index.refresh(manager.active_id)
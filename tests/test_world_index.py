@@ -0,0 +1,38 @@
+import os
+import shutil
+
+from conftest import LEVEL_SAV
+
+
+def test_only_the_tools_own_folders_are_hidden(manager):
+    for folder in ["__mine__", "world1"]:
+        (manager.save_dir / folder).mkdir()
+        (manager.save_dir / folder / "Level.sav").write_bytes(LEVEL_SAV)
+    manager.trash_dir.mkdir()
+    manager.meta_dir.mkdir(exist_ok=True)
+    assert [folder for folder, _, _ in manager.list_worlds()] == ["__mine__", "world1"]
+
+
+def test_a_copied_world_gets_its_own_id_and_history(manager):
+    original = manager.save_dir / manager.active_id
+    manager.create_snapshot(manager.active_id)
+    uid = manager.index.refresh(manager.active_id)[manager.active_id]["uid"]
+
+    shutil.copytree(original, manager.save_dir / "world1")
+    index = manager.index.refresh(manager.active_id)
+    assert index[manager.active_id]["uid"] == uid
+    assert index["world1"]["uid"] != uid
+    assert (manager.save_dir / "world1" / "id.txt").read_text() == index["world1"]["uid"]
+    assert manager.list_snapshots("world1") == []
+    assert len(manager.list_snapshots(manager.active_id)) == 1
+
+
+def test_the_known_folder_keeps_its_id_whatever_the_names(manager):
+    (manager.save_dir / "world1").mkdir()
+    uid = manager.index.refresh(manager.active_id)["world1"]["uid"]
+    # The copy sorts first and has the older id.txt, but the index knew world1's inode
+    shutil.copytree(manager.save_dir / "world1", manager.save_dir / "a_copy")
+    os.utime(manager.save_dir / "a_copy" / "id.txt", (0, 0))
+    index = manager.index.refresh(manager.active_id)
+    assert index["world1"]["uid"] == uid
+    assert index["a_copy"]["uid"] != uid